@@ -0,0 +1,290 @@
+# auditlog.py
+# 코드 감사 로그 (발급·사용·삭제·연장·결제)
+#  - 추가 전용 세그먼트 파일: {AUDIT_DIR}/{작성자}-{번호:06d}.log, 한 줄에 JSON 배열 하나
+#    작성자는 워커별(w0, w1 …)로 나뉘어 파일마다 시간순이 유지됨
+#  - 코드·사용자·그룹별 인덱스 (항목 번호 array) + 시간 열 bisect로 기간 조회
+#  - 최근 AUDIT_HOT_ENTRIES개는 메모리(hot tail), 그 이전 항목은 파일 위치로 읽음
+#  - 다른 워커가 쓴 세그먼트는 조회 직전에 이어 읽음
+
+import os
+import json
+import time
+import heapq
+import bisect
+import logging
+from array import array
+from collections import deque
+from itertools import islice
+from typing import NamedTuple
+from dotenv import load_dotenv
+
+load_dotenv()
+AUDIT_DIR           = os.getenv("AUDIT_DIR", "audit")
+AUDIT_SEGMENT_BYTES = int(os.getenv("AUDIT_SEGMENT_BYTES", str(8 * 1024 * 1024)))   # 세그먼트 최대 크기
+AUDIT_HOT_ENTRIES   = int(os.getenv("AUDIT_HOT_ENTRIES", "2000"))                   # 작성자별 메모리 보관 개수
+
+# 동작 종류
+ISSUE_USER   = "issue_user"     # 사용자 무료 코드 발급
+ISSUE_OWNER  = "issue_owner"    # 소유자 코드 발급
+USE          = "use"            # 그룹에 코드 등록
+DELETE       = "delete"         # 코드 삭제
+EXTEND_ISSUE = "extend_issue"   # 발급 코드 기한 연장
+PAID         = "paid"           # 결제 확인 후 활성화
+
+_SEGMENT_BITS = 40   # 위치 = 세그먼트 번호 << 40 | 파일 내 오프셋
+
+
+class AuditEntry(NamedTuple):
+    time: float
+    action: str
+    code: str
+    user_id: int | None = None
+    group_id: int | None = None
+    days: int | None = None
+    tx: str | None = None
+
+
+class _Source:
+    """작성자 하나의 세그먼트 묶음과 인덱스 (항목 번호 = 이 작성자 안에서의 순번)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.segments: list[str] = []
+        self.read_pos = 0                  # 마지막 세그먼트에서 이어 읽을 위치
+        self.times = array("d")
+        self.locs = array("q")
+        self.by_code: dict[str, array] = {}
+        self.by_user: dict[int, array] = {}
+        self.by_group: dict[int, array] = {}
+        self.hot: deque = deque(maxlen=AUDIT_HOT_ENTRIES)
+        self._files: dict[int, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def add(self, entry: AuditEntry, loc: int) -> None:
+        i = len(self.times)
+        self.times.append(entry.time)
+        self.locs.append(loc)
+        self.by_code.setdefault(entry.code, array("q")).append(i)
+        if entry.user_id is not None:
+            self.by_user.setdefault(entry.user_id, array("q")).append(i)
+        if entry.group_id is not None:
+            self.by_group.setdefault(entry.group_id, array("q")).append(i)
+        self.hot.append(entry)
+
+    def get(self, i: int) -> AuditEntry:
+        cold = len(self.times) - len(self.hot)
+        if i >= cold:
+            return self.hot[i - cold]
+        loc = self.locs[i]
+        seg, offset = loc >> _SEGMENT_BITS, loc & ((1 << _SEGMENT_BITS) - 1)
+        f = self._files.get(seg)
+        if f is None:
+            f = self._files[seg] = open(self.segments[seg], "rb")
+        f.seek(offset)
+        return AuditEntry(*json.loads(f.readline()))
+
+    def tail(self) -> None:
+        """디스크에 새로 추가된 줄(완결된 줄만) 읽어 인덱스에 반영"""
+        while self.segments:
+            seg = len(self.segments) - 1
+            with open(self.segments[seg], "rb") as f:
+                f.seek(self.read_pos)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break   # 쓰는 중인 줄
+                    if line == b"\n":
+                        self.read_pos += 1
+                        continue
+                    try:
+                        entry = AuditEntry(*json.loads(line))
+                    except (ValueError, TypeError):
+                        logging.warning("감사 로그 손상된 줄 건너뜀: %s@%d", self.segments[seg], self.read_pos)
+                    else:
+                        self.add(entry, seg << _SEGMENT_BITS | self.read_pos)
+                    self.read_pos += len(line)
+            nxt = _segment_path(self.name, seg + 1)
+            if not os.path.exists(nxt):
+                break
+            self.segments.append(nxt)
+            self.read_pos = 0
+
+    def ids(self, code=None, user_id=None, group_id=None, since=None, until=None):
+        """조건에 맞는 항목 번호 (최신순)"""
+        keyed = []
+        if code is not None:
+            keyed.append(self.by_code.get(code, ()))
+        if user_id is not None:
+            keyed.append(self.by_user.get(user_id, ()))
+        if group_id is not None:
+            keyed.append(self.by_group.get(group_id, ()))
+        if keyed:
+            ids = min(keyed, key=len)
+            rest = [k for k in keyed if k is not ids]
+        else:
+            ids, rest = range(len(self.times)), []
+        # 작성자별 파일은 시간순이므로 항목 번호 목록도 시간 기준으로 bisect 가능
+        key = self.times.__getitem__
+        lo = bisect.bisect_left(ids, since, key=key) if since is not None else 0
+        hi = bisect.bisect_right(ids, until, key=key) if until is not None else len(ids)
+        for j in range(hi - 1, lo - 1, -1):
+            i = ids[j]
+            if all(_contains(k, i) for k in rest):
+                yield i
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+def _contains(ids: array, i: int) -> bool:
+    j = bisect.bisect_left(ids, i)
+    return j < len(ids) and ids[j] == i
+
+
+def _read_segments(paths: list[str], start: int, end: int):
+    """paths[0]의 start부터 마지막 세그먼트의 end까지 완결된 줄을 순서대로"""
+    for n, path in enumerate(paths):
+        last = n == len(paths) - 1
+        with open(path, "rb") as f:
+            f.seek(start if n == 0 else 0)
+            pos = f.tell()
+            for line in f:
+                pos += len(line)
+                if last and pos > end:
+                    return
+                if line != b"\n":
+                    try:
+                        yield AuditEntry(*json.loads(line))
+                    except (ValueError, TypeError):
+                        continue
+
+
+def _matching(entries, code, user_id, group_id, until):
+    for e in entries:
+        if until is not None and e.time > until:
+            break
+        if ((code is None or e.code == code) and (user_id is None or e.user_id == user_id)
+                and (group_id is None or e.group_id == group_id)):
+            yield e
+
+
+def _segment_path(source: str, seq: int) -> str:
+    return os.path.join(AUDIT_DIR, f"{source}-{seq:06d}.log")
+
+
+class AuditLog:
+    def __init__(self):
+        self.source: str | None = None          # 이 프로세스가 쓰는 작성자 이름
+        self._sources: dict[str, _Source] = {}
+        self._out = None
+
+    def open(self, source: str = "w0") -> None:
+        """세그먼트를 모두 읽어 인덱스 구성 후 이 작성자의 마지막 세그먼트에 이어 쓰기"""
+        os.makedirs(AUDIT_DIR, exist_ok=True)
+        self.source = source
+        self._refresh(include_own=True)
+        own = self._sources.setdefault(source, _Source(source))
+        if not own.segments:
+            own.segments.append(_segment_path(source, 0))
+        self._out = open(own.segments[-1], "ab")
+        # 비정상 종료로 끝이 잘린 줄은 다음 줄과 섞이지 않도록 줄바꿈으로 마감
+        if self._out.tell() > own.read_pos:
+            self._out.write(b"\n")
+            self._out.flush()
+            own.read_pos = self._out.tell()
+
+    def _refresh(self, include_own: bool) -> None:
+        """새 작성자 세그먼트 발견 + 기존 작성자의 추가분 읽기"""
+        for name in sorted(os.listdir(AUDIT_DIR)):
+            source, _, rest = name.rpartition("-")
+            if source and rest.endswith(".log") and source not in self._sources:
+                src = self._sources[source] = _Source(source)
+                src.segments.append(_segment_path(source, 0))
+        for name, src in self._sources.items():
+            if (include_own or name != self.source) and os.path.exists(src.segments[0]):
+                src.tail()
+
+    def close(self) -> None:
+        if self._out:
+            self._out.flush()
+            os.fsync(self._out.fileno())
+            self._out.close()
+            self._out = None
+        for src in self._sources.values():
+            src.close()
+
+    def record(self, action: str, code: str, *, user_id: int | None = None, group_id: int | None = None,
+               days: int | None = None, tx: str | None = None) -> AuditEntry:
+        """감사 로그 한 건 추가"""
+        entry = AuditEntry(time.time(), action, code, user_id, group_id, days, tx)
+        if self._out is None:
+            self.open()
+        own = self._sources[self.source]
+        if own.read_pos >= AUDIT_SEGMENT_BYTES:
+            self._out.close()
+            own.segments.append(_segment_path(self.source, len(own.segments)))
+            own.read_pos = 0
+            self._out = open(own.segments[-1], "ab")
+        line = json.dumps(list(entry), ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        self._out.write(line)
+        self._out.flush()
+        own.add(entry, (len(own.segments) - 1) << _SEGMENT_BITS | own.read_pos)
+        own.read_pos += len(line)
+        return entry
+
+    def query(self, code: str | None = None, user_id: int | None = None, group_id: int | None = None,
+              since: float | None = None, until: float | None = None, limit: int = 20) -> list[AuditEntry]:
+        """조건에 맞는 최신 limit개 (최신순)"""
+        if self._out is None and self.source is None:
+            return []
+        # 다른 작성자(워커)가 그 사이 추가한 세그먼트 반영
+        if os.path.isdir(AUDIT_DIR):
+            self._refresh(include_own=False)
+        streams = [map(src.get, src.ids(code, user_id, group_id, since, until))
+                   for src in self._sources.values()]
+        merged = heapq.merge(*streams, key=lambda e: e.time, reverse=True)
+        return list(islice(merged, limit))
+
+    def scan(self, code: str | None = None, user_id: int | None = None, group_id: int | None = None,
+             since: float | None = None, until: float | None = None):
+        """조건에 맞는 전체 항목을 오래된 순으로 (세그먼트 순차 읽기, 내보내기용)
+        호출 시점까지 기록된 항목으로 고정되며, 반환된 iterator는 작업 스레드에서 소비해도 됨"""
+        if self.source is not None and os.path.isdir(AUDIT_DIR):
+            self._refresh(include_own=False)
+        streams = []
+        for src in self._sources.values():
+            start = bisect.bisect_left(src.times, since) if since is not None else 0
+            if start < len(src):
+                loc = src.locs[start]
+                streams.append(_read_segments(src.segments[loc >> _SEGMENT_BITS:], loc & ((1 << _SEGMENT_BITS) - 1),
+                                              src.read_pos))
+        return _matching(heapq.merge(*streams, key=lambda e: e.time), code, user_id, group_id, until)
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._sources.values())
+
+
+audit = AuditLog()
+
+
+def open_log(source: str = "w0") -> None:
+    audit.open(source)
+
+
+def close_log() -> None:
+    audit.close()
+
+
+def record(action: str, code: str, **fields) -> AuditEntry:
+    return audit.record(action, code, **fields)
+
+
+def query(**conditions) -> list[AuditEntry]:
+    return audit.query(**conditions)
+
+
+def scan(**conditions):
+    return audit.scan(**conditions)
@@ -0,0 +1,99 @@
+# bench/bench_auditlog.py
+# 코드 감사 로그 조회 지연 측정 (이전 방식인 리스트 선형 필터와 비교)
+#  - 임시 AUDIT_DIR에 작성자 2개(w0, w1)로 N건 기록 → 재시작(다시 열기) 시간 → 조건별 최신 20건 조회
+#  - 리스트 필터 결과와 항목이 같은지도 함께 확인
+#
+#   python bench/bench_auditlog.py [--entries 1000000] [--repeat 20]
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AUDIT_DIR", tempfile.mkdtemp(prefix="audit-bench-"))
+os.environ.setdefault("AUDIT_SEGMENT_BYTES", str(4 * 1024 * 1024))
+import auditlog
+
+ACTIONS = [auditlog.ISSUE_USER, auditlog.USE, auditlog.EXTEND_ISSUE, auditlog.PAID, auditlog.DELETE]
+
+
+def _ms(fn, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t) * 1000)
+    return statistics.median(runs)
+
+
+def _scan(entries, limit=20, code=None, user_id=None, group_id=None, since=None, until=None):
+    """이전 방식: 전체 목록 필터 후 최신 limit개"""
+    found = [e for e in entries
+             if (code is None or e.code == code) and (user_id is None or e.user_id == user_id)
+             and (group_id is None or e.group_id == group_id)
+             and (since is None or e.time >= since) and (until is None or e.time <= until)]
+    return found[::-1][:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    n = args.entries
+    rnd = random.Random(5)
+    codes = [f"C{i:06d}" for i in range(max(n // 20, 1))]
+
+    # 작성자 2개가 번갈아 기록 (워커 2개 상황)
+    writers = [auditlog.AuditLog(), auditlog.AuditLog()]
+    for i, w in enumerate(writers):
+        w.open(f"w{i}")
+    t = time.perf_counter()
+    for i in range(n):
+        action = rnd.choice(ACTIONS)
+        writers[i % 2].record(action, rnd.choice(codes), user_id=rnd.randrange(10_000),
+                              group_id=-rnd.randrange(1, 2_000) if action == auditlog.USE else None,
+                              days=rnd.choice((3, 10, 30)))
+    write = time.perf_counter() - t
+    for w in writers:
+        w.close()
+
+    t = time.perf_counter()
+    log = auditlog.AuditLog()
+    log.open("w0")
+    reopen = time.perf_counter() - t
+    size = sum(os.path.getsize(os.path.join(auditlog.AUDIT_DIR, f)) for f in os.listdir(auditlog.AUDIT_DIR))
+    print(f"entries         : {len(log):,} ({len(os.listdir(auditlog.AUDIT_DIR))} segments, {size / 1e6:.0f} MB)")
+    print(f"write           : {write / n * 1e6:.1f} µs/entry")
+    print(f"reopen + index  : {reopen:.2f}s")
+
+    # 비교용 전체 목록 (이전 방식의 메모리 리스트, 시간순)
+    entries = sorted(log.query(limit=n), key=lambda e: e.time)
+    span = entries[-1].time - entries[0].time
+    mid = entries[0].time + span / 2
+    cases = [
+        ("latest", {}),
+        ("code", {"code": codes[7]}),
+        ("user", {"user_id": 42}),
+        ("group", {"group_id": -17}),
+        ("user + code", {"user_id": entries[n // 3].user_id, "code": entries[n // 3].code}),
+        ("time 1%", {"since": mid, "until": mid + span / 100}),
+        ("code + time", {"code": codes[7], "since": mid}),
+        ("missing code", {"code": "NOPE"}),
+    ]
+    print(f"\n{'query':<16}{'index ms':>10}{'scan ms':>10}{'hits':>6}  same")
+    for label, cond in cases:
+        hits = log.query(**cond, limit=20)
+        same = hits == _scan(entries, **cond)
+        indexed = _ms(lambda: log.query(**cond, limit=20), args.repeat)
+        scanned = _ms(lambda: _scan(entries, **cond), max(1, args.repeat // 10))
+        print(f"{label:<16}{indexed:>10.3f}{scanned:>10.2f}{len(hits):>6}  {'ok' if same else 'DIFF'}")
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
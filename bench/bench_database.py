@@ -0,0 +1,107 @@
+# bench/bench_database.py
+# database.py 보조 인덱스 확장성 측정 + 무작위 변경 후 인덱스 일관성 검사
+#
+#   python bench/bench_database.py [--sizes 1000,10000,100000,1000000]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+
+OPS = 2000
+
+
+def _sync(coro):
+    """기다리는 지점 없이 끝나는 코루틴 실행 (단독 모드의 database 변경 함수는 저장소를 기다리지 않음)"""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError("코루틴이 저장소를 기다림 (공유 모드에서는 이벤트 루프 필요)")
+
+
+def _reset():
+    for table in (database._codes, database._groups, database._group_logs, database._group_participants,
+                  database._user_codes_by_owner, database._owner_codes_by_owner, database._groups_by_code):
+        table.clear()
+
+
+def _populate(n: int) -> None:
+    """n개 코드 (절반 일반·절반 소유자 코드)와 n/10개 그룹 생성"""
+    _reset()
+    for i in range(n // 2):
+        database.issue_owner_code(f"o{i}", i, 30)
+    for i in range(n - n // 2):
+        code = f"u{i}"
+        database._put_code(code, {"owner": 10_000_000 + i, "expires": time.time() + 86400, "is_owner_code": False})
+    for i in range(n // 10):
+        _sync(database.register_group_to_code(f"o{i % (n // 2)}", -1_000_000 - i))
+
+
+def _per_op_us(fn) -> float:
+    start = time.perf_counter()
+    for i in range(OPS):
+        fn(i)
+    return (time.perf_counter() - start) / OPS * 1e6
+
+
+def bench(n: int) -> dict:
+    _populate(n)
+    half = n // 2
+    return {
+        "register_code":      _per_op_us(lambda i: _sync(database.register_code(20_000_000 + i))),
+        "get_codes_by_owner": _per_op_us(lambda i: database.get_codes_by_owner(10_000_000 + i)),
+        "get_owner_codes":    _per_op_us(lambda i: database.get_owner_codes(i % half)),
+        "get_groups_by_code": _per_op_us(lambda i: database.get_groups_by_code(f"o{i % half}")),
+        "extend_code":        _per_op_us(lambda i: _sync(database.extend_code(f"o{i % half}", 1))),
+        "delete_code":        _per_op_us(lambda i: _sync(database.delete_code(f"o{i}"))),
+    }
+
+
+def consistency(rounds: int = 20000, seed: int = 1) -> None:
+    """무작위 변경을 섞어 실행한 뒤 인덱스와 원본 테이블 비교"""
+    _reset()
+    rnd = random.Random(seed)
+    codes = [f"k{i}" for i in range(200)]
+    for _ in range(rounds):
+        op = rnd.randrange(7)
+        code = rnd.choice(codes)
+        if op == 0:
+            database.issue_owner_code(code, rnd.randrange(20), rnd.randrange(1, 5))
+        elif op == 1:
+            _sync(database.register_code(rnd.randrange(50), max_free=rnd.randrange(1, 3)))
+        elif op == 2:
+            _sync(database.delete_code(code))
+        elif op == 3:
+            _sync(database.extend_code(code, 1))
+        elif op == 4:
+            _sync(database.register_group_to_code(code, -rnd.randrange(300)))
+        elif op == 5:
+            _sync(database.disconnect_user(-rnd.randrange(300)))
+        else:
+            database.extend_group(-rnd.randrange(300))
+    database.check_indexes()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    args = parser.parse_args()
+
+    consistency()
+    print("index consistency   : ok")
+
+    sizes = [int(x) for x in args.sizes.split(",")]
+    results = {n: bench(n) for n in sizes}
+    names = list(next(iter(results.values())))
+    print(f"{'µs/op':<20}" + "".join(f"{n:>12,}" for n in sizes))
+    for name in names:
+        print(f"{name:<20}" + "".join(f"{results[n][name]:>12.2f}" for n in sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# bench/bench_detect.py
+# 로컬 문자 체계 감지로 줄어드는 /detect 호출 수와 절약 지연 시간 측정
+#
+#   python bench/bench_detect.py [--rtt-ms 180] [--min-confidence 0.8]
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import script_detect
+
+# 그룹 대화에서 흔한 메시지 유형을 섞은 대표 코퍼스
+CORPUS = [
+    "안녕하세요", "오늘 몇 시에 출근해요?", "네 알겠습니다", "감사합니다!", "내일 8시 교대입니다",
+    "가격이 얼마예요?", "ㅋㅋㅋ", "회의는 3시로 변경", "오늘 휴무 맞나요", "수고하셨습니다",
+    "你好", "今天几点上班？", "好的，谢谢", "价格多少钱", "明天八点换班", "辛苦了",
+    "我已经到了", "请稍等一下", "没问题",
+    "សួស្តី", "អរគុណច្រើន", "ថ្ងៃនេះម៉ោងប៉ុន្មាន?", "បាទ/ចាស", "ខ្ញុំមកដល់ហើយ",
+    "Xin chào", "Hôm nay mấy giờ làm?", "Cảm ơn nhiều", "Giá bao nhiêu?", "Mai ca 8 giờ",
+    "Tôi đến rồi", "Vâng ạ", "Chờ một chút",
+    "ok", "OK", "hello", "thanks", "yes", "100$", "8h", "lol",
+    "hello 안녕하세요", "ok 好的", "Shift at 8 tomorrow", "em ok",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt-ms", type=float, default=180.0, help="원격 /detect 평균 왕복 시간(ms)")
+    parser.add_argument("--min-confidence", type=float, default=0.8)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    local = [script_detect.detect(t) for t in CORPUS]
+    confident = sum(1 for d in local if d.lang and d.confidence >= args.min_confidence)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in CORPUS:
+            script_detect.detect(text)
+    per_msg_us = (time.perf_counter() - start) / (args.repeat * len(CORPUS)) * 1e6
+
+    n = len(CORPUS)
+    remote = n - confident
+    before_ms = n * args.rtt_ms
+    after_ms = remote * args.rtt_ms + n * per_msg_us / 1000
+    print(f"messages            : {n}")
+    print(f"detect calls before : {n}")
+    print(f"detect calls after  : {remote} ({(1 - remote / n) * 100:.1f}% fewer)")
+    print(f"local detect cost   : {per_msg_us:.1f} µs/message")
+    print(f"detect latency      : {before_ms / n:.1f} ms → {after_ms / n:.1f} ms per message (avg)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench/bench_export.py
+# /exportlogs 파이프라인 처리량·메모리 측정
+#  - 임시 SQLite 저장소에 한 그룹 N줄을 넣은 뒤 JSONL / CSV gzip 내보내기
+#  - 내보내기 중 파이썬 할당 최대치(tracemalloc)가 줄 수와 무관하게 일정한지 확인, 처리량은 따로 측정
+#
+#   python bench/bench_export.py [--lines 10000000]
+
+import os
+import sys
+import time
+import asyncio
+import random
+import sqlite3
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+import export
+
+GROUP = -1001
+WORDS = ["안녕하세요", "내일", "회의", "你好", "明天", "会议", "សួស្តី", "ប្រជុំ", "xin", "chào", "họp", "ok", "👍"]
+
+
+def _fill(path: str, n: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    rnd = random.Random(9)
+    start = time.time() - n
+    rows = ((GROUP, start + i, 1000 + i % 300, f"user_{i % 300}", " ".join(rnd.choices(WORDS, k=rnd.randint(2, 12))))
+            for i in range(n))
+    conn.executemany("INSERT INTO group_logs (group_id, time, user_id, username, message) VALUES (?, ?, ?, ?, ?)",
+                     rows)
+    conn.commit()
+    conn.close()
+
+
+def _run(fmt: str, label: str) -> None:
+    lines, header = asyncio.run(export.group_logs(GROUP, fmt=fmt))
+    stats = export.write_parts(lines, f"bench.{fmt}", header)
+    export.cleanup(stats["paths"])
+    print(f"{label:<6}{len(stats['paths']):>3} parts  {export.summary(stats)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="export-bench-")
+    path = os.path.join(tmp, "bot.db")
+    database.init_storage("sqlite", path)   # 스키마 생성
+    t = time.perf_counter()
+    _fill(path, args.lines)
+    print(f"fill {args.lines:,} rows: {time.perf_counter() - t:.1f}s")
+
+    for n in sorted({args.lines // 100, args.lines // 10, args.lines}):
+        until = time.time() - args.lines + n - 1
+        lines, _ = asyncio.run(export.group_logs(GROUP, until=until))
+        tracemalloc.start()
+        stats = export.write_parts(lines, "bench")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        export.cleanup(stats["paths"])
+        print(f"jsonl {n:>11,} lines  peak alloc {peak / 1e6:5.1f} MB")
+    print("\nthroughput (tracemalloc off)")
+    _run("jsonl", "jsonl")
+    _run("csv", "csv")
+    database.close_storage()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench/bench_logs.py
+# 그룹 로그 메모리 사용량 비교: 기존 dict 리스트 vs LogRing (메시지당 바이트)
+#
+#   python bench/bench_logs.py [--messages 200000] [--capacity 500] [--groups 100]
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logring import LogRing
+
+USERS = [(1000 + i, f"user_{i}") for i in range(30)]
+LINES = ["안녕하세요", "好的，谢谢", "Cảm ơn nhiều", "ok", "내일 8시 교대입니다", "ថ្ងៃនេះម៉ោងប៉ុន្មាន?"]
+
+
+def _traffic(n: int, groups: int):
+    rnd = random.Random(7)
+    now = time.time()
+    for i in range(n):
+        uid, uname = rnd.choice(USERS)
+        # 실제 업데이트처럼 메시지마다 새 문자열 객체가 만들어짐
+        yield -1000 - rnd.randrange(groups), now + i, uid, "".join(uname), rnd.choice(LINES) + f" {i}"
+
+
+def measure(make_store, n: int, groups: int) -> tuple[int, int]:
+    tracemalloc.start()
+    store = make_store()
+    for gid, ts, uid, uname, msg in _traffic(n, groups):
+        store(gid, ts, uid, uname, msg)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--capacity", type=int, default=500)
+    parser.add_argument("--groups", type=int, default=100)
+    args = parser.parse_args()
+
+    def dict_lists():
+        logs: dict[int, list[dict]] = {}
+        def add(gid, ts, uid, uname, msg):
+            logs.setdefault(gid, []).append({"time": ts, "user_id": uid, "username": uname, "message": msg})
+        add.logs = logs
+        return add
+
+    def rings(capacity):
+        def make():
+            logs: dict[int, LogRing] = {}
+            def add(gid, ts, uid, uname, msg):
+                ring = logs.get(gid)
+                if ring is None:
+                    ring = logs[gid] = LogRing(capacity)
+                ring.append(ts, uid, uname, msg)
+            return add
+        return make
+
+    base, n = measure(dict_lists, args.messages, args.groups)
+    full, _ = measure(rings(args.messages), args.messages, args.groups)
+    bounded, _ = measure(rings(args.capacity), args.messages, args.groups)
+    kept = min(n, args.capacity * args.groups)
+
+    print(f"messages logged         : {n:,} across {args.groups} groups")
+    print(f"list[dict] (unbounded)  : {base / 1e6:8.2f} MB  {base / n:7.1f} B/msg")
+    print(f"LogRing (no eviction)   : {full / 1e6:8.2f} MB  {full / n:7.1f} B/msg")
+    print(f"LogRing (cap {args.capacity:>5}/grp) : {bounded / 1e6:8.2f} MB  {bounded / kept:7.1f} B/kept msg")
+
+
+if __name__ == "__main__":
+    main()
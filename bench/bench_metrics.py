@@ -0,0 +1,78 @@
+# bench/bench_metrics.py
+# 계측 오버헤드 측정
+#  - 빈 핸들러 / 1ms 대기 핸들러를 그대로 vs metrics.timed로 감싸서 호출
+#  - Histogram.observe 1회 비용, 핸들러 30개 + API 3종이 있을 때 /metrics 출력 생성 시간
+#
+#   python bench/bench_metrics.py [--calls 200000]
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics
+
+
+async def _noop(update, context):
+    return None
+
+
+async def _per_call(handler, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await handler(None, None)
+    return (time.perf_counter() - started) / calls
+
+
+async def _main(calls: int) -> None:
+    wrapped = metrics.timed("bench", _noop)
+    raw_s = min([await _per_call(_noop, calls) for _ in range(3)])
+    wrapped_s = min([await _per_call(wrapped, calls) for _ in range(3)])
+    print(f"empty handler        : {raw_s * 1e9:8.0f} ns → {wrapped_s * 1e9:8.0f} ns "
+          f"(+{(wrapped_s - raw_s) * 1e9:.0f} ns per call)")
+
+    async def sleeper(update, context):
+        await asyncio.sleep(0.001)
+    n = 500
+    raw_s = await _per_call(sleeper, n)
+    wrapped_s = await _per_call(metrics.timed("bench_sleep", sleeper), n)
+    print(f"1ms handler          : {raw_s * 1e3:8.3f} ms → {wrapped_s * 1e3:8.3f} ms "
+          f"({(wrapped_s / raw_s - 1) * 100:+.2f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.calls))
+
+    hist = metrics.Histogram()
+    values = [i * 1e-5 for i in range(1000)]
+    started = time.perf_counter()
+    for _ in range(args.calls // 1000):
+        for v in values:
+            hist.observe(v)
+    print(f"Histogram.observe    : {(time.perf_counter() - started) / (args.calls // 1000 * 1000) * 1e9:8.0f} ns")
+
+    for i in range(30):
+        h = metrics.histogram("handler_seconds", handler=f"/cmd{i}")
+        for v in values[:100]:
+            h.observe(v)
+    for api in ("translate", "detect", "trongrid"):
+        metrics.histogram("api_request_seconds", api=api).observe(0.1)
+    started = time.perf_counter()
+    for _ in range(100):
+        text = metrics.render()
+    print(f"render /metrics      : {(time.perf_counter() - started) / 100 * 1e3:8.2f} ms "
+          f"({len(text.splitlines())} lines)")
+    started = time.perf_counter()
+    for _ in range(100):
+        metrics.report()
+    print(f"/stats report        : {(time.perf_counter() - started) / 100 * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
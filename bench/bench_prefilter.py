@@ -0,0 +1,79 @@
+# bench/bench_prefilter.py
+# 번역 전처리로 줄어드는 API 호출 수·요청 글자 수 측정 (코퍼스 기반)
+#  - 호출 수: 메시지마다 /detect 1회(로컬 감지로 확실하면 0) + 원문 언어를 뺀 대상 언어 수만큼 번역
+#  - 가린 메시지는 번역문 대신 가린 문장 그대로 되돌려 원문과 같아지는지 확인
+#
+#   python bench/bench_prefilter.py [--repeat 2000]
+#   PREFILTER_SKIP_WORDS="ok,okay,lol,ㅇㅋ,ㅇㅇ" python bench/bench_prefilter.py   (감탄사 건너뛰기 포함)
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import prefilter
+import script_detect
+import translator
+
+# 그룹 대화에서 흔한 메시지 유형을 섞은 대표 코퍼스 (일반 문장 + 번역할 내용이 없는 메시지)
+CORPUS = [
+    "안녕하세요", "오늘 몇 시에 출근해요?", "네 알겠습니다", "감사합니다!", "내일 8시 교대입니다",
+    "가격이 얼마예요?", "회의는 3시로 변경", "오늘 휴무 맞나요", "수고하셨습니다", "010-1234-5678 로 연락주세요",
+    "你好", "今天几点上班？", "好的，谢谢", "价格多少钱", "明天八点换班", "辛苦了", "我已经到了", "请稍等一下",
+    "សួស្តី", "អរគុណច្រើន", "ថ្ងៃនេះម៉ោងប៉ុន្មាន?", "ខ្ញុំមកដល់ហើយ",
+    "Xin chào", "Hôm nay mấy giờ làm?", "Cảm ơn nhiều", "Giá bao nhiêu?", "Mai ca 8 giờ", "Tôi đến rồi",
+    "Gọi 0912 345 678 nhé", "Tiền lương 7,500,000đ tháng này",
+    "hello 안녕하세요", "Shift at 8 tomorrow", "지도 보세요 https://maps.app.goo.gl/xyz123",
+    "@manager_kim 확인 부탁드려요", "主管 @boss_li 请看一下", "송금했어요 TQ5NzqAo6bzSKxJpB4ekqWNn2fhmCbi9Wn",
+    # 번역할 내용이 없거나 감탄사·웃음뿐인 메시지 (감탄사는 PREFILTER_SKIP_WORDS 설정 시에만 건너뜀)
+    "👍", "🙏🙏", "😂😂😂", "❤️", "ok", "OK", "ok 👍", "ㅋㅋㅋ", "ㅎㅎ", "ㅠㅠ", "haha", "hahaha", "kkk", "lol",
+    "https://t.me/somechannel", "www.example.com", "@manager_kim", "@boss_li @manager_kim",
+    "010-9876-5432", "+84 912 345 678", "1500000", "12:30", "8", "2024-05-01", "...", "?", "!!!",
+    "TQ5NzqAo6bzSKxJpB4ekqWNn2fhmCbi9Wn", "0x52908400098527886E0F7030069857D2E4169EE7",
+    "3f1c2d9a6b7e8f90a1b2c3d4e5f60718293a4b5c6d7e8f90a1b2c3d4e5f60718",
+]
+
+
+def _calls(text: str) -> int:
+    local = script_detect.detect(text)
+    detect = 0 if local.lang and local.confidence >= translator.LOCAL_DETECT_MIN_CONFIDENCE else 1
+    return detect + sum(1 for lang in translator.TARGETS if lang != local.lang)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    before = after = chars_before = chars_after = 0
+    for text in CORPUS:
+        prepared = prefilter.prepare(text)
+        before += _calls(text)
+        chars_before += len(text) * (len(translator.TARGETS) - 1)
+        if prepared.skip:
+            continue
+        after += _calls(prepared.text)
+        chars_after += len(prepared.text) * (len(translator.TARGETS) - 1)
+        assert prepared.restore(prepared.text) == text, (text, prepared)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in CORPUS:
+            prefilter.prepare(text)
+    per_msg_us = (time.perf_counter() - start) / (args.repeat * len(CORPUS)) * 1e6
+
+    n = len(CORPUS)
+    skipped = sum(1 for t in CORPUS if prefilter.prepare(t).skip)
+    hits = {name: count // (args.repeat + 2) for name, count in prefilter.hits.items()}
+    print(f"messages             : {n}")
+    print(f"skipped              : {skipped} ({skipped / n * 100:.1f}%)")
+    print(f"rule hits            : {hits}")
+    print(f"API calls            : {before} → {after} ({(1 - after / before) * 100:.1f}% fewer)")
+    print(f"translate chars sent : {chars_before:,} → {chars_after:,} ({(1 - chars_after / chars_before) * 100:.1f}% fewer)")
+    print(f"prefilter cost       : {per_msg_us:.1f} µs/message")
+    print("round-trip           : ok (masked values restored unchanged)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# bench/bench_search.py
+# /searchlogs 역색인 검색 지연 측정 (선형 스캔과 비교)
+#  - 한 그룹에 N개 메시지(한국어·중국어·크메르어·베트남어 혼합)를 기록한 뒤 검색어별 첫 페이지 조회 시간
+#  - 링 용량은 기본값(LOG_RING_CAPACITY) 그대로, 링 밖 기록은 임시 SQLite 저장소(--backend sqlite)
+#    또는 밀려난 로그 세그먼트(--backend spill)에서 이어서 조회 (각각 FTS5 색인 / 묶음별 bloom filter)
+#
+#   python bench/bench_search.py [--messages 200000] [--repeat 20] [--backend sqlite|spill]
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+TMP = tempfile.mkdtemp(prefix="bench-search-")
+if "spill" in sys.argv:
+    os.environ["LOG_SPILL_DIR"] = TMP
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+import logsearch
+
+GROUP = -1001
+run = asyncio.new_event_loop().run_until_complete
+WORDS = {
+    "ko": ["안녕하세요", "내일", "회의", "교대", "근무", "확인", "부탁드립니다", "퇴근", "점심", "자료", "보내주세요", "감사합니다"],
+    "zh": ["你好", "明天", "会议", "交班", "工作", "确认", "谢谢", "下班", "午饭", "资料", "发给我", "没问题"],
+    "km": ["សួស្តី", "ថ្ងៃស្អែក", "ប្រជុំ", "ការងារ", "អរគុណ", "ម៉ោង", "ពិនិត្យ", "ឯកសារ"],
+    "vi": ["xin", "chào", "ngày", "mai", "họp", "ca", "làm", "việc", "cảm", "ơn", "tài", "liệu", "gửi", "giúp"],
+}
+QUERIES = [
+    (["회의"], None),
+    (["자료", "보내주세요"], None),
+    (["会议"], None),
+    (["ប្រជុំ"], None),
+    (["会"], None),                     # 한자 1글자
+    (["họp"], None),
+    (["tai", "lieu"], None),            # 성조 없이 입력
+    (["교대"], "last 1%"),
+    (["교대"], None),                   # 드문 단어: 대부분 링 밖 기록에서
+    (["없는검색어"], None),
+]
+
+
+def _message(rnd: random.Random, i: int) -> str:
+    lang = rnd.choice(list(WORDS))
+    sep = "" if lang in ("zh", "km") else " "
+    words = rnd.sample(WORDS[lang], rnd.randint(2, 5))
+    if rnd.random() < 0.0005:
+        words.append("교대")
+    return sep.join(words) + f" #{i}"
+
+
+def _scan(messages, terms, since, limit=11):
+    """색인 없이 전체 기록 최신순 선형 스캔 (messages: 오래된 순 (시간, 원문))"""
+    terms = [logsearch.normalize(t) for t in terms]
+    found = []
+    for ts, message in reversed(messages):
+        if since is not None and ts < since:
+            break
+        text = logsearch.normalize(message)
+        if all(t in text or t in logsearch._strip_marks(text) for t in terms):
+            found.append(message)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def _ms(fn, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t) * 1000)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--backend", choices=("sqlite", "spill"), default="sqlite", help="링 밖 기록 위치")
+    args = parser.parse_args()
+    n = args.messages
+
+    if args.backend == "sqlite":
+        database.init_storage("sqlite", os.path.join(TMP, "bench.sqlite"))
+    logsearch.install()
+    rnd = random.Random(3)
+    start = time.time() - n
+    messages = []
+    t = time.perf_counter()
+    for i in range(n):
+        text = _message(rnd, i)
+        messages.append((start + i, text))
+        database.log_group_message(GROUP, 1000 + i % 50, f"user_{i % 50}", text, start + i)
+    database._store.flush()
+    database._group_logs[GROUP].flush()
+    build = time.perf_counter() - t
+    if args.backend == "sqlite":
+        t = time.perf_counter()
+        while database._store.index_lag():   # 쓰기 스레드의 저장된 기록 색인
+            time.sleep(0.05)
+        print(f"history index lag : {time.perf_counter() - t:.1f}s after build")
+    index = logsearch._indexes[GROUP]
+    postings = sum(len(a) for a in index.postings.values())
+    print(f"messages          : {n:,} (ring {database._group_logs[GROUP].capacity:,}, rest in {args.backend})")
+    print(f"log + index build : {build:.1f}s ({build / n * 1e6:.1f} µs/msg)")
+    print(f"tokens / postings : {len(index.postings):,} / {postings:,} (~{postings * 8 / 1e6:.1f} MB)")
+
+    print(f"\n{'query':<22}{'search ms':>10}{'scan ms':>10}{'hits(p1)':>10}")
+    for terms, window in QUERIES:
+        since = start + n * 0.99 if window else None
+        hits, _ = run(logsearch.search(GROUP, terms, since=since))
+        expected = _scan(messages, terms, since)[:10]
+        assert [e["message"] for e in hits] == expected, (terms, [e["message"] for e in hits], expected)
+        indexed = _ms(lambda: run(logsearch.search(GROUP, terms, since=since)), args.repeat)
+        scanned = _ms(lambda: _scan(messages, terms, since), max(1, args.repeat // 10))
+        label = " ".join(terms) + (f" ({window})" if window else "")
+        print(f"{label:<22}{indexed:>10.2f}{scanned:>10.2f}{len(hits):>10}")
+    hits, _ = run(logsearch.search(GROUP, ["회의"], offset=500, limit=10))
+    assert [e["message"] for e in hits] == _scan(messages, ["회의"], None, 510)[500:], "page 51"
+    deep = _ms(lambda: run(logsearch.search(GROUP, ["회의"], offset=500, limit=10)), args.repeat)
+    print(f"\n회의 page 51       : {deep:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench/bench_startup.py
+# 재시작 시 상태 적재 시간: 스냅샷 백엔드(mmap 스냅샷 + 저널 재생) vs SQLite 백엔드
+#  - 상태 크기 N: 코드 N개, 그룹 N/2개, 그룹 로그 N줄(N/100개 그룹), 번역 캐시 N/4개
+#  - 스냅샷 후 변경 N/10건은 저널로만 남긴 상태에서 새 프로세스로 init_storage + 캐시 복원 시간 측정
+#
+#   python bench/bench_startup.py [--sizes 10000,100000,1000000]
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class _App:
+    bot_data: dict = {}
+
+
+def _build(backend: str, path: str, n: int) -> None:
+    import database
+    import persistence
+    import translator
+    database.init_storage(backend, path)
+    persistence._saving = asyncio.Lock()
+    now = time.time()
+    for i in range(n):
+        database._put_code(f"C{i:07d}", {"owner": 1000 + i % 5000, "expires": now + 86400 * 3, "is_owner_code": False})
+    for i in range(n // 2):
+        info = {"code": f"C{i:07d}", "expires": now + 86400, "extend_count": 0, "connected": True}
+        database._set_group(-100000 - i, info)
+        database._store.put_group(-100000 - i, info)
+    groups = max(1, n // 100)
+    for i in range(n):
+        database.log_group_message(-100000 - i % groups, 1000 + i % 300, f"user_{i % 300}", f"message number {i}")
+    for i in range(n // 4):
+        translator.translation_cache.set((f"text {i}", "ko", "zh"), f"번역 {i}")
+    asyncio.run(persistence.save(_App))
+    if backend == "snapshot":
+        for i in range(n // 10):   # 스냅샷 이후 변경 (저널만)
+            asyncio.run(database.extend_code(f"C{i:07d}", 1))
+    database.close_storage()
+
+
+def _load(backend: str, path: str) -> dict:
+    started = time.perf_counter()
+    import database
+    import persistence
+    imported = time.perf_counter()
+    database.init_storage(backend, path)
+    loaded = time.perf_counter()
+    persistence.restore(_App)
+    restored = time.perf_counter()
+    result = {
+        "import": imported - started, "load": loaded - imported, "restore": restored - loaded,
+        "codes": len(database._codes), "logs": sum(len(r) for r in database._group_logs.values()),
+        "replayed": getattr(database._store, "replayed", 0),
+    }
+    database.close_storage()
+    return result
+
+
+def _child(mode: str, backend: str, path: str, n: int) -> dict | None:
+    env = dict(os.environ, PERSIST_DIR=path if backend == "snapshot" else os.path.dirname(path),
+               LOG_RING_CAPACITY="2000")
+    out = subprocess.run([sys.executable, __file__, "--child", mode, backend, path, str(n)],
+                         env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1]) if mode == "load" else None
+
+
+def _size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return sum(os.path.getsize(path + s) for s in ("", "-wal") if os.path.exists(path + s))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        mode, backend, path, n = sys.argv[2:6]
+        if mode == "build":
+            _build(backend, path, int(n))
+        else:
+            print(json.dumps(_load(backend, path)))
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+    print(f"{'N':>9} {'backend':<9}{'disk MB':>9}{'load s':>9}{'restore s':>11}{'codes':>10}{'logs':>10}{'replayed':>10}")
+    for n in map(int, args.sizes.split(",")):
+        tmp = tempfile.mkdtemp(prefix="startup-bench-")
+        for backend, path in (("snapshot", os.path.join(tmp, "state")), ("sqlite", os.path.join(tmp, "bot.db"))):
+            _child("build", backend, path, n)
+            r = _child("load", backend, path, n)
+            print(f"{n:>9,} {backend:<9}{_size(path) / 1e6:>9.1f}{r['load']:>9.2f}{r['restore']:>11.3f}"
+                  f"{r['codes']:>10,}{r['logs']:>10,}{r['replayed']:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+# bench/microbench.py
+# database.py 공개 함수 + 메시지 경로(main.message_handler, format_multilang) 마이크로벤치마크
+#  - 크기 N마다 새로 채운 상태(코드 N개, 그룹 N/2개, 그룹 로그 N줄)에서 함수별 1회 평균 µs 측정 → 크기별 추이
+#  - 네트워크는 모의 처리: 번역·감지 API(translator._post)와 텔레그램 발신(outbox.outbox.submit/enqueue)
+#  - 기준값 파일과 비교해 X% 이상 느려진 항목이 있으면 종료 코드 1
+#    (CPU 속도 변동을 걸러내려고 µs와, 항목마다 바로 옆에서 잰 기준 연산(dict 조회) 대비 배수가 둘 다 늘어야 회귀,
+#     걸린 항목은 CONFIRM_RUNS번 다시 재서 최솟값으로 다시 판단)
+#  - 기준값은 측정한 기계에서만 의미가 있어 저장소에 넣지 않음 (변경 전 코드에서 --save-baseline으로 먼저 생성,
+#    다른 환경(CPU·Python)에서 만든 기준값으로는 --check 거부)
+#  - database.py에 새 공개 함수가 생기면 여기에 벤치마크나 SKIP 사유를 추가해야 함 (없으면 실패)
+#
+#   python bench/microbench.py [--sizes 1000,10000,100000,1000000] [--ops 2000]
+#   python bench/microbench.py --save-baseline            # bench/microbench_baseline.json 생성·갱신 (로컬 전용)
+#   python bench/microbench.py --check [--threshold 50]   # 기준값 대비 회귀 검사
+
+import os
+import sys
+import gc
+import json
+import time
+import types
+import asyncio
+import inspect
+import argparse
+import platform
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("METRICS_PORT", "0")
+import database
+import translator
+import coalescer
+import outbox
+import main
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "microbench_baseline.json")
+REPEAT = 5          # 항목마다 반복 측정 후 최솟값
+MIN_DELTA_US = 0.2  # 이보다 작은 차이는 측정 잡음으로 보고 회귀에서 제외
+CONFIRM_RUNS = 3    # 회귀로 걸린 항목 재측정 횟수
+_REF = {i: i for i in range(1000)}
+
+# 벤치마크하지 않는 공개 함수 (시작·종료·동기화 등 1회성, 또는 저장소 I/O는 별도 벤치마크)
+SKIP = {
+    "configure_worker":    "시작 시 1회",
+    "init_storage":        "시작 시 1회 (bench_startup.py)",
+    "close_storage":       "종료 시 1회",
+    "snapshot_tables":     "스냅샷 주기 작업 (bench_startup.py)",
+    "add_change_listener": "시작 시 1회",
+    "add_log_listener":    "시작 시 1회",
+    "set_log_indexer":     "시작 시 1회",
+    "sync":                "다중 워커 전용 (tools/loadtest_workers.py)",
+    "install_sync":        "시작 시 1회",
+    "check_indexes":       "검증용 전체 순회",
+    "iter_older_logs":     "저장소 I/O (bench_search.py)",
+    "iter_group_logs":     "저장소 I/O (bench_export.py)",
+}
+
+
+# ────────────────────────────
+# 상태 준비
+# ────────────────────────────
+
+def _sync(coro):
+    """기다리는 지점 없이 끝나는 코루틴 실행 (단독 모드의 database 변경 함수는 저장소를 기다리지 않음)"""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError("코루틴이 저장소를 기다림 (공유 모드에서는 이벤트 루프 필요)")
+
+
+def _reset() -> None:
+    for table in (database._codes, database._groups, database._group_logs, database._group_log_capacity,
+                  database._group_participants, database._participant_langs, database._user_codes_by_owner,
+                  database._owner_codes_by_owner, database._groups_by_code, database._group_lang_counts,
+                  database._expired_free, database._settings, database._payments):
+        table.clear()
+    database.init_storage("memory")
+    translator.translation_cache.clear()
+    translator.detect_cache.clear()
+
+
+def _populate(n: int) -> dict:
+    """코드 N개(절반 소유자 코드), 그룹 N/2개(각각 소유자 코드에 연결), 그룹 로그 N줄(N/100개 그룹)"""
+    _reset()
+    now = time.time()
+    half = n // 2
+    for i in range(half):
+        database.issue_owner_code(f"o{i}", i, 30)
+    for i in range(n - half):
+        database._put_code(f"u{i}", {"owner": 10_000_000 + i, "expires": now + 86400, "is_owner_code": False})
+    for i in range(half):
+        _sync(database.register_group_to_code(f"o{i}", -1_000_000 - i))
+    log_groups = max(1, n // 100)
+    for i in range(n):
+        gid = -1_000_000 - i % log_groups
+        database.log_group_message(gid, 1000 + i % 300, f"user_{i % 300}", f"message number {i}", now - n + i)
+    langs = list(translator.TARGETS)
+    for i in range(min(n, 10_000)):
+        database.register_participant(-1_000_000 - i % log_groups, 1000 + i % 300, f"user_{i % 300}", langs[i % 4])
+    return {"half": half, "groups": half, "users": n - half, "log_groups": log_groups}
+
+
+# ────────────────────────────
+# 모의 네트워크 + 메시지 경로
+# ────────────────────────────
+
+async def _fake_post(url: str, data: dict) -> dict:
+    texts = data["q"] if isinstance(data["q"], list) else [data["q"]]
+    if url.endswith("/detect"):
+        return {"data": {"detections": [[{"language": "en"}] for _ in texts]}}
+    return {"data": {"translations": [{"translatedText": f"[{data['target']}] {t}"} for t in texts]}}
+
+
+async def _fake_submit(chat_id, factory, priority=None):
+    return None
+
+
+def _fake_enqueue(chat_id, factory, priority=None):
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(None)
+    return future
+
+
+def _update(gid: int, uid: int, text: str):
+    user = types.SimpleNamespace(id=uid, username=f"user_{uid}", full_name=f"User {uid}")
+    chat = types.SimpleNamespace(id=gid, title=f"group {gid}")
+    return types.SimpleNamespace(effective_chat=chat, effective_user=user,
+                                 message=types.SimpleNamespace(text=text, chat_id=gid))
+
+
+def _install_mocks() -> None:
+    translator._post = _fake_post
+    outbox.outbox.submit = _fake_submit
+    outbox.outbox.enqueue = _fake_enqueue
+    coalescer.COALESCE_WINDOW = 0.0
+
+
+# ────────────────────────────
+# 벤치마크 목록: 이름 → (대상 함수 이름, i → 호출)
+# 순서대로 실행 (앞 항목의 변경이 뒤 항목 상태가 됨, 삭제·해제는 마지막)
+# ────────────────────────────
+
+def _cases(ctx: dict, loop: asyncio.AbstractEventLoop) -> list[tuple[str, str, object]]:
+    d = database
+    half, groups, users, log_groups = ctx["half"], ctx["groups"], ctx["users"], ctx["log_groups"]
+    gid = lambda i: -1_000_000 - i % groups
+    log_gid = lambda i: -1_000_000 - i % log_groups
+    ctx_obj = types.SimpleNamespace(bot=None)
+    active = [_update(gid(i), 1000 + i % 300, f"Shift at {i} tomorrow, please confirm") for i in range(4096)]
+    inactive = [_update(-9_000_000 - i, 1000 + i % 300, f"hello there {i}") for i in range(4096)]
+
+    def run_async(updates):
+        def call(i):
+            loop.run_until_complete(main.message_handler(updates[i % len(updates)], ctx_obj))
+        return call
+
+    return [
+        ("shard_of",                    "shard_of",                    lambda i: d.shard_of(gid(i))),
+        ("is_local_chat",               "is_local_chat",               lambda i: d.is_local_chat(gid(i))),
+        ("generate_code",               "generate_code",               lambda i: d.generate_code()),
+        ("register_code",               "register_code",               lambda i: _sync(d.register_code(20_000_000 + i))),
+        ("issue_owner_code",            "issue_owner_code",            lambda i: d.issue_owner_code(f"n{i}", 7, 30)),
+        ("issue_user_code",             "issue_user_code",             lambda i: d.issue_user_code(f"p{i}", 7, 30)),
+        ("is_code_valid",               "is_code_valid",               lambda i: d.is_code_valid(f"o{i % half}")),
+        ("can_pay_for_code",            "can_pay_for_code",            lambda i: d.can_pay_for_code(f"u{i % users}", i)),
+        ("get_groups_by_code",          "get_groups_by_code",          lambda i: d.get_groups_by_code(f"o{i % half}")),
+        ("get_codes_by_owner",          "get_codes_by_owner",          lambda i: d.get_codes_by_owner(10_000_000 + i % users)),
+        ("get_owner_codes",             "get_owner_codes",             lambda i: d.get_owner_codes(i % half)),
+        ("extend_code",                 "extend_code",                 lambda i: _sync(d.extend_code(f"o{i % half}", 1))),
+        ("register_group_to_code",      "register_group_to_code",      lambda i: _sync(d.register_group_to_code(f"n{i}", -5_000_000 - i))),
+        ("is_group_active",             "is_group_active",             lambda i: d.is_group_active(gid(i))),
+        ("group_remaining_seconds",     "group_remaining_seconds",     lambda i: d.group_remaining_seconds(gid(i))),
+        ("extend_group",                "extend_group",                lambda i: d.extend_group(gid(i))),
+        ("register_participant",        "register_participant",        lambda i: d.register_participant(log_gid(i), 50_000 + i, f"p{i}", "vi")),
+        ("group_languages",             "group_languages",             lambda i: d.group_languages(log_gid(i))),
+        ("set_group_language_override", "set_group_language_override", lambda i: d.set_group_language_override(-7_000_000 - i, ["ko", "vi"])),
+        ("get_group_language_override", "get_group_language_override", lambda i: d.get_group_language_override(-7_000_000 - i)),
+        ("list_group_participants",     "list_group_participants",     lambda i: d.list_group_participants(log_gid(i))),
+        ("log_group_message",           "log_group_message",           lambda i: d.log_group_message(log_gid(i), 1000, "user", f"bench {i}")),
+        ("get_group_logs[50]",          "get_group_logs",              lambda i: d.get_group_logs(log_gid(i), 50)),
+        ("get_group_logs[all]",         "get_group_logs",              lambda i: d.get_group_logs(log_gid(i))),
+        ("set_group_log_capacity",      "set_group_log_capacity",      lambda i: d.set_group_log_capacity(log_gid(i), 2000)),
+        ("set_setting",                 "set_setting",                 lambda i: d.set_setting(f"bench:{i % 100}", i)),
+        ("get_setting",                 "get_setting",                 lambda i: d.get_setting(f"bench:{i % 100}")),
+        ("set_owner",                   "set_owner",                   lambda i: d.set_owner(1)),
+        ("get_owner",                   "get_owner",                   lambda i: d.get_owner()),
+        ("is_owner",                    "is_owner",                    lambda i: d.is_owner(i)),
+        ("set_control_group",           "set_control_group",           lambda i: d.set_control_group(-42)),
+        ("get_control_group",           "get_control_group",           lambda i: d.get_control_group()),
+        ("is_control_group",            "is_control_group",            lambda i: d.is_control_group(gid(i))),
+        ("set_log_group",               "set_log_group",               lambda i: d.set_log_group(-43)),
+        ("is_log_group",                "is_log_group",                lambda i: d.is_log_group(gid(i))),
+        ("set_user_log_group",          "set_user_log_group",          lambda i: d.set_user_log_group(None)),
+        ("is_user_log_group",           "is_user_log_group",           lambda i: d.is_user_log_group(gid(i))),
+        ("get_user_log_group",          "get_user_log_group",          lambda i: d.get_user_log_group()),
+        ("is_any_log_group",            "is_any_log_group",            lambda i: d.is_any_log_group(gid(i))),
+        ("claim_payment",               "claim_payment",               lambda i: _sync(d.claim_payment(f"tx{i}", f"o{i % half}"))),
+        ("is_payment_used",             "is_payment_used",             lambda i: d.is_payment_used(f"tx{i}")),
+        ("table_sizes",                 "table_sizes",                 lambda i: d.table_sizes()),
+        ("main.format_multilang",       None,                          lambda i: main.format_multilang("a", "b", "c", f"{i}")),
+        ("main.message_handler[active]",   None,                       run_async(active)),
+        ("main.message_handler[inactive]", None,                       run_async(inactive)),
+        ("evict_group",                 "evict_group",                 lambda i: d.evict_group(gid(i))),
+        ("evict_code",                  "evict_code",                  lambda i: d.evict_code(f"u{i % users}")),
+        ("disconnect_user",             "disconnect_user",             lambda i: _sync(d.disconnect_user(-5_000_000 - i))),
+        ("delete_code",                 "delete_code",                 lambda i: _sync(d.delete_code(f"o{i}"))),
+    ]
+
+
+def _uncovered(cases) -> list[str]:
+    public = {name for name, fn in vars(database).items()
+              if inspect.isfunction(fn) and fn.__module__ == "database" and not name.startswith("_")}
+    covered = {target for _, target, _ in cases if target}
+    return sorted(public - covered - SKIP.keys())
+
+
+def _per_op_us(fn, ops: int, offset: int) -> float:
+    started = time.perf_counter()
+    for i in range(offset, offset + ops):
+        fn(i)
+    return (time.perf_counter() - started) / ops * 1e6
+
+
+def _reference(i: int):
+    return _REF.get(i % 1000)
+
+
+def _machine() -> str:
+    """기준값을 만든 환경 (CPU 모델·Python 버전)"""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return f"{cpu} / {platform.python_implementation()} {platform.python_version()}"
+
+
+def run(sizes: list[int], ops: int, only: set[tuple[str, str]] | None = None,
+        repeat: int = REPEAT) -> tuple[dict, dict]:
+    """({항목: {크기: µs/op}}, {항목: {크기: 기준 연산 대비 배수}}), only: 이 (항목, 크기)만 측정"""
+    _install_mocks()
+    loop = asyncio.new_event_loop()
+    results: dict[str, dict[str, float]] = {}
+    relative: dict[str, dict[str, float]] = {}
+    for n in sizes:
+        if only is not None and not any(size == str(n) for _, size in only):
+            continue
+        started = time.perf_counter()
+        ctx = _populate(n)
+        cases = _cases(ctx, loop)
+        missing = _uncovered(cases)
+        if missing:
+            sys.exit(f"벤치마크 없는 database 공개 함수: {', '.join(missing)} (추가하거나 SKIP에 사유 기록)")
+        for name, _, fn in cases:
+            if only is not None and (name, str(n)) not in only:
+                continue
+            # 반복마다 다른 키를 써서 변경 함수도 매번 새 항목에 적용, 기준 연산과 번갈아 측정
+            # GC는 끄고 측정 (timeit과 같이, 앞 항목이 남긴 할당량에 따라 GC가 끼어드는 잡음 제거)
+            best = ref = float("inf")
+            gc.collect()
+            gc.disable()
+            try:
+                for r in range(repeat):
+                    ref = min(ref, _per_op_us(_reference, ops, 0))
+                    best = min(best, _per_op_us(fn, ops, r * ops))
+            finally:
+                gc.enable()
+            results.setdefault(name, {})[str(n)] = best
+            relative.setdefault(name, {})[str(n)] = best / ref
+        print(f"  size {n:>9,}: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    loop.close()
+    return results, relative
+
+
+def check(results: dict, relative: dict, baseline: dict, threshold: float) -> list[str]:
+    """µs와 기준 연산 대비 배수가 둘 다 threshold% 넘게 늘고 절대 차이도 MIN_DELTA_US 이상인 항목
+    (한쪽만 늘어난 경우는 CPU 속도 변동이나 기준 연산 측정 잡음으로 봄)"""
+    regressions = {}
+    for name, by_size in relative.items():
+        for size, rel in by_size.items():
+            base_rel = baseline["relative"].get(name, {}).get(size)
+            base_us = baseline["results"].get(name, {}).get(size)
+            us = results[name][size]
+            limit = 1 + threshold / 100
+            if base_rel is None or rel <= base_rel * limit or us <= base_us * limit:
+                continue
+            if us - base_us > MIN_DELTA_US:
+                regressions[(name, size)] = (f"{name} @ {int(size):,}: ×{base_rel:.1f} → ×{rel:.1f} of reference "
+                                             f"({base_us:.2f} → {us:.2f} µs, +{(rel / base_rel - 1) * 100:.0f}%)")
+    return regressions
+
+
+def cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--ops", type=int, default=2000, help="항목·크기별 측정 호출 수")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--threshold", type=float, default=50.0, help="회귀로 볼 느려짐 비율(%%)")
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",")]
+    baseline, baseline_ops, baseline_machine = {"results": {}, "relative": {}}, None, None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = {"results": saved.get("results", {}), "relative": saved.get("relative", {})}
+        baseline_ops, baseline_machine = saved.get("ops"), saved.get("machine")
+    if args.check:
+        if not baseline["relative"]:
+            sys.exit(f"기준값 파일 없음: {args.baseline} (변경 전 코드에서 --save-baseline으로 먼저 생성)")
+        if baseline_machine != _machine():
+            sys.exit(f"다른 환경에서 만든 기준값 ({baseline_machine}), 이 기계에서 --save-baseline으로 다시 생성")
+        if baseline_ops != args.ops:
+            # 변경 함수는 앞 항목의 호출 수만큼 상태가 달라지므로 같은 --ops로 비교해야 함
+            sys.exit(f"기준값은 --ops {baseline_ops}로 측정됨 (지금 {args.ops})")
+    results, relative = run(sizes, args.ops)
+
+    print(f"{'µs/op':<32}" + "".join(f"{n:>12,}" for n in sizes))
+    for name, by_size in results.items():
+        row = "".join(f"{by_size[str(n)]:>12.2f}" for n in sizes)
+        print(f"{name:<32}{row}")
+
+    if args.save_baseline:
+        merge = lambda old, new: {name: {**old.get(name, {}), **by_size} for name, by_size in new.items()}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "ops": args.ops, "machine": _machine(),
+                       "results": merge(baseline["results"], results),
+                       "relative": merge(baseline["relative"], relative)}, f, indent=1, sort_keys=True)
+        print(f"baseline saved: {args.baseline}")
+    if args.check:
+        regressions = check(results, relative, baseline, args.threshold)
+        for _ in range(CONFIRM_RUNS):
+            if not regressions:
+                break
+            # 걸린 항목만 다시 재서 더 빠른 값으로 교체 (일시적인 잡음이면 사라짐)
+            again, again_rel = run(sizes, args.ops, set(regressions), REPEAT * 2)
+            for name, by_size in again.items():
+                for size, us in by_size.items():
+                    if us < results[name][size]:
+                        results[name][size], relative[name][size] = us, again_rel[name][size]
+            regressions = check(results, relative, baseline, args.threshold)
+        for line in regressions.values():
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0f}%")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    cli()
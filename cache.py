@@ -0,0 +1,76 @@
+# cache.py
+# 프로세스 내 LRU + TTL 캐시 (번역·언어 감지 결과 재사용)
+
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """크기 제한 LRU 캐시, 항목마다 TTL 적용"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()   # key → (expires, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def dump(self) -> list[tuple]:
+        """만료되지 않은 항목을 (key, 남은 TTL, value) 목록으로 (오래 안 쓴 것 → 최근 사용 순)"""
+        now = time.monotonic()
+        return [(key, expires - now, value) for key, (expires, value) in self._data.items() if expires > now]
+
+    def restore(self, items: list[tuple]) -> int:
+        """dump() 결과를 다시 채움 (남은 TTL 유지), 채운 개수 반환"""
+        now = time.monotonic()
+        for key, remaining, value in items[-self.maxsize:] if self.maxsize > 0 else ():
+            if remaining > 0:
+                self._data[key] = (now + remaining, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return len(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size":        len(self._data),
+            "maxsize":     self.maxsize,
+            "hits":        self.hits,
+            "misses":      self.misses,
+            "evictions":   self.evictions,
+            "expirations": self.expirations,
+            "hit_rate":    self.hits / total if total else 0.0,
+        }
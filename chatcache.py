@@ -0,0 +1,44 @@
+# chatcache.py
+# 그룹 이름 등 채팅 메타데이터 캐시 + 동시 조회 개수 제한 일괄 조회
+
+import os
+import asyncio
+import logging
+from dotenv import load_dotenv
+from cache import TTLCache
+
+load_dotenv()
+CHAT_CACHE_SIZE        = int(os.getenv("CHAT_CACHE_SIZE", "10000"))
+CHAT_CACHE_TTL         = float(os.getenv("CHAT_CACHE_TTL", "3600"))
+CHAT_FETCH_CONCURRENCY = int(os.getenv("CHAT_FETCH_CONCURRENCY", "5"))
+
+chat_cache = TTLCache(CHAT_CACHE_SIZE, CHAT_CACHE_TTL)   # chat_id → 표시 이름
+
+
+async def _fetch_title(bot, chat_id: int, sem: asyncio.Semaphore) -> str:
+    async with sem:
+        try:
+            chat = await bot.get_chat(chat_id)
+        except Exception as e:
+            logging.warning("채팅 정보 조회 실패 (%s): %r", chat_id, e)
+            return str(chat_id)   # 실패는 캐시하지 않음
+    title = getattr(chat, "title", None) or chat.username or str(chat_id)
+    chat_cache.set(chat_id, title)
+    return title
+
+
+async def get_titles(bot, chat_ids) -> dict[int, str]:
+    """채팅 이름 일괄 조회 (캐시에 없는 것만 최대 CHAT_FETCH_CONCURRENCY개씩 동시 요청)"""
+    titles = {}
+    missing = []
+    for cid in chat_ids:
+        title = chat_cache.get(cid)
+        if title is None:
+            missing.append(cid)
+        else:
+            titles[cid] = title
+    if missing:
+        sem = asyncio.Semaphore(CHAT_FETCH_CONCURRENCY)
+        fetched = await asyncio.gather(*(_fetch_title(bot, cid, sem) for cid in missing))
+        titles.update(zip(missing, fetched))
+    return titles
@@ -0,0 +1,114 @@
+# coalescer.py
+# 그룹별 연속 메시지 묶음 번역
+#  - 첫 메시지 후 window초 동안 들어온 메시지를 모아 언어별 1회 일괄 번역
+#  - 발신자를 유지한 하나의 응답으로 전송 (지연은 최대 window초)
+#  - 종료 시 남은 묶음은 기다리지 않고 바로 전송 (stop, outbox.stop 전에 호출)
+
+import os
+import asyncio
+import logging
+from dotenv import load_dotenv
+import outbox
+import database
+import translator
+import prefilter
+
+load_dotenv()
+COALESCE_WINDOW       = float(os.getenv("COALESCE_WINDOW", "0"))      # 기본 묶음 시간(초), 0이면 사용 안 함
+COALESCE_MAX_MESSAGES = int(os.getenv("COALESCE_MAX_MESSAGES", "10")) # 이 개수에 도달하면 즉시 전송
+MAX_MESSAGE_LEN       = 4000                                          # 텔레그램 4096자 제한 여유분
+
+_pending: dict[int, list[tuple]] = {}         # group_id → [(발신자, prefilter.Prepared, user_id)]
+_tasks: set[asyncio.Task] = set()            # 대기 중인 묶음 전송 작업 (GC 방지용 참조)
+_closing = asyncio.Event()                    # 종료 시 대기 중인 묶음을 바로 깨움
+stats = {"messages": 0, "batches": 0}
+
+
+def window_for(group_id: int) -> float:
+    return database.get_setting(f"coalesce_window:{group_id}", COALESCE_WINDOW)
+
+
+def set_window(group_id: int, seconds: float) -> None:
+    """그룹별 묶음 시간 설정 (전역 설정에 저장해 담당 워커에도 반영)"""
+    database.set_setting(f"coalesce_window:{group_id}", seconds)
+
+
+async def submit(update, ctx) -> None:
+    """번역 대상 메시지 접수 (묶음 시간이 0이면 즉시 개별 번역)"""
+    gid = update.effective_chat.id
+    window = window_for(gid)
+    if window <= 0:
+        return await translator.handle_translation(update, ctx)
+
+    prepared = prefilter.prepare(update.message.text)
+    if prepared.skip:
+        return
+    user = update.effective_user
+    sender = user.username or user.full_name
+    buf = _pending.get(gid)
+    if buf is None:
+        buf = _pending[gid] = []
+        task = asyncio.create_task(_flush_later(ctx.bot, gid, buf, window))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+    buf.append((sender, prepared, user.id))
+    stats["messages"] += 1
+    if len(buf) >= COALESCE_MAX_MESSAGES:
+        await _flush(ctx.bot, gid, buf)
+
+
+async def stop(app=None, timeout: float = 10.0) -> None:
+    """대기 중인 묶음을 즉시 전송하고 끝날 때까지 기다림 (종료 시)"""
+    _closing.set()
+    if _tasks:
+        await asyncio.wait(list(_tasks), timeout=timeout)
+
+
+async def _flush_later(bot, gid: int, buf: list, window: float) -> None:
+    try:
+        await asyncio.wait_for(_closing.wait(), window)
+    except asyncio.TimeoutError:
+        pass
+    await _flush(bot, gid, buf)
+
+
+async def _flush(bot, gid: int, buf: list) -> None:
+    # 이미 전송된 묶음이면 무시 (최대 개수로 먼저 전송된 경우)
+    if _pending.get(gid) is not buf:
+        return
+    del _pending[gid]
+    stats["batches"] += 1
+    try:
+        texts = [prepared.text for _, prepared, _ in buf]
+        detected = await asyncio.gather(*(translator.detect_language(t) for t in texts), return_exceptions=True)
+        srcs = [src if isinstance(src, str) else None for src in detected]
+        for (sender, _, user_id), src in zip(buf, srcs):
+            translator.learn_language(gid, user_id, sender, src)
+        targets = translator.target_languages(gid)
+        translator.count_saved(gid, srcs, targets)
+        by_lang = await translator.translate_batch_all(texts, srcs, targets)
+        entries = [
+            (sender, {lang: prepared.restore(by_lang[lang][i]) for lang in targets})
+            for i, (sender, prepared, _) in enumerate(buf)
+        ]
+        # 그룹 언어로 이미 쓰인 메시지만 있으면 보낼 번역 없음
+        entries = [e for e in entries if any(t is not None for t in e[1].values())]
+        for chunk in _split(entries):
+            await outbox.send(bot, gid, translator.format_batch_reply(chunk), outbox.BULK)
+    except Exception as e:
+        logging.warning("묶음 번역 실패 (%s, %d개): %r", gid, len(buf), e)
+
+
+def _split(entries: list) -> list[list]:
+    """응답이 메시지 길이 제한을 넘지 않도록 발신자 블록 단위로 분할"""
+    chunks, cur, size = [], [], 0
+    for entry in entries:
+        n = len(translator.format_batch_reply([entry])) + 2
+        if cur and size + n > MAX_MESSAGE_LEN:
+            chunks.append(cur)
+            cur, size = [], 0
+        cur.append(entry)
+        size += n
+    if cur:
+        chunks.append(cur)
+    return chunks
@@ -1,178 +1,811 @@
-# database.py
-
-import time
-import secrets
-
-# ────────────────────────────
-# 데이터 저장소 초기화
-# ────────────────────────────
-_codes: dict[str, dict] = {}               # code → { owner, expires, is_owner_code }
-_groups: dict[int, dict] = {}              # group_id → { code, expires, extend_count, connected }
-_group_logs: dict[int, list[dict]] = {}    # group_id → list of { time, user_id, username, message }
-_group_participants: dict[int, dict[int, str]] = {}  # group_id → { user_id: username }
-
-# ────────────────────────────
-# 1) 코드 관리
-# ────────────────────────────
-
-def generate_code() -> str:
-    return f"{secrets.randbelow(900000) + 100000}"
-
-
-def register_code(owner_id: int, duration_days: int = 3, max_free: int = 1) -> str | None:
-    used = sum(
-        1 for info in _codes.values()
-        if info["owner"] == owner_id and not info.get("is_owner_code", False)
-    )
-    if used >= max_free:
-        return None
-    code = generate_code()
-    _codes[code] = {
-        "owner": owner_id,
-        "expires": time.time() + duration_days * 86400,
-        "is_owner_code": False
-    }
-    return code
-
-
-def issue_owner_code(code: str, owner_id: int, duration_days: int) -> None:
-    """소유자가 지정한 유효기간으로 코드 생성"""
-    _codes[code] = {
-        "owner": owner_id,
-        "expires": time.time() + duration_days * 86400,
-        "is_owner_code": True
-    }
-
-
-def is_code_valid(code: str) -> bool:
-    info = _codes.get(code)
-    return bool(info and info["expires"] >= time.time())
-
-
-def delete_code(code: str) -> bool:
-    if code not in _codes:
-        return False
-    del _codes[code]
-    # 삭제 시 해당 코드로 연결된 그룹 해제
-    for grp in _groups.values():
-        if grp["code"] == code:
-            grp["connected"] = False
-    return True
-
-
-def extend_code(code: str, days: int) -> bool:
-    """발급된 코드의 만료일 연장 및 연결된 그룹 동기화"""
-    info = _codes.get(code)
-    if not info:
-        return False
-    info["expires"] += days * 86400
-    # 이미 연결된 그룹들의 만료일 동기화
-    for grp in _groups.values():
-        if grp.get("code") == code and grp.get("connected"):
-            grp["expires"] = info["expires"]
-    return True
-
-
-def get_groups_by_code(code: str) -> list[int]:
-    """해당 코드로 연결된 그룹 ID 목록 반환"""
-    return [gid for gid, grp in _groups.items() if grp.get("code") == code]
-
-
-def get_codes_by_owner(owner_id: int) -> list[str]:
-    """소유자가 발급한 일반 코드 목록 반환"""
-    return [c for c, info in _codes.items() if info["owner"] == owner_id and not info.get("is_owner_code", False)]
-
-
-def get_owner_codes(owner_id: int) -> list[str]:
-    """소유자 전용 코드 목록 반환"""
-    return [c for c, info in _codes.items() if info["owner"] == owner_id and info.get("is_owner_code", False)]
-
-# ────────────────────────────
-# 2) 그룹 연결 관리
-# ────────────────────────────
-
-def register_group_to_code(code: str, group_id: int) -> bool:
-    now = time.time()
-    info_code = _codes.get(code)
-    if not info_code or info_code["expires"] < now:
-        return False
-
-    if group_id in _groups:
-        grp = _groups[group_id]
-        # 이미 다른 코드로 연결되어 있거나 이미 연결 상태면 거부
-        if grp["code"] != code or grp["connected"]:
-            return False
-        grp["connected"] = True
-        grp["expires"]   = info_code["expires"]
-        return True
-
-    _groups[group_id] = {
-        "code":         code,
-        "expires":      info_code["expires"],
-        "extend_count": 0,
-        "connected":    True
-    }
-    return True
-
-
-def is_group_active(group_id: int) -> bool:
-    info = _groups.get(group_id)
-    return bool(info and info.get("connected") and info.get("expires", 0) >= time.time())
-
-
-def group_remaining_seconds(group_id: int) -> int:
-    info = _groups.get(group_id)
-    if not info:
-        return 0
-    return max(0, int(info["expires"] - time.time()))
-
-
-def extend_group(group_id: int, duration_days: int = 3, max_extends: int = 1) -> bool:
-    info = _groups.get(group_id)
-    if not info or info.get("extend_count", 0) >= max_extends:
-        return False
-    info["expires"]      += duration_days * 86400
-    info["extend_count"] += 1
-    return True
-
-
-def disconnect_user(group_id: int) -> None:
-    info = _groups.get(group_id)
-    if info:
-        info["connected"] = False
-
-# ────────────────────────────
-# 3) 그룹 메시지 로그 및 참가자 관리
-# ────────────────────────────
-
-def register_participant(group_id: int, user_id: int, username: str) -> None:
-    """그룹 참가자를 등록"""
-    if group_id not in _group_participants:
-        _group_participants[group_id] = {}
-    _group_participants[group_id][user_id] = username
-
-
-def list_group_participants(group_id: int) -> list[tuple[int, str]]:
-    """그룹 참가자 목록 반환"""
-    return list(_group_participants.get(group_id, {}).items())
-
-
-def log_group_message(group_id: int, user_id: int, username: str, message: str, timestamp: float = None) -> None:
-    """그룹 메시지를 로그에 저장"""
-    ts = timestamp if timestamp is not None else time.time()
-    if group_id not in _group_logs:
-        _group_logs[group_id] = []
-    _group_logs[group_id].append({
-        "time": ts,
-        "user_id": user_id,
-        "username": username,
-        "message": message
-    })
-    # 메시지를 남기면 자동으로 참가자도 등록
-    register_participant(group_id, user_id, username)
-
-
-def get_group_logs(group_id: int, limit: int | None = None) -> list[dict]:
-    """그룹 로그를 반환 (최신 limit개 선택 가능)"""
-    logs = _group_logs.get(group_id, [])
-    return logs[-limit:] if limit else logs
+# database.py
+
+import os
+import time
+import json
+import secrets
+import itertools
+from array import array
+from dotenv import load_dotenv
+from storage import MemoryStore, SQLiteStore, JournalStore
+import logring
+from logring import LogRing
+
+load_dotenv()
+DB_BACKEND       = os.getenv("DB_BACKEND", "memory")        # memory | sqlite | snapshot
+DB_PATH          = os.getenv("DB_PATH", "bot.db")
+PERSIST_DIR      = os.getenv("PERSIST_DIR", "state")         # 스냅샷·저널 위치 (snapshot 백엔드, 캐시 스냅샷)
+DB_BATCH_ROWS    = int(os.getenv("DB_BATCH_ROWS", "500"))    # 일괄 커밋 행 수
+DB_BATCH_MS      = float(os.getenv("DB_BATCH_MS", "200"))    # 일괄 커밋 주기(ms)
+LOG_RING_CAPACITY = int(os.getenv("LOG_RING_CAPACITY", "2000"))  # 그룹별 메모리 로그 기본 용량
+LOG_SPILL_DIR     = os.getenv("LOG_SPILL_DIR")                     # 지정 시 밀려난 로그를 그룹별 세그먼트에 기록
+DB_LOAD_LOG_LIMIT = int(os.getenv("DB_LOAD_LOG_LIMIT", str(LOG_RING_CAPACITY)))  # 시작 시 그룹별로 불러올 최근 로그 수
+DB_SYNC_INTERVAL  = float(os.getenv("DB_SYNC_INTERVAL", "0.5"))  # 다중 워커에서 다른 워커 변경을 반영하는 주기(초)
+
+# 다중 워커 모드: chat_id % WORKER_COUNT == WORKER_ID 인 채팅만 이 프로세스가 처리
+WORKER_ID    = 0
+WORKER_COUNT = 1
+
+# ────────────────────────────
+# 데이터 저장소 초기화
+# ────────────────────────────
+_codes: dict[str, dict] = {}               # code → { owner, expires, is_owner_code }
+_groups: dict[int, dict] = {}              # group_id → { code, expires, extend_count, connected }
+_group_logs: dict[int, LogRing] = {}       # group_id → 최근 메시지 링 버퍼 { time, user_id, username, message }
+_group_log_capacity: dict[int, int] = {}   # group_id → 그룹별 로그 용량 (없으면 LOG_RING_CAPACITY)
+_group_participants: dict[int, dict[int, str]] = {}  # group_id → { user_id: username }
+_participant_langs: dict[int, dict[int, str]] = {}   # group_id → { user_id: 마지막으로 감지된 메시지 언어 }
+
+# 보조 인덱스 (모든 변경 함수가 함께 갱신, 값은 삽입 순서를 유지하는 dict 집합)
+_user_codes_by_owner: dict[int, dict[str, None]] = {}   # owner → 일반 코드
+_owner_codes_by_owner: dict[int, dict[str, None]] = {}  # owner → 소유자 전용 코드
+_groups_by_code: dict[str, dict[int, None]] = {}        # code → 해당 코드로 등록된 그룹
+_group_lang_counts: dict[int, dict[str, int]] = {}      # group_id → { 언어: 그 언어로 말한 참가자 수 }
+_expired_free: dict[int, int] = {}                      # owner → 만료·정리된 무료 코드 수 (발급 한도 유지용)
+
+_settings: dict[str, object] = {}   # 소유자·제어 그룹·문의 메시지 등 전역 설정 (워커 간 공유)
+_log_groups: frozenset[int] = frozenset()   # 로그·사용자 로그 그룹 ID (설정이 바뀔 때 갱신, 메시지마다 확인)
+_payments: dict[str, str] = {}      # 활성화에 사용된 결제 TX → 코드
+
+# 코드·그룹 만료일이 바뀔 때 호출되는 콜백 (kind: "code" | "group", key)
+_change_listeners: list = []
+# 그룹 메시지가 로그에 추가될 때 호출되는 콜백 (group_id, seq, message)
+_log_listeners: list = []
+
+# 모듈 dict가 작업 사본, _store는 변경 사항을 영속화하는 백엔드
+_store: MemoryStore = MemoryStore()
+_shared = False   # 여러 워커가 같은 SQLite 파일을 공유하는지 여부
+
+
+def configure_worker(index: int, count: int) -> None:
+    """다중 워커 모드에서 이 프로세스의 번호 지정 (init_storage 전에 호출)"""
+    global WORKER_ID, WORKER_COUNT
+    WORKER_ID, WORKER_COUNT = index, count
+
+
+def shard_of(chat_id: int, count: int | None = None) -> int:
+    """chat_id를 처리할 워커 번호"""
+    return chat_id % (count or WORKER_COUNT)
+
+
+def is_local_chat(chat_id: int) -> bool:
+    return shard_of(chat_id) == WORKER_ID
+
+
+def table_sizes() -> dict[str, int]:
+    """메모리 작업 사본 크기 (메트릭 조회용)"""
+    return {
+        "codes":        len(_codes),
+        "groups":       len(_groups),
+        "log_groups":   len(_group_logs),
+        "log_entries":  sum(len(ring) for ring in _group_logs.values()),
+        "participants": sum(len(p) for p in _group_participants.values()),
+        "payments":     len(_payments),
+        "settings":     len(_settings),
+    }
+
+
+def init_storage(backend: str | None = None, path: str | None = None) -> None:
+    """저장소 백엔드 선택 후 기존 데이터 적재 (애플리케이션 시작 시 1회)"""
+    global _store, _shared
+    backend = backend or DB_BACKEND
+    _shared = WORKER_COUNT > 1
+    if _shared or backend == "sqlite":
+        _store = SQLiteStore(path or DB_PATH, DB_BATCH_ROWS, DB_BATCH_MS, WORKER_ID if _shared else None)
+    elif backend == "snapshot":
+        _store = JournalStore(path or PERSIST_DIR)
+    else:
+        _store = MemoryStore()
+    loaded_logs: dict[int, list[dict]] = {}
+    _store.load(_codes, _groups, loaded_logs, _group_participants, DB_LOAD_LOG_LIMIT, _expired_free,
+                _settings, _payments, _participant_langs)
+    for key, value in _settings.items():
+        _apply_setting(key, value)
+    for gid, entries in loaded_logs.items():
+        if _shared and not is_local_chat(gid):
+            continue   # 다른 워커 담당 그룹의 로그는 필요할 때 저장소에서 조회
+        ring = _group_ring(gid)
+        for e in entries:
+            ring.append(e["time"], e["user_id"], e["username"], e["message"])
+    _rebuild_indexes()
+
+
+def close_storage() -> None:
+    """대기 중인 쓰기를 커밋하고 백엔드 종료"""
+    for ring in _group_logs.values():
+        ring.flush()
+    _store.close()
+
+def snapshot_tables() -> dict:
+    """스냅샷 백엔드가 기록할 전체 상태 (로그는 그룹별 열 단위, 오래된 순)"""
+    logs = {}
+    for gid, ring in _group_logs.items():
+        order = [ring._index(k) for k in range(len(ring))]
+        logs[gid] = (array("d", (ring.times[i] for i in order)), array("q", (ring.user_ids[i] for i in order)),
+                     [ring.usernames[i] for i in order], [ring.messages[i] for i in order])
+    return {
+        "codes":        _codes,
+        "groups":       _groups,
+        "participants": _group_participants,
+        "participant_langs": _participant_langs,
+        "expired_free": _expired_free,
+        "settings":     _settings,
+        "payments":     _payments,
+        "logs":         logs,
+    }
+
+
+def add_change_listener(fn) -> None:
+    """코드·그룹 변경 알림 등록 (fn(kind, key))"""
+    _change_listeners.append(fn)
+
+
+def add_log_listener(fn) -> None:
+    """그룹 로그 추가 알림 등록 (fn(group_id, seq, message), seq는 LogRing.total 기준 일련번호)"""
+    _log_listeners.append(fn)
+
+
+def _notify(kind: str, key) -> None:
+    for fn in _change_listeners:
+        fn(kind, key)
+
+
+def sync() -> int:
+    """다른 워커가 기록한 변경을 작업 사본에 반영, 반영한 변경 수 반환"""
+    if not _shared:
+        return 0
+    changes = _store.poll()
+    for kind, key in dict.fromkeys(changes):
+        if kind == "code":
+            _set_code(key, _store.read_code(key))
+            _notify("code", key)
+        elif kind == "group":
+            gid = int(key)
+            _set_group(gid, _store.read_group(gid))
+            _notify("group", gid)
+        elif kind == "quota":
+            _expired_free[int(key)] = _store.read_quota(int(key))
+        elif kind == "setting":
+            value = _store.read_setting(key)
+            _settings[key] = value
+            _apply_setting(key, value)
+    return len(changes)
+
+
+_last_prune = 0.0
+
+
+async def _sync_job(ctx) -> None:
+    global _last_prune
+    sync()
+    # 변경 기록 정리는 워커 0이 1시간에 한 번
+    if WORKER_ID == 0 and time.time() - _last_prune > 3600:
+        _last_prune = time.time()
+        _store.prune_changes()
+
+
+def install_sync(app) -> None:
+    """다중 워커 모드에서 변경 반영 작업을 job queue에 등록"""
+    if _shared:
+        app.job_queue.run_repeating(_sync_job, interval=DB_SYNC_INTERVAL, first=DB_SYNC_INTERVAL, name="db_sync")
+
+# ────────────────────────────
+# 0) 보조 인덱스 유지
+# ────────────────────────────
+
+def _owner_index(info: dict) -> dict[int, dict[str, None]]:
+    return _owner_codes_by_owner if info.get("is_owner_code", False) else _user_codes_by_owner
+
+
+def _set_code(code: str, info: dict | None) -> None:
+    """작업 사본의 코드 교체 + 소유자 인덱스 갱신 (info가 None이면 제거, 기존 순서 유지)"""
+    old = _codes.get(code)
+    if old is not None:
+        _unindex_code(code, old)
+    if info is None:
+        _codes.pop(code, None)
+        return
+    if old is not None and old is not info:
+        old.clear()
+        old.update(info)
+    else:
+        _codes[code] = info
+    _owner_index(info).setdefault(info["owner"], {})[code] = None
+
+
+def _put_code(code: str, info: dict) -> None:
+    """코드 저장 + 소유자 인덱스 갱신 (기존 코드를 덮어쓰는 경우 포함)"""
+    _set_code(code, info)
+    _store.put_code(code, info)
+    if _shared:
+        _store.commit_soon()   # 다른 워커에서 바로 등록할 수 있도록 즉시 커밋 (기다리지 않음)
+    _notify("code", code)
+
+
+def _unindex_code(code: str, info: dict) -> None:
+    index = _owner_index(info)
+    codes = index.get(info["owner"])
+    if codes is not None:
+        codes.pop(code, None)
+        if not codes:
+            del index[info["owner"]]
+
+
+def _index_group(group_id: int, code: str) -> None:
+    _groups_by_code.setdefault(code, {})[group_id] = None
+
+
+def _unindex_group(group_id: int, code: str) -> None:
+    groups = _groups_by_code.get(code)
+    if groups is not None:
+        groups.pop(group_id, None)
+        if not groups:
+            del _groups_by_code[code]
+
+
+def _set_group(group_id: int, info: dict | None) -> None:
+    """작업 사본의 그룹 교체 + 코드 인덱스 갱신 (info가 None이면 제거, 기존 순서 유지)"""
+    old = _groups.get(group_id)
+    if old is not None:
+        _unindex_group(group_id, old["code"])
+    if info is None:
+        _groups.pop(group_id, None)
+        return
+    if old is not None and old is not info:
+        old.clear()
+        old.update(info)
+    else:
+        _groups[group_id] = info
+    _index_group(group_id, info["code"])
+
+
+def _rebuild_indexes() -> None:
+    _user_codes_by_owner.clear()
+    _owner_codes_by_owner.clear()
+    _groups_by_code.clear()
+    _group_lang_counts.clear()
+    for gid, langs in _participant_langs.items():
+        counts = _group_lang_counts[gid] = {}
+        for lang in langs.values():
+            counts[lang] = counts.get(lang, 0) + 1
+    for code, info in _codes.items():
+        _owner_index(info).setdefault(info["owner"], {})[code] = None
+    for gid, grp in _groups.items():
+        _index_group(gid, grp["code"])
+
+
+def check_indexes() -> None:
+    """보조 인덱스가 원본 테이블과 일치하는지 검사 (불일치 시 AssertionError)"""
+    user_codes: dict[int, set] = {}
+    owner_codes: dict[int, set] = {}
+    for code, info in _codes.items():
+        target = owner_codes if info.get("is_owner_code", False) else user_codes
+        target.setdefault(info["owner"], set()).add(code)
+    groups_by_code: dict[str, set] = {}
+    for gid, grp in _groups.items():
+        groups_by_code.setdefault(grp["code"], set()).add(gid)
+
+    assert {k: set(v) for k, v in _user_codes_by_owner.items()} == user_codes, "owner→일반 코드 인덱스 불일치"
+    assert {k: set(v) for k, v in _owner_codes_by_owner.items()} == owner_codes, "owner→소유자 코드 인덱스 불일치"
+    assert {k: set(v) for k, v in _groups_by_code.items()} == groups_by_code, "code→그룹 인덱스 불일치"
+
+# ────────────────────────────
+# 1) 코드 관리
+# ────────────────────────────
+
+def generate_code() -> str:
+    return f"{secrets.randbelow(900000) + 100000}"
+
+
+async def register_code(owner_id: int, duration_days: int = 3, max_free: int = 1) -> str | None:
+    used = len(_user_codes_by_owner.get(owner_id, ())) + _expired_free.get(owner_id, 0)
+    if used >= max_free:
+        return None
+    code = generate_code()
+    info = {
+        "owner": owner_id,
+        "expires": time.time() + duration_days * 86400,
+        "is_owner_code": False
+    }
+    if _shared:
+        # 다른 워커에서 같은 사용자가 동시에 발급하는 경우까지 한도 확인
+        if not await _store.create_code(code, info, max_free):
+            return None
+        _set_code(code, info)
+        _notify("code", code)
+        return code
+    _put_code(code, info)
+    return code
+
+
+def issue_owner_code(code: str, owner_id: int, duration_days: int) -> None:
+    """소유자가 지정한 유효기간으로 코드 생성"""
+    _put_code(code, {
+        "owner": owner_id,
+        "expires": time.time() + duration_days * 86400,
+        "is_owner_code": True
+    })
+
+
+def issue_user_code(code: str, owner_id: int, duration_days: int) -> None:
+    """지정한 이름의 일반 사용자 코드 생성 (결제로 새로 활성화되는 코드)"""
+    _put_code(code, {
+        "owner": owner_id,
+        "expires": time.time() + duration_days * 86400,
+        "is_owner_code": False
+    })
+
+
+def can_pay_for_code(code: str, user_id: int) -> bool:
+    """결제로 활성화할 수 있는 코드인지 (아직 없는 코드이거나 이 사용자가 받은 일반 코드)"""
+    info = _codes.get(code)
+    return info is None or (not info.get("is_owner_code", False) and info["owner"] == user_id)
+
+
+def is_code_valid(code: str) -> bool:
+    info = _codes.get(code)
+    return bool(info and info["expires"] >= time.time())
+
+
+async def delete_code(code: str) -> bool:
+    if _shared:
+        # 다른 워커의 그룹 연결·연장과 겹치지 않도록 저장소 트랜잭션에서 삭제하고 최신 그룹 정보를 반영
+        groups = await _store.remove_code(code)
+        _set_code(code, None)
+        if groups is None:
+            return False   # 다른 워커가 이미 삭제
+        _notify("code", code)
+        for gid, grp in groups.items():
+            _set_group(gid, grp)
+            _notify("group", gid)
+        return True
+    info = _codes.pop(code, None)
+    if info is None:
+        return False
+    _unindex_code(code, info)
+    _store.delete_code(code)
+    _notify("code", code)
+    # 삭제 시 해당 코드로 연결된 그룹 해제
+    for gid in _groups_by_code.get(code, ()):
+        grp = _groups[gid]
+        grp["connected"] = False
+        _store.put_group(gid, grp)
+        _notify("group", gid)
+    return True
+
+
+def evict_code(code: str) -> bool:
+    """만료 후 보존 기간이 지난 코드 정리 (무료 코드는 발급 한도에 계속 포함)"""
+    info = _codes.pop(code, None)
+    if info is None:
+        return False
+    _unindex_code(code, info)
+    _store.delete_code(code)
+    if not info.get("is_owner_code", False):
+        owner = info["owner"]
+        _expired_free[owner] = _expired_free.get(owner, 0) + 1
+        _store.put_quota(owner, _expired_free[owner])
+    _notify("code", code)
+    return True
+
+
+async def extend_code(code: str, days: int) -> bool:
+    """발급된 코드의 만료일 연장 및 연결된 그룹 동기화"""
+    if _shared:
+        result = await _store.extend_code(code, days * 86400)
+        if result is None:
+            return False
+        info, groups = result
+        _set_code(code, info)
+        _notify("code", code)
+        for gid, grp in groups.items():
+            _set_group(gid, grp)
+            _notify("group", gid)
+        return True
+    info = _codes.get(code)
+    if not info:
+        return False
+    info["expires"] += days * 86400
+    _store.put_code(code, info)
+    _notify("code", code)
+    # 이미 연결된 그룹들의 만료일 동기화
+    for gid in _groups_by_code.get(code, ()):
+        grp = _groups[gid]
+        if grp.get("connected"):
+            grp["expires"] = info["expires"]
+            _store.put_group(gid, grp)
+            _notify("group", gid)
+    return True
+
+
+def get_groups_by_code(code: str) -> list[int]:
+    """해당 코드로 연결된 그룹 ID 목록 반환"""
+    return list(_groups_by_code.get(code, ()))
+
+
+def get_codes_by_owner(owner_id: int) -> list[str]:
+    """소유자가 발급한 일반 코드 목록 반환"""
+    return list(_user_codes_by_owner.get(owner_id, ()))
+
+
+def get_owner_codes(owner_id: int) -> list[str]:
+    """소유자 전용 코드 목록 반환"""
+    return list(_owner_codes_by_owner.get(owner_id, ()))
+
+# ────────────────────────────
+# 2) 그룹 연결 관리
+# ────────────────────────────
+
+async def register_group_to_code(code: str, group_id: int) -> bool:
+    now = time.time()
+    if _shared:
+        # 코드 확인과 연결을 저장소 트랜잭션 하나로 (다른 워커의 연장·삭제와 경합 방지)
+        result = await _store.register_group(code, group_id, now)
+        if result is None:
+            return False
+        info_code, grp = result
+        _set_code(code, info_code)
+        _set_group(group_id, grp)
+        _notify("group", group_id)
+        return True
+    info_code = _codes.get(code)
+    if not info_code or info_code["expires"] < now:
+        return False
+
+    if group_id in _groups:
+        grp = _groups[group_id]
+        # 이미 다른 코드로 연결되어 있거나 이미 연결 상태면 거부
+        if grp["code"] != code or grp["connected"]:
+            return False
+        grp["connected"] = True
+        grp["expires"]   = info_code["expires"]
+        _store.put_group(group_id, grp)
+        _notify("group", group_id)
+        return True
+
+    _groups[group_id] = {
+        "code":         code,
+        "expires":      info_code["expires"],
+        "extend_count": 0,
+        "connected":    True
+    }
+    _index_group(group_id, code)
+    _store.put_group(group_id, _groups[group_id])
+    _notify("group", group_id)
+    return True
+
+
+def is_group_active(group_id: int) -> bool:
+    info = _groups.get(group_id)
+    return bool(info and info.get("connected") and info.get("expires", 0) >= time.time())
+
+
+def group_remaining_seconds(group_id: int) -> int:
+    info = _groups.get(group_id)
+    if not info:
+        return 0
+    return max(0, int(info["expires"] - time.time()))
+
+
+def extend_group(group_id: int, duration_days: int = 3, max_extends: int = 1) -> bool:
+    info = _groups.get(group_id)
+    if not info or info.get("extend_count", 0) >= max_extends:
+        return False
+    info["expires"]      += duration_days * 86400
+    info["extend_count"] += 1
+    _store.put_group(group_id, info)
+    _notify("group", group_id)
+    return True
+
+
+async def disconnect_user(group_id: int) -> None:
+    if _shared:
+        # 작업 사본(다른 워커의 변경이 아직 반영되지 않았을 수 있음)으로 그룹 행을 덮어쓰지 않음
+        grp = await _store.disconnect_group(group_id)
+        if grp is not None:
+            _set_group(group_id, grp)
+            _notify("group", group_id)
+        return
+    info = _groups.get(group_id)
+    if info:
+        info["connected"] = False
+        _store.put_group(group_id, info)
+        _notify("group", group_id)
+
+
+def evict_group(group_id: int) -> bool:
+    """만료 후 보존 기간이 지난 그룹 정리 (새 코드로 다시 등록 가능)"""
+    info = _groups.get(group_id)
+    if info is None:
+        return False
+    _set_group(group_id, None)
+    _store.delete_group(group_id)
+    _notify("group", group_id)
+    return True
+
+# ────────────────────────────
+# 3) 그룹 메시지 로그 및 참가자 관리
+# ────────────────────────────
+
+def register_participant(group_id: int, user_id: int, username: str, lang: str | None = None) -> None:
+    """그룹 참가자를 등록 (lang: 이번 메시지에서 감지된 언어, 그룹 언어 구성에 반영)"""
+    if group_id not in _group_participants:
+        _group_participants[group_id] = {}
+    members = _group_participants[group_id]
+    langs = _participant_langs.setdefault(group_id, {})
+    old_lang = langs.get(user_id)
+    lang = lang or old_lang
+    # 이름이나 언어가 바뀌었을 때만 저장소에 기록
+    if user_id not in members or members[user_id] != username or lang != old_lang:
+        _store.put_participant(group_id, user_id, username, lang)
+    members[user_id] = username
+    if lang != old_lang:
+        langs[user_id] = lang
+        counts = _group_lang_counts.setdefault(group_id, {})
+        if old_lang is not None:
+            counts[old_lang] -= 1
+            if not counts[old_lang]:
+                del counts[old_lang]
+        counts[lang] = counts.get(lang, 0) + 1
+
+
+def group_languages(group_id: int) -> dict[str, int]:
+    """참가자들이 쓰는 언어별 인원 (학습된 구성)"""
+    if _shared and not is_local_chat(group_id):
+        return _store.read_group_languages(group_id)
+    return dict(_group_lang_counts.get(group_id, {}))
+
+
+def get_group_language_override(group_id: int) -> list[str] | None:
+    return get_setting(f"langs:{group_id}")
+
+
+def set_group_language_override(group_id: int, langs: list[str] | None) -> None:
+    """그룹 번역 대상 언어 고정 (None이면 학습된 구성 사용)"""
+    set_setting(f"langs:{group_id}", langs)
+
+
+def list_group_participants(group_id: int) -> list[tuple[int, str]]:
+    """그룹 참가자 목록 반환"""
+    if _shared and not is_local_chat(group_id):
+        return _store.read_participants(group_id)
+    return list(_group_participants.get(group_id, {}).items())
+
+
+def _group_ring(group_id: int) -> LogRing:
+    ring = _group_logs.get(group_id)
+    if ring is None:
+        spill = os.path.join(LOG_SPILL_DIR, f"group_{group_id}.jsonl") if LOG_SPILL_DIR else None
+        ring = _group_logs[group_id] = LogRing(_group_log_capacity.get(group_id, LOG_RING_CAPACITY), spill)
+    return ring
+
+
+def set_group_log_capacity(group_id: int, capacity: int) -> None:
+    """그룹별 메모리 로그 용량 변경 (설정으로 저장해 담당 워커에도 반영)"""
+    set_setting(f"log_capacity:{group_id}", capacity)
+
+
+def _resize_group_log(group_id: int, capacity: int) -> None:
+    _group_log_capacity[group_id] = capacity
+    ring = _group_logs.get(group_id)
+    if ring is not None:
+        ring.resize(capacity)
+
+
+def log_group_message(group_id: int, user_id: int, username: str, message: str, timestamp: float = None) -> None:
+    """그룹 메시지를 로그에 저장"""
+    ts = timestamp if timestamp is not None else time.time()
+    ring = _group_ring(group_id)
+    ring.append(ts, user_id, username, message)
+    _store.append_log(group_id, ts, user_id, username, message)
+    for fn in _log_listeners:
+        fn(group_id, ring.total - 1, message)
+    # 메시지를 남기면 자동으로 참가자도 등록
+    register_participant(group_id, user_id, username)
+
+
+def get_group_logs(group_id: int, limit: int | None = None) -> list[dict]:
+    """그룹 로그를 반환 (최신 limit개 선택 가능)"""
+    if _shared and not is_local_chat(group_id):
+        return _store.read_logs(group_id, limit)
+    ring = _group_logs.get(group_id)
+    return ring.latest(limit) if ring else []
+
+
+def set_log_indexer(terms) -> None:
+    """저장된 로그(SQLite 기록·밀려난 세그먼트) 색인에 쓸 토큰 함수 지정 (메시지 → 토큰 집합)"""
+    logring.set_index_terms(terms)
+    if isinstance(_store, SQLiteStore):
+        _store.set_indexer(terms)
+
+
+async def iter_older_logs(group_id: int, since: float | None = None, until: float | None = None,
+                          contains: list[str] = (), terms: set[str] = frozenset()):
+    """메모리 링 버퍼에 없는 그룹 로그 후보를 최신순으로 (검색에서 링 다음에 이어서 조회)
+    SQLite 저장소는 저장된 기록 중 링에 있는 최신 로그 이후(다른 워커 담당 그룹은 전체),
+    메모리 저장소는 밀려난 로그 세그먼트. terms: 모두 있어야 하는 색인 토큰 (저장된 색인으로 후보를 좁힘),
+    contains: 원문에 모두 있어야 하는 부분 문자열 (색인 밖 구간 미리 거르기용).
+    반환된 iterator는 디스크를 읽으므로 작업 스레드에서 소비"""
+    ring = None if _shared and not is_local_chat(group_id) else _group_logs.get(group_id)
+    if isinstance(_store, SQLiteStore):
+        before = None
+        if ring:
+            # 링의 가장 오래된 항목을 (time, id) 커서로: 지금까지 넣은 쓰기를 커밋한 뒤 그 시점의 링 길이만큼 건너뜀
+            before = await _store.log_boundary(group_id, len(ring))
+            if before is None:
+                return iter(())
+        return _store.iter_logs_desc(group_id, since, until, before, contains, terms)
+    if ring is None or not ring.spill_path or not os.path.exists(ring.spill_path):
+        return iter(())
+    ring.flush()
+    return _iter_spill_desc(ring.spill_path, os.path.getsize(ring.spill_path), since, until, contains, terms)
+
+
+def _iter_spill_desc(path: str, end: int, since, until, contains, terms):
+    """세그먼트를 최신순으로, 색인 레코드가 있는 묶음은 시간 범위·bloom filter가 맞을 때만 읽음"""
+    positions = [logring.bloom_positions(t) for t in terms]
+    with open(path, "rb") as f:
+        hi = end   # 여기부터 끝까지는 처리함
+        for start, length, _, first, last, bloom in logring.spill_blocks_desc(path):
+            if start + length > end:
+                continue   # 호출 이후 기록된 묶음
+            if start + length < hi and (yield from _scan_spill(f, start + length, hi, since, until, contains)):
+                return   # 색인 레코드 없는 구간
+            hi = start
+            if since is not None and last < since:
+                return
+            if (until is not None and first > until) or not all(logring.bloom_has(bloom, p) for p in positions):
+                continue
+            if (yield from _scan_spill(f, start, start + length, since, until, contains)):
+                return
+        if hi > 0:
+            yield from _scan_spill(f, 0, hi, since, until, contains)
+
+
+def _scan_spill(f, lo: int, end: int, since, until, contains, block: int = 1 << 16):
+    """세그먼트 [lo, end) 구간을 끝에서부터 블록 단위로 읽어 최신순으로, since 이전에 닿으면 True 반환"""
+    tail = b""
+    while end > lo:
+        start = max(lo, end - block)
+        f.seek(start)
+        lines = (f.read(end - start) + tail).split(b"\n")
+        end = start
+        tail = lines.pop(0) if end > lo else b""   # 블록 경계에 걸친 줄은 다음 블록과 합침
+        for line in reversed(lines):
+            if not line or not all(part.encode() in line for part in contains):
+                continue
+            e = json.loads(line)
+            if until is not None and e["time"] > until:
+                continue
+            if since is not None and e["time"] < since:
+                return True
+            yield e
+    return False
+
+
+async def iter_group_logs(group_id: int, since: float | None = None, until: float | None = None):
+    """그룹 로그 전체를 오래된 순으로 하나씩 (내보내기용)
+    SQLite 저장소는 저장된 전체 기록, 메모리 저장소는 밀려난 로그 세그먼트 + 현재 링 버퍼.
+    호출 시점까지 기록된 로그로 범위를 고정하며 (SQLite는 마지막 id, 메모리는 파일 길이·링 복사본),
+    반환된 iterator는 작업 스레드에서 소비해도 됨"""
+    if isinstance(_store, SQLiteStore):
+        await _store.flush_async()
+        return _store.iter_logs(group_id, since, until, upto=_store.last_log_id())
+    ring = _group_logs.get(group_id)
+    if ring is None:
+        return iter(())
+    ring.flush()
+    spill = ring.spill_path if ring.spill_path and os.path.exists(ring.spill_path) else None
+    end = os.path.getsize(spill) if spill else 0
+    recent = ring.latest()
+    return _iter_ring_logs(spill, end, recent, since, until)
+
+
+def _iter_ring_logs(spill: str | None, end: int, recent: list[dict], since, until):
+    entries = itertools.chain(_read_spill(spill, end) if spill else (), recent)
+    for e in entries:
+        if since is not None and e["time"] < since:
+            continue
+        if until is not None and e["time"] > until:
+            break
+        yield e
+
+
+def _read_spill(path: str, end: int):
+    with open(path, "rb") as f:
+        for line in f:
+            end -= len(line)
+            if end < 0:
+                break
+            yield json.loads(line)
+
+# ────────────────────────────
+# 4) 전역 설정 · 코드 로그 · 결제 사용 기록
+# ────────────────────────────
+
+def get_setting(key: str, default=None):
+    value = _settings.get(key)
+    return default if value is None else value
+
+
+def set_setting(key: str, value) -> None:
+    """설정 저장 (None이면 해제), 다중 워커 모드에서는 다른 워커에도 반영"""
+    _settings[key] = value
+    _store.put_setting(key, value)
+    _apply_setting(key, value)
+
+
+def _apply_setting(key: str, value) -> None:
+    global _log_groups
+    if key.startswith("log_capacity:") and value is not None:
+        _resize_group_log(int(key.partition(":")[2]), int(value))
+    elif key in ("log_group", "user_log_group"):
+        _log_groups = frozenset(gid for k in ("log_group", "user_log_group")
+                                if (gid := _settings.get(k)) is not None)
+
+
+def set_owner(user_id: int) -> None:
+    set_setting("owner_id", user_id)
+
+
+def get_owner() -> int | None:
+    return get_setting("owner_id")
+
+
+def is_owner(user_id: int) -> bool:
+    return user_id is not None and get_setting("owner_id") == user_id
+
+
+def set_control_group(group_id: int) -> None:
+    set_setting("control_group", group_id)
+
+
+def get_control_group() -> int | None:
+    return get_setting("control_group")
+
+
+def is_control_group(group_id: int) -> bool:
+    return get_setting("control_group") == group_id
+
+
+def set_log_group(group_id: int) -> None:
+    set_setting("log_group", group_id)
+
+
+def is_log_group(group_id: int) -> bool:
+    return get_setting("log_group") == group_id
+
+
+def set_user_log_group(group_id: int) -> None:
+    set_setting("user_log_group", group_id)
+
+
+def is_user_log_group(group_id: int) -> bool:
+    return get_setting("user_log_group") == group_id
+
+
+def get_user_log_group() -> int | None:
+    return get_setting("user_log_group")
+
+
+def is_any_log_group(group_id: int) -> bool:
+    """로그 그룹 또는 사용자 로그 그룹인지 (캐시된 집합 조회)"""
+    return group_id in _log_groups
+
+
+def is_payment_used(tx: str) -> bool:
+    return tx in _payments
+
+
+async def claim_payment(tx: str, code: str) -> bool:
+    """결제 TX를 코드 활성화에 사용 처리 (이미 사용된 TX면 False, 워커 간 원자적)"""
+    if tx in _payments:
+        return False
+    if _shared:
+        if not await _store.claim_payment(tx, code):
+            _payments[tx] = code
+            return False
+    else:
+        _store.put_payment(tx, code)
+    _payments[tx] = code
+    return True
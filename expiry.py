@@ -0,0 +1,155 @@
+# expiry.py
+# 코드·그룹 만료 스케줄러 (최소 힙) - 애플리케이션 job queue에서 주기 실행
+#  - 만료 전 알림(EXPIRY_REMIND_HOURS)과 만료 알림을 그룹에 전송
+#  - 만료 후 보존 기간(EXPIRY_RETENTION_DAYS)이 지나면 코드·그룹 정리
+#  - 연장·삭제 시 새 항목만 추가, 오래된 항목은 꺼낼 때 만료일 비교로 무시 (재스캔 없음)
+#  - 만료일이 그대로인 변경 알림(등록·해제·동기화 등)은 무시, 같은 (동작, 만료일) 알림은 한 번만
+
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from dotenv import load_dotenv
+import database
+import outbox
+
+load_dotenv()
+EXPIRY_REMIND_HOURS   = [float(h) for h in os.getenv("EXPIRY_REMIND_HOURS", "24,1").split(",") if h.strip()]
+EXPIRY_RETENTION_DAYS = float(os.getenv("EXPIRY_RETENTION_DAYS", "30"))
+EXPIRY_CHECK_INTERVAL = float(os.getenv("EXPIRY_CHECK_INTERVAL", "30"))   # 초
+
+REMIND_TEXT = (
+    "⏰ 이용 기간이 {h}시간 후 만료됩니다.",
+    "⏰ 使用期限将在{h}小时后到期。",
+    "⏰ រយៈពេលប្រើប្រាស់នឹងផុតកំណត់ក្នុងរយៈពេល {h} ម៉ោងទៀត។",
+    "⏰ Thời hạn sử dụng sẽ hết sau {h} giờ.",
+)
+EXPIRED_TEXT = (
+    "⛔ 이용 기간이 만료되었습니다.",
+    "⛔ 使用期限已到期。",
+    "⛔ រយៈពេលប្រើប្រាស់បានផុតកំណត់។",
+    "⛔ Thời hạn sử dụng đã hết.",
+)
+
+
+class ExpiryScheduler:
+    """(시각, 순번, 동작, 종류, 키, 기준 만료일, 부가값) 최소 힙"""
+
+    def __init__(self):
+        self._heap: list[tuple] = []
+        self._seq = itertools.count()
+        self._scheduled: dict[tuple, float] = {}   # (종류, 키) → 힙에 넣은 항목의 만료일
+        self._emitted: dict[tuple, set] = {}       # (종류, 키) → 이미 반환한 (동작, 만료일, 부가값)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _entries(self, kind: str, key, deadline: float, now: float):
+        if kind == "group":
+            for hours in EXPIRY_REMIND_HOURS:
+                at = deadline - hours * 3600
+                if at > now:
+                    yield (at, next(self._seq), "remind", kind, key, deadline, hours)
+            yield (deadline, next(self._seq), "expire", kind, key, deadline, None)
+        yield (deadline + EXPIRY_RETENTION_DAYS * 86400, next(self._seq), "evict", kind, key, deadline, None)
+
+    def schedule(self, kind: str, key) -> None:
+        """현재 만료일 기준으로 항목 추가 (database 변경 알림 콜백)"""
+        deadline = self._deadline(kind, key)
+        if deadline is None:
+            # 삭제·정리된 항목: 힙에 남은 항목은 pop_due에서 버려짐
+            self._scheduled.pop((kind, key), None)
+            self._emitted.pop((kind, key), None)
+            return
+        if self._scheduled.get((kind, key)) == deadline:
+            return
+        self._scheduled[(kind, key)] = deadline
+        for entry in self._entries(kind, key, deadline, time.time()):
+            heapq.heappush(self._heap, entry)
+
+    def load_all(self) -> None:
+        """시작 시 전체 코드·그룹으로 힙 구성 (O(n))"""
+        now = time.time()
+        entries = []
+        self._scheduled.clear()
+        self._emitted.clear()
+        for code, info in database._codes.items():
+            entries.extend(self._entries("code", code, info["expires"], now))
+            self._scheduled[("code", code)] = info["expires"]
+        for gid, grp in database._groups.items():
+            entries.extend(self._entries("group", gid, grp["expires"], now))
+            self._scheduled[("group", gid)] = grp["expires"]
+        self._heap = entries
+        heapq.heapify(self._heap)
+
+    @staticmethod
+    def _deadline(kind: str, key) -> float | None:
+        info = database._codes.get(key) if kind == "code" else database._groups.get(key)
+        return info["expires"] if info else None
+
+    def pop_due(self, now: float) -> list[tuple]:
+        """시각이 된 항목 중 여전히 유효한 것만 반환"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, action, kind, key, deadline, extra = heapq.heappop(self._heap)
+            current = self._deadline(kind, key)
+            if current is None:
+                self._scheduled.pop((kind, key), None)
+                self._emitted.pop((kind, key), None)
+            if current != deadline:
+                continue   # 연장·삭제된 항목
+            if action != "evict" and not database._groups[key].get("connected"):
+                continue
+            emitted = self._emitted.setdefault((kind, key), set())
+            if (action, deadline, extra) in emitted:
+                continue   # 같은 알림이 이미 나감
+            emitted.add((action, deadline, extra))
+            if action == "evict":
+                self._scheduled.pop((kind, key), None)
+                self._emitted.pop((kind, key), None)
+            due.append((action, kind, key, extra))
+        return due
+
+
+scheduler = ExpiryScheduler()
+
+
+async def _notify_group(bot, group_id: int, text: str) -> None:
+    try:
+        await outbox.send(bot, group_id, text)
+    except Exception as e:
+        logging.warning("만료 알림 전송 실패 (%s): %r", group_id, e)
+
+
+async def run(ctx) -> None:
+    """job queue 콜백: 만료 알림·정리 처리"""
+    fmt = ctx.job.data
+    inquiry = database.get_setting("inquiry_msg", ctx.bot_data.get("inquiry_msg"))
+    sends = []
+    for action, kind, key, extra in scheduler.pop_due(time.time()):
+        if action == "evict":
+            if kind == "code":
+                database.evict_code(key)
+            else:
+                database.evict_group(key)
+            continue
+        if action == "remind":
+            hours = int(extra) if extra == int(extra) else extra
+            lines = [line.format(h=hours) for line in REMIND_TEXT]
+        else:
+            lines = list(EXPIRED_TEXT)
+        if inquiry:
+            lines = [f"{line}\n{inq}" for line, inq in zip(lines, inquiry)]
+        sends.append(_notify_group(ctx.bot, key, fmt(*lines)))
+    # 알림은 발신 큐가 채팅별 속도를 맞추므로 한꺼번에 제출
+    await asyncio.gather(*sends)
+
+
+def install(app, fmt) -> None:
+    """스케줄러 초기화 후 job queue에 등록 (fmt: 4개 언어 메시지 포맷 함수)"""
+    scheduler.load_all()
+    database.add_change_listener(scheduler.schedule)
+    app.job_queue.run_repeating(run, interval=EXPIRY_CHECK_INTERVAL, first=EXPIRY_CHECK_INTERVAL,
+                                data=fmt, name="expiry")
@@ -0,0 +1,147 @@
+# export.py
+# 그룹 메시지 로그·코드 감사 로그 내보내기 (/exportlogs, /exportcodelogs)
+#  - 저장소 → 레코드 generator → 줄(JSONL/CSV) generator → gzip 파일로 흘려 씀 (전체를 메모리에 모으지 않음)
+#  - 파일 쓰기는 작업 스레드(asyncio.to_thread)에서, 이벤트 루프는 내보낼 범위 고정만 담당
+#    (읽기 자체는 소비할 때 일어나지만 요청 시점 이후에 쌓인 로그는 포함하지 않음)
+#  - 압축 파일이 EXPORT_PART_BYTES를 넘으면 다음 파트로 나눔 (텔레그램 봇 업로드 한도 50MB)
+
+import os
+import io
+import csv
+import gzip
+import json
+import time
+import asyncio
+import tempfile
+from datetime import datetime
+from itertools import islice
+from dotenv import load_dotenv
+import database
+import auditlog
+
+load_dotenv()
+EXPORT_DIR        = os.getenv("EXPORT_DIR") or None                                  # 임시 파일 위치 (기본: 시스템 임시 폴더)
+EXPORT_PART_BYTES = int(os.getenv("EXPORT_PART_BYTES", str(45 * 1024 * 1024)))      # 파트당 최대 압축 크기
+EXPORT_BATCH      = 2000                                                             # 한 번에 압축기로 넘기는 줄 수
+EXPORT_LEVEL      = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+EXPORT_UPLOAD_TIMEOUT = float(os.getenv("EXPORT_UPLOAD_TIMEOUT", "300"))             # 파트 업로드 제한 시간(초)
+EXPORT_CONCURRENCY    = int(os.getenv("EXPORT_CONCURRENCY", "1"))                    # 동시에 파일을 만드는 내보내기 수
+
+FORMATS = ("jsonl", "csv")
+_slots: asyncio.Semaphore | None = None
+LOG_COLUMNS  = ("time", "user_id", "username", "message")
+CODE_COLUMNS = auditlog.AuditEntry._fields
+
+
+class _Echo:
+    """csv.writer가 만든 한 줄을 그대로 돌려주는 가짜 파일"""
+    def write(self, value: str) -> str:
+        return value
+
+
+def slots() -> asyncio.Semaphore:
+    """동시 내보내기 제한 (실행 중인 이벤트 루프에서 처음 쓸 때 생성)"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+    return _slots
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat(timespec="seconds")
+
+
+def jsonl_lines(records):
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    for r in records:
+        yield encode(r) + "\n"
+
+
+def csv_lines(records, columns):
+    """CSV 행 (첫 열 time은 로컬 ISO 시각), 머리글은 파트마다 write_parts가 붙임"""
+    writer = csv.writer(_Echo())
+    for r in records:
+        yield writer.writerow([_iso(r[c]) if c == "time" else r[c] for c in columns])
+
+
+def csv_header(columns) -> str:
+    return csv.writer(_Echo()).writerow(columns)
+
+
+def write_parts(lines, prefix: str, header: str | None = None) -> dict:
+    """줄 generator를 gzip 파트 파일로 기록, 통계 반환
+    { "paths", "lines", "raw_bytes", "gz_bytes", "seconds" }"""
+    started = time.perf_counter()
+    stats = {"paths": [], "lines": 0, "raw_bytes": 0, "gz_bytes": 0, "seconds": 0.0}
+    raw = gz = None
+    lines = iter(lines)
+    try:
+        while chunk := list(islice(lines, EXPORT_BATCH)):
+            if gz is None or raw.tell() >= EXPORT_PART_BYTES:
+                if gz is not None:
+                    gz.close()
+                    stats["gz_bytes"] += raw.tell()
+                    raw.close()
+                fd, path = tempfile.mkstemp(prefix=f"{prefix}-", suffix=".gz", dir=EXPORT_DIR)
+                stats["paths"].append(path)
+                raw = io.open(fd, "wb")
+                gz = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=EXPORT_LEVEL)
+                if header:
+                    gz.write(header.encode())
+            data = "".join(chunk).encode()
+            gz.write(data)
+            stats["lines"] += len(chunk)
+            stats["raw_bytes"] += len(data)
+    except BaseException:
+        if gz is not None:
+            gz.close()
+            raw.close()
+        cleanup(stats["paths"])
+        raise
+    if gz is not None:
+        gz.close()
+        stats["gz_bytes"] += raw.tell()
+        raw.close()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def cleanup(paths: list[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _format(records, fmt: str, columns) -> tuple:
+    if fmt == "csv":
+        return csv_lines(records, columns), csv_header(columns)
+    return jsonl_lines(records), None
+
+# ────────────────────────────
+# 내보내기 대상
+# ────────────────────────────
+
+async def group_logs(group_id: int, since: float | None = None, until: float | None = None, fmt: str = "jsonl"):
+    """그룹 메시지 로그 내보내기 준비: (줄 generator, CSV 머리글) — 이벤트 루프에서 호출"""
+    return _format(await database.iter_group_logs(group_id, since, until), fmt, LOG_COLUMNS)
+
+
+def code_logs(fmt: str = "jsonl", **conditions):
+    """코드 감사 로그 내보내기 준비: (줄 generator, CSV 머리글) — 이벤트 루프에서 호출"""
+    records = (e._asdict() for e in auditlog.scan(**conditions))
+    return _format(records, fmt, CODE_COLUMNS)
+
+
+def split_format(args: list[str]) -> tuple[list[str], str]:
+    """인자 끝의 jsonl|csv 분리 (없으면 jsonl)"""
+    if args and args[-1].lower() in FORMATS:
+        return args[:-1], args[-1].lower()
+    return args, "jsonl"
+
+
+def summary(stats: dict) -> str:
+    secs = max(stats["seconds"], 1e-9)
+    return (f"{stats['lines']:,}줄, 원본 {stats['raw_bytes'] / 1e6:.1f}MB → gzip {stats['gz_bytes'] / 1e6:.1f}MB, "
+            f"{stats['seconds']:.1f}초 ({stats['lines'] / secs:,.0f}줄/초, {stats['raw_bytes'] / 1e6 / secs:.1f}MB/초)")
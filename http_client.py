@@ -0,0 +1,50 @@
+# http_client.py
+# 번역·결제 API 호출용 공유 비동기 HTTP 세션 (keep-alive 커넥션 풀)
+
+import os
+import logging
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_TIMEOUT          = float(os.getenv("HTTP_TIMEOUT", "10"))          # 전체 요청 제한 시간(초)
+HTTP_CONNECT_TIMEOUT  = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))   # 연결 수립 제한 시간(초)
+HTTP_MAX_CONNECTIONS  = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))    # 동시 연결 상한
+HTTP_MAX_KEEPALIVE    = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))      # 유지할 유휴 연결 수
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")) # 유휴 연결 유지 시간(초)
+
+_client: httpx.AsyncClient | None = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """공유 세션 반환 (시작 전 호출 시 즉시 생성)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def start(app=None) -> None:
+    """애플리케이션 시작 시 세션 생성 (post_init 훅)"""
+    get_client()
+    logging.info("🌐 HTTP 세션 시작 (max_conn=%d, timeout=%.1fs)", HTTP_MAX_CONNECTIONS, HTTP_TIMEOUT)
+
+
+async def close(app=None) -> None:
+    """애플리케이션 종료 시 세션 정리 (post_shutdown 훅)"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -1,24 +1,159 @@
-# logger.py
-# 유저 간 메시지를 실시간으로 소유자 로그 그룹에 전송
-
-from telegram import Update
-from telegram.ext import ContextTypes
-from database import is_log_group
-
-# 메시지 전송 로그를 로그 그룹에 전달
-async def log_message_to_group(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    message = update.message
-    if not message:
-        return
-
-    # 소유자 로그 그룹이 아닐 경우 무시
-    if not is_log_group(chat_id):
-        return
-
-    user = update.effective_user
-    user_name = user.full_name or f"User {user.id}"
-    msg = message.text or "[미지원 메시지 유형]"
-
-    log_text = f"[{user_name} | {user.id}]\n{msg}"
-    await context.bot.send_message(chat_id=chat_id, text=log_text)
+# logger.py
+# 유저 간 메시지를 소유자 사용자 로그 그룹에 모아서 전송
+#  - 로그 그룹별 버퍼에 쌓았다가 LOG_BATCH_MAX_ENTRIES개 / LOG_BATCH_MAX_CHARS자 / LOG_BATCH_INTERVAL초 중
+#    먼저 도달하면 한 메시지로 전송 (다음 항목이 글자 수를 넘기게 되면 그 전까지만 먼저 전송)
+#  - 로그 그룹당 전송은 한 번에 하나, 그동안 들어온 항목은 다음 묶음으로 (밀린 묶음은 여러 메시지로 나눠 전송)
+#  - 한 항목만으로 한 메시지를 넘는 경우에만 텍스트 파일로 전송
+#  - 버퍼는 로그 그룹당 LOG_BATCH_MAX_QUEUED개까지, 넘치면 오래된 항목부터 버림
+#  - 종료 시 남은 항목을 모두 전송 (stop, outbox.stop 전에 호출)
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from telegram import Update
+from telegram.ext import ContextTypes
+from dotenv import load_dotenv
+import database
+import outbox
+
+load_dotenv()
+LOG_BATCH_MAX_ENTRIES = int(os.getenv("LOG_BATCH_MAX_ENTRIES", "30"))      # 이 개수가 쌓이면 바로 전송
+LOG_BATCH_MAX_CHARS   = int(os.getenv("LOG_BATCH_MAX_CHARS", "4000"))      # 텔레그램 4096자 제한 여유분
+LOG_BATCH_INTERVAL    = float(os.getenv("LOG_BATCH_INTERVAL", "5"))        # 첫 항목 후 최대 대기(초)
+LOG_BATCH_MAX_QUEUED  = int(os.getenv("LOG_BATCH_MAX_QUEUED", "10000"))    # 로그 그룹당 최대 대기 항목 수
+
+SEPARATOR = "\n\n"
+
+
+class LogBatcher:
+    def __init__(self):
+        self._buffers: dict[int, deque] = {}     # 로그 그룹 → 전송 대기 항목
+        self._chars: dict[int, int] = {}         # 로그 그룹 → 대기 항목 글자 수 (구분자 포함)
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self._sending: dict[int, asyncio.Task] = {}
+        self._bot = None
+        self.stats = {"entries": 0, "messages": 0, "documents": 0, "dropped": 0, "failed": 0}
+
+    def queued(self) -> int:
+        return sum(len(buf) for buf in self._buffers.values())
+
+    def add(self, bot, chat_id: int, text: str) -> None:
+        self._bot = bot
+        buf = self._buffers.get(chat_id)
+        if buf is None:
+            buf = self._buffers[chat_id] = deque()
+            self._chars[chat_id] = 0
+        elif chat_id not in self._sending and self._chars[chat_id] + len(text) > LOG_BATCH_MAX_CHARS:
+            # 이 항목을 더하면 한 메시지를 넘음 → 지금까지 쌓인 항목 먼저 전송
+            self._start(chat_id)
+            buf = self._buffers[chat_id] = deque()
+            self._chars[chat_id] = 0
+        if len(buf) >= LOG_BATCH_MAX_QUEUED:
+            self._chars[chat_id] -= len(buf.popleft()) + len(SEPARATOR)
+            self.stats["dropped"] += 1
+        buf.append(text)
+        self._chars[chat_id] += len(text) + len(SEPARATOR)
+        self.stats["entries"] += 1
+        if chat_id not in self._sending:   # 전송 중이면 끝난 뒤 다시 확인
+            self._schedule(chat_id)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """남은 항목을 모두 전송 (최대 timeout초 대기)"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        tasks = list(self._sending.values())
+        tasks += [asyncio.create_task(self._send(chat_id, self._take(chat_id)))
+                  for chat_id in list(self._buffers) if self._buffers[chat_id]]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    # ── 내부 ──
+    def _schedule(self, chat_id: int) -> None:
+        """조건을 넘었으면 바로 전송, 아니면 첫 항목 기준 타이머"""
+        if (len(self._buffers[chat_id]) >= LOG_BATCH_MAX_ENTRIES
+                or self._chars[chat_id] - len(SEPARATOR) >= LOG_BATCH_MAX_CHARS):
+            self._start(chat_id)
+        elif chat_id not in self._timers:
+            self._timers[chat_id] = asyncio.get_running_loop().call_later(LOG_BATCH_INTERVAL, self._start, chat_id)
+
+    def _start(self, chat_id: int) -> None:
+        timer = self._timers.pop(chat_id, None)
+        if timer:
+            timer.cancel()
+        if chat_id not in self._sending and self._buffers.get(chat_id):
+            # 전송할 항목은 지금 떼어냄 (이후 항목은 새 버퍼로)
+            self._sending[chat_id] = asyncio.create_task(self._flush(chat_id, self._take(chat_id)))
+
+    def _take(self, chat_id: int) -> list[str]:
+        del self._chars[chat_id]
+        return list(self._buffers.pop(chat_id))
+
+    async def _flush(self, chat_id: int, entries: list[str]) -> None:
+        try:
+            await self._send(chat_id, entries)
+        finally:
+            del self._sending[chat_id]
+        if chat_id in self._buffers:
+            self._schedule(chat_id)
+
+    async def _send(self, chat_id: int, entries: list[str]) -> None:
+        """LOG_BATCH_MAX_CHARS자 이하 메시지들로 나눠 순서대로 전송 (너무 긴 항목만 파일)"""
+        chunk: list[str] = []
+        size = 0
+        for entry in entries:
+            if chunk and (size + len(SEPARATOR) + len(entry) > LOG_BATCH_MAX_CHARS
+                          or len(entry) > LOG_BATCH_MAX_CHARS):
+                await self._deliver(chat_id, chunk)
+                chunk, size = [], 0
+            size += len(entry) + (len(SEPARATOR) if chunk else 0)
+            chunk.append(entry)
+        if chunk:
+            await self._deliver(chat_id, chunk)
+
+    async def _deliver(self, chat_id: int, chunk: list[str]) -> None:
+        try:
+            if len(chunk) == 1 and len(chunk[0]) > LOG_BATCH_MAX_CHARS:
+                filename = f"log-{time.strftime('%Y%m%d-%H%M%S')}.txt"
+                await outbox.send_document(self._bot, chat_id, chunk[0].encode(), filename, outbox.BULK,
+                                           caption="📄 긴 로그 1건")
+                self.stats["documents"] += 1
+            else:
+                await outbox.send(self._bot, chat_id, SEPARATOR.join(chunk), outbox.BULK)
+                self.stats["messages"] += 1
+        except Exception as e:
+            self.stats["failed"] += len(chunk)
+            logging.warning("로그 전송 실패 (%s, %d건): %r", chat_id, len(chunk), e)
+
+
+batcher = LogBatcher()
+
+
+# 그룹 메시지를 사용자 로그 그룹에 전달 (묶어서 전송)
+async def log_message_to_group(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    message = update.message
+    target = database.get_user_log_group()
+    if not message or target is None:
+        return
+
+    # 그룹 메시지만, 로그 그룹 자신의 메시지는 다시 전달하지 않음
+    chat = update.effective_chat
+    if chat.id > 0 or database.is_any_log_group(chat.id):
+        return
+
+    user = update.effective_user
+    user_name = user.full_name or f"User {user.id}"
+    msg = message.text or "[미지원 메시지 유형]"
+
+    log_text = f"{time.strftime('%H:%M:%S')} [{chat.title or chat.id} | {chat.id}]\n[{user_name} | {user.id}]\n{msg}"
+    batcher.add(context.bot, target, log_text)
+
+
+def stats() -> dict:
+    return {"queued": batcher.queued(), **batcher.stats}
+
+
+async def stop(app=None) -> None:
+    await batcher.stop()
@@ -0,0 +1,166 @@
+# logring.py
+# 그룹 메시지 로그용 고정 용량 링 버퍼
+#  - 열(column) 단위 저장: 시간·user_id는 array, 사용자명은 intern 처리
+#  - 용량 초과로 밀려나는 항목은 선택적으로 추가 전용(append-only) 디스크 세그먼트에 기록
+#  - 세그먼트 옆 색인 파일(+".idx")에 기록 묶음마다 (위치, 길이, 항목 수, 시간 범위, 토큰 bloom filter)
+#    고정 크기 레코드를 추가 → 검색은 시간·토큰이 맞지 않는 묶음을 읽지 않고 건너뜀
+
+import os
+import sys
+import json
+import struct
+import hashlib
+from array import array
+
+SPILL_BATCH = 256           # 세그먼트에 한 번에 기록할 항목 수
+SPILL_INDEX_SUFFIX = ".idx"
+SPILL_BLOOM_BYTES = 4096    # 묶음마다 토큰 bloom filter 크기 (256개 메시지의 토큰 수천 개 기준 오탐 ~1%)
+_BLOCK = struct.Struct("<QIIdd")   # 묶음 시작 위치, 길이, 항목 수, 첫·마지막 항목 시간
+_RECORD = _BLOCK.size + SPILL_BLOOM_BYTES
+
+_index_terms = None   # 메시지 → 색인 토큰 (set_index_terms로 지정, 없으면 색인 레코드를 남기지 않음)
+
+
+def set_index_terms(terms) -> None:
+    global _index_terms
+    _index_terms = terms
+
+
+def bloom_positions(token: str) -> tuple[int, ...]:
+    """토큰의 bloom filter 비트 위치 3개"""
+    d = hashlib.blake2b(token.encode(), digest_size=6).digest()
+    mask = SPILL_BLOOM_BYTES * 8 - 1
+    return tuple(int.from_bytes(d[k:k + 2], "little") & mask for k in (0, 2, 4))
+
+
+def bloom_has(bloom, positions: tuple[int, ...]) -> bool:
+    return all(bloom[p >> 3] & (1 << (p & 7)) for p in positions)
+
+
+def spill_blocks_desc(path: str, chunk: int = 64):
+    """색인 파일의 묶음 레코드를 최신순으로 (start, length, count, first, last, bloom), 덜 쓰인 끝 레코드는 무시"""
+    index = path + SPILL_INDEX_SUFFIX
+    if not os.path.exists(index):
+        return
+    with open(index, "rb") as f:
+        n = os.path.getsize(index) // _RECORD
+        while n > 0:
+            k = min(chunk, n)
+            n -= k
+            f.seek(n * _RECORD)
+            data = memoryview(f.read(k * _RECORD))
+            for j in range(k - 1, -1, -1):
+                at = j * _RECORD
+                yield (*_BLOCK.unpack_from(data, at), data[at + _BLOCK.size:at + _RECORD])
+
+
+class LogRing:
+    """최근 capacity개 메시지만 유지하는 그룹 로그"""
+
+    __slots__ = ("capacity", "times", "user_ids", "usernames", "messages",
+                 "head", "total", "spill_path", "_spill_buf", "_spill_terms", "_spill_span")
+
+    def __init__(self, capacity: int, spill_path: str | None = None):
+        self.capacity = max(1, capacity)
+        self.times = array("d")
+        self.user_ids = array("q")
+        self.usernames: list[str | None] = []
+        self.messages: list[str | None] = []
+        self.head = 0          # 가득 찬 뒤 다음에 덮어쓸 위치 (= 가장 오래된 항목)
+        self.total = 0         # 지금까지 추가된 전체 항목 수 (가장 최근 항목의 seq + 1)
+        self.spill_path = spill_path
+        self._spill_buf: list[str] = []
+        self._spill_terms: set[str] = set()   # 기록 대기 묶음의 색인 토큰
+        self._spill_span = (0.0, 0.0)        # 기록 대기 묶음의 첫·마지막 시간
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, ts: float, user_id: int, username: str | None, message: str | None) -> None:
+        if isinstance(username, str):
+            username = sys.intern(username)
+        if len(self.times) < self.capacity:
+            self.times.append(ts)
+            self.user_ids.append(user_id)
+            self.usernames.append(username)
+            self.messages.append(message)
+        else:
+            i = self.head
+            if self.spill_path:
+                self._spill(i)
+            self.times[i] = ts
+            self.user_ids[i] = user_id
+            self.usernames[i] = username
+            self.messages[i] = message
+            self.head = (i + 1) % self.capacity
+        self.total += 1
+
+    def _index(self, k: int) -> int:
+        """논리 위치 k(0 = 가장 오래된 항목)를 물리 위치로 변환"""
+        return (self.head + k) % len(self.times)
+
+    def record(self, k: int) -> dict:
+        i = self._index(k)
+        return {
+            "time":     self.times[i],
+            "user_id":  self.user_ids[i],
+            "username": self.usernames[i],
+            "message":  self.messages[i],
+        }
+
+    def latest(self, limit: int | None = None) -> list[dict]:
+        """최신 limit개 항목 (오래된 순), limit 없으면 전체"""
+        n = len(self.times)
+        count = min(limit, n) if limit else n
+        return [self.record(k) for k in range(n - count, n)]
+
+    def resize(self, capacity: int) -> None:
+        """용량 변경 (줄어들면 오래된 항목부터 버림/세그먼트 기록)"""
+        capacity = max(1, capacity)
+        n = len(self.times)
+        keep = min(n, capacity)
+        order = [self._index(k) for k in range(n)]
+        if self.spill_path:
+            for i in order[:n - keep]:
+                self._spill(i)
+        order = order[n - keep:]
+        self.times = array("d", (self.times[i] for i in order))
+        self.user_ids = array("q", (self.user_ids[i] for i in order))
+        self.usernames = [self.usernames[i] for i in order]
+        self.messages = [self.messages[i] for i in order]
+        self.head = 0
+        self.capacity = capacity
+
+    # ── 디스크 세그먼트 ──
+    def _spill(self, i: int) -> None:
+        t = self.times[i]
+        self._spill_span = (t if not self._spill_buf else self._spill_span[0], t)
+        self._spill_buf.append(json.dumps({
+            "time": t, "user_id": self.user_ids[i],
+            "username": self.usernames[i], "message": self.messages[i],
+        }, ensure_ascii=False))
+        if _index_terms is not None and self.messages[i]:
+            self._spill_terms.update(_index_terms(self.messages[i]))
+        if len(self._spill_buf) >= SPILL_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._spill_buf or not self.spill_path:
+            return
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        data = ("\n".join(self._spill_buf) + "\n").encode()
+        with open(self.spill_path, "ab") as f:
+            start = f.seek(0, os.SEEK_END)
+            f.write(data)
+        if _index_terms is not None:
+            bloom = bytearray(SPILL_BLOOM_BYTES)
+            for token in self._spill_terms:
+                for p in bloom_positions(token):
+                    bloom[p >> 3] |= 1 << (p & 7)
+            with open(self.spill_path + SPILL_INDEX_SUFFIX, "ab") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size % _RECORD:   # 중단된 기록의 잘린 레코드
+                    f.truncate(size - size % _RECORD)
+                f.write(_BLOCK.pack(start, len(data), len(self._spill_buf), *self._spill_span) + bloom)
+        self._spill_buf.clear()
+        self._spill_terms.clear()
@@ -0,0 +1,271 @@
+# logsearch.py
+# 그룹 메시지 로그 전문·기간 검색 (/searchlogs)
+#  - 그룹마다 역색인: 토큰 → 메시지 seq(LogRing.total 기준 일련번호) 오름차순 array
+#  - 한글·한자·가나·크메르 문자열은 1글자·2글자 단위(unigram·bigram), 라틴·베트남어는 단어 단위 (+ 성조 제거형)
+#  - 기간 조건은 링 버퍼 시간 열에서 bisect, 2글자 이상 검색어는 원문 부분 문자열로 최종 확인
+#  - 링에서 밀려난 seq는 색인 검색 범위 밖이라 읽히지 않고, 추가량이 용량만큼 쌓이면 한꺼번에 정리
+#  - 링 결과가 한 페이지에 모자라면 더 오래된 기록(SQLite 저장소 / 밀려난 로그 세그먼트)을 최신순으로 이어서 훑음
+#    (다른 워커 담당 그룹은 저장소만, 판정은 색인과 같은 토큰 규칙이라 어느 워커에서 검색해도 결과가 같음)
+#  - 오래된 기록도 같은 토큰으로 색인 (SQLite FTS5 log_terms / 세그먼트 묶음별 bloom filter), 읽기는 작업 스레드에서
+
+import re
+import time
+import asyncio
+import bisect
+import unicodedata
+from array import array
+from itertools import islice
+from datetime import datetime
+import database
+
+_CJK   = "\uac00-\ud7a3\u1100-\u11ff\u3130-\u318f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_KHMER = "\u1780-\u17ff\u19e0-\u19ff"
+_RUN = re.compile(rf"(?P<gram>[{_CJK}]+|[{_KHMER}]+)|(?P<word>[^\W{_CJK}{_KHMER}]+)")
+_RELATIVE = re.compile(r"^(\d+)([mhd])$")
+_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", text).casefold()
+
+
+def _strip_marks(word: str) -> str:
+    """베트남어 성조·발음 기호 제거 (cảm → cam, đi → di)"""
+    decomposed = unicodedata.normalize("NFD", word.replace("đ", "d"))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> set[str]:
+    """색인 토큰 (입력은 normalize된 문자열)"""
+    tokens = set()
+    for m in _RUN.finditer(text):
+        run = m.group()
+        if m.lastgroup == "word":
+            tokens.add(run)
+            if not run.isascii():
+                tokens.add(_strip_marks(run))
+        else:
+            tokens.update(run)
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def _query_parts(term: str) -> tuple[set[str], list[str]]:
+    """검색어 → (색인 토큰, 원문에서 확인할 부분 문자열)"""
+    tokens, checks = set(), []
+    for m in _RUN.finditer(term):
+        run = m.group()
+        if m.lastgroup == "word" or len(run) == 1:
+            tokens.add(run)
+        else:
+            # 2글자 조합은 순서까지 확인해야 함
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+            checks.append(run)
+    return tokens, checks
+
+
+def _matches(message: str | None, tokens: set[str], checks: list[str]) -> bool:
+    """색인을 쓰지 않는 경로(저장소 기록)의 판정, 색인 검색과 같은 규칙"""
+    text = normalize(message or "")
+    return all(c in text for c in checks) and tokens <= tokenize(text)
+
+# ────────────────────────────
+# 그룹별 색인
+# ────────────────────────────
+
+class GroupIndex:
+    __slots__ = ("postings", "since_compact")
+
+    def __init__(self):
+        self.postings: dict[str, array] = {}
+        self.since_compact = 0
+
+    def add(self, seq: int, message: str | None) -> None:
+        if not message:
+            return
+        for token in tokenize(normalize(message)):
+            arr = self.postings.get(token)
+            if arr is None:
+                arr = self.postings[token] = array("q")
+            arr.append(seq)
+        self.since_compact += 1
+
+    def compact(self, oldest: int) -> None:
+        """링에서 밀려난 seq 제거"""
+        for token in list(self.postings):
+            arr = self.postings[token]
+            cut = bisect.bisect_left(arr, oldest)
+            if cut == len(arr):
+                del self.postings[token]
+            elif cut:
+                del arr[:cut]
+        self.since_compact = 0
+
+
+_indexes: dict[int, GroupIndex] = {}
+stats = {"queries": 0, "compactions": 0, "history_scans": 0}
+
+
+def _on_log(group_id: int, seq: int, message: str | None) -> None:
+    index = _indexes.get(group_id)
+    if index is None:
+        index = _indexes[group_id] = GroupIndex()
+    index.add(seq, message)
+    ring = database._group_logs[group_id]
+    if index.since_compact >= max(ring.capacity, 1024):
+        index.compact(ring.total - len(ring))
+        stats["compactions"] += 1
+
+
+def install() -> None:
+    """시작 시 불러온 로그 색인 후 이후 로그를 계속 반영 (database.init_storage 다음에 호출)"""
+    for gid, ring in database._group_logs.items():
+        base = ring.total - len(ring)
+        for k in range(len(ring)):
+            _on_log(gid, base + k, ring.messages[ring._index(k)])
+    database.add_log_listener(_on_log)
+    database.set_log_indexer(_terms)
+
+
+def _terms(message: str) -> set[str]:
+    """저장된 기록 색인 토큰 (링 색인과 같은 규칙)"""
+    return tokenize(normalize(message))
+
+
+def current_seq(group_id: int) -> int:
+    """지금까지 기록된 메시지 수 (검색 결과를 이 시점으로 고정할 때 사용)"""
+    ring = database._group_logs.get(group_id)
+    return ring.total if ring else 0
+
+# ────────────────────────────
+# 검색
+# ────────────────────────────
+
+class _Times:
+    """링 버퍼 시간 열을 논리 순서(오래된 것 → 최신)로 보는 bisect용 뷰"""
+    __slots__ = ("ring",)
+
+    def __init__(self, ring):
+        self.ring = ring
+
+    def __len__(self) -> int:
+        return len(self.ring)
+
+    def __getitem__(self, k: int) -> float:
+        return self.ring.times[self.ring._index(k)]
+
+
+def _has(arr: array, seq: int) -> bool:
+    i = bisect.bisect_left(arr, seq)
+    return i < len(arr) and arr[i] == seq
+
+
+async def search(group_id: int, terms: list[str], since: float | None = None, until: float | None = None,
+           offset: int = 0, limit: int = 10, max_seq: int | None = None) -> tuple[list[dict], bool]:
+    """모든 검색어를 포함하는 메시지 (최신순), (결과, 다음 페이지 여부) 반환"""
+    stats["queries"] += 1
+    tokens, checks = set(), []
+    for term in terms:
+        t, c = _query_parts(normalize(term))
+        tokens |= t
+        checks += c
+    want = offset + limit + 1
+    ring = database._group_logs.get(group_id)
+    if not ring or (database._shared and not database.is_local_chat(group_id)):
+        older = await _older(group_id, tokens, checks, since, until, want)
+        return older[offset:offset + limit], len(older) > offset + limit
+
+    # 기간 → 논리 위치 [lo, hi) → seq 범위 (로그 시간은 추가 순서대로 증가)
+    times = _Times(ring)
+    n = len(ring)
+    oldest = ring.total - n
+    lo = bisect.bisect_left(times, since) if since is not None else 0
+    hi = bisect.bisect_right(times, until) if until is not None else n
+    seq_lo, seq_hi = oldest + lo, oldest + hi
+    if max_seq is not None:
+        seq_hi = min(seq_hi, max_seq)
+
+    index = _indexes.get(group_id)
+    postings = []
+    for token in tokens:
+        arr = index.postings.get(token) if index else None
+        if arr is None:
+            postings = None   # 링에는 없음 → 오래된 기록만
+            break
+        postings.append(arr)
+
+    if postings is None:
+        candidates, rest = iter(()), []
+    elif postings:
+        postings.sort(key=len)
+        # 가장 짧은 목록을 최신순으로 훑고 나머지는 bisect로 포함 여부 확인
+        driver, rest = postings[0], postings[1:]
+        a = bisect.bisect_left(driver, seq_lo)
+        b = bisect.bisect_left(driver, seq_hi)
+        candidates = (driver[i] for i in range(b - 1, a - 1, -1))
+    else:
+        candidates = iter(range(seq_hi - 1, seq_lo - 1, -1))
+        rest = []
+
+    found = []
+    for seq in candidates:
+        if rest and not all(_has(arr, seq) for arr in rest):
+            continue
+        if checks:
+            text = normalize(ring.messages[ring._index(seq - oldest)] or "")
+            if not all(c in text for c in checks):
+                continue
+        found.append(seq)
+        if len(found) >= want:
+            break
+    # 링에서 모자라면 이어서 오래된 기록 (since가 링 안쪽이면 더 오래된 기록은 범위 밖)
+    older = await _older(group_id, tokens, checks, since, until, want - len(found)) if len(found) < want and lo == 0 else []
+    total = len(found) + len(older)
+    page = [ring.record(found[k] - oldest) if k < len(found) else older[k - len(found)]
+            for k in range(offset, min(offset + limit, total))]
+    return page, total > offset + limit
+
+
+async def _older(group_id: int, tokens: set[str], checks: list[str], since, until, count: int) -> list[dict]:
+    """링 밖 기록에서 최신순으로 count개까지 (디스크 읽기는 작업 스레드에서)"""
+    stats["history_scans"] += 1
+    rows = await database.iter_older_logs(group_id, since, until, checks, tokens)
+    return await asyncio.to_thread(_take, rows, tokens, checks, count)
+
+
+def _take(rows, tokens: set[str], checks: list[str], count: int) -> list[dict]:
+    try:
+        return list(islice((e for e in rows if _matches(e["message"], tokens, checks)), count))
+    finally:
+        if hasattr(rows, "close"):
+            rows.close()
+
+
+def parse_time(spec: str, end: bool = False) -> float | None:
+    """30m / 12h / 7d (지금부터 이전), 2024-05-01, 2024-05-01T13:30 → epoch (해석 불가 시 None)"""
+    m = _RELATIVE.match(spec)
+    if m:
+        return time.time() - int(m.group(1)) * _UNITS[m.group(2)]
+    for fmt, span in (("%Y-%m-%dT%H:%M", 60), ("%Y-%m-%d", 86400)):
+        try:
+            ts = datetime.strptime(spec, fmt).timestamp()
+        except ValueError:
+            continue
+        return ts + span - 0.001 if end else ts
+    return None
+
+
+def parse_query(args: list[str]) -> dict | None:
+    """/searchlogs <그룹ID> [from] [to] <검색어...> 인자 해석"""
+    if len(args) < 2 or not args[0].lstrip("-").isdigit():
+        return None
+    query = {"group_id": int(args[0]), "since": None, "until": None}
+    rest = args[1:]
+    if len(rest) > 1 and (since := parse_time(rest[0])) is not None:
+        query["since"] = since
+        rest = rest[1:]
+        if len(rest) > 1 and (until := parse_time(rest[0], end=True)) is not None:
+            query["until"] = until
+            rest = rest[1:]
+    query["terms"] = rest
+    return query
@@ -1,382 +1,736 @@
-# main.py
-
-import os
-import time
-import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import (
-    ApplicationBuilder,
-    CommandHandler,
-    MessageHandler,
-    CallbackQueryHandler,
-    filters,
-    ContextTypes
-)
-from dotenv import load_dotenv
-import database
-from translator import handle_translation
-
-# ───────────────────────────────
-# 환경 변수 및 로깅 설정
-# ───────────────────────────────
-load_dotenv()
-BOT_TOKEN      = os.getenv("BOT_TOKEN")
-OWNER_SECRET   = os.getenv("OWNER_SECRET")
-
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
-
-def init_bot_data(app):
-    app.bot_data.setdefault("inquiry_msg", [
-        "⏳ 기간 연장 문의 하기",
-        "⏳ 请求续期",
-        "⏳ ស្នើរសុំពន្យារពេល",
-        "⏳ Yêu cầu gia hạn"
-    ])
-    app.bot_data.setdefault("code_logs", [])   # 코드 발급·사용·삭제·연장 로그
-
-
-def format_multilang(ko, zh, km, vi) -> str:
-    return (
-        f"[한국어]\n{ko}\n\n"
-        f"[中文]\n{zh}\n\n"
-        f"[ភាសាខ្មែរ]\n{km}\n\n"
-        f"[Tiếng Việt]\n{vi}"
-    )
-
-# ───────────────────────────────
-# 소유자 인증 및 제어 그룹
-# ───────────────────────────────
-OWNER_ID      = None
-CONTROL_GROUP = None
-
-def owner_only(func):
-    async def wrapper(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-        uid = update.effective_user.id
-        gid = update.effective_chat.id
-        if OWNER_ID is None or uid != OWNER_ID:
-            return await update.message.reply_text("❌ 소유자 전용 명령입니다.")
-        if CONTROL_GROUP is not None and gid != CONTROL_GROUP:
-            return await update.message.reply_text("❌ 이 그룹에서만 사용할 수 있습니다.")
-        return await func(update, ctx)
-    return wrapper
-
-# — 인증
-async def auth_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    global OWNER_ID
-    if not ctx.args or ctx.args[0] != OWNER_SECRET:
-        return await update.message.reply_text("❌ 인증에 실패했습니다.")
-    OWNER_ID = update.effective_user.id
-    await update.message.reply_text("✅ 소유자 인증 완료")
-
-# — 제어 그룹 지정
-@owner_only
-async def setcontrol_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    global CONTROL_GROUP
-    prev = CONTROL_GROUP
-    CONTROL_GROUP = update.effective_chat.id
-    if prev and prev != CONTROL_GROUP:
-        try:
-            await ctx.bot.send_message(prev, "❌ 이 그룹은 더 이상 제어 그룹이 아닙니다.")
-        except:
-            pass
-    await update.message.reply_text("✅ 제어 그룹으로 지정되었습니다.")
-
-# — 연장 문의 메시지 설정
-@owner_only
-async def setinquiry_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    text = update.message.text.partition(" ")[2]
-    parts = text.split("|")
-    if len(parts) != 4:
-        return await update.message.reply_text(
-            "❗ 사용법: /setinquiry <한국어>|<中文>|<ភាសាខ្មែរ>|<Tiếng Việt>"
-        )
-    ctx.bot_data["inquiry_msg"] = parts
-    await update.message.reply_text("✅ 연장 문의 메시지 설정 완료")
-
-# — 소유자 도움말
-@owner_only
-async def helpowner_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    text = (
-        "🔐 소유자 전용 명령어\n"
-        "/auth <코드>                        – 소유자 인증\n"
-        "/setcontrolgroup                   – 제어 그룹 지정\n"
-        "/setinquiry <ko>|<zh>|<km>|<vi>   – 연장 문의 메시지 설정\n"
-        "/helpowner                        – 소유자 도움말\n"
-        "/listmaster                       – 연결된 그룹 목록\n"
-        "/listparticipants <그룹ID>         – 그룹 참가자 목록 조회\n"
-        "/forcedisconnect <그룹ID>         – 강제 해제\n"
-        "/generateownercode <코드> <일수>   – 소유자 코드 생성\n"
-        "/deletecode <코드>                – 코드 삭제\n"
-        "/extendissuedcode <코드> <일수>    – 코드 기한 연장\n"
-        "/listcodelogs [코드]              – 코드 로그 조회\n"
-        "/getlogs <그룹ID>                 – 메시지 로그 조회\n"
-    )
-    await update.message.reply_text(text)
-
-# — 그룹 목록
-@owner_only
-async def listmaster_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lines = []
-    for gid, info in database._groups.items():
-        days = int((info["expires"] - time.time()) // 86400)
-        chat = await ctx.bot.get_chat(gid)
-        name = getattr(chat, "title", None) or chat.username or str(gid)
-        lines.append(f"{gid} ({name}): code={info['code']} 남은{days}일")
-    await update.message.reply_text("🗂 연결된 그룹 목록\n" + ("\n".join(lines) if lines else "없음"))
-
-# — 그룹 참가자 목록
-@owner_only
-async def listparticipants_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    if len(ctx.args)!=1 or not ctx.args[0].isdigit():
-        return await update.message.reply_text("❗ 사용법: /listparticipants <그룹ID>")
-    gid = int(ctx.args[0])
-    parts = database.list_group_participants(gid)
-    if not parts:
-        return await update.message.reply_text("❗ 참가자 정보가 없습니다.")
-    lines = [f"{uid} ({uname})" for uid, uname in parts]
-    await update.message.reply_text("👥 참가자 목록\n" + "\n".join(lines))
-
-# — 강제 해제
-@owner_only
-async def forcedisconnect_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    if not ctx.args or not ctx.args[0].isdigit():
-        return await update.message.reply_text("❗ 사용법: /forcedisconnect <그룹ID>")
-    database.disconnect_user(int(ctx.args[0]))
-    await update.message.reply_text("✅ 강제 해제 완료")
-
-# — 소유자 코드 생성
-@owner_only
-async def generateownercode_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    if len(ctx.args) != 2 or not ctx.args[1].isdigit():
-        return await update.message.reply_text("❗ 사용법: /generateownercode <코드> <일수>")
-    code, days = ctx.args[0], int(ctx.args[1])
-    database.issue_owner_code(code, OWNER_ID, days)
-    ctx.bot_data["code_logs"].append({
-        "time": time.time(),
-        "action": "issue_owner",
-        "code": code,
-        "days": days
-    })
-    await update.message.reply_text(f"✅ 소유자 코드 {code}({days}일) 발급 완료")
-
-# — 코드 삭제
-@owner_only
-async def deletecode_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    if len(ctx.args) != 1:
-        return await update.message.reply_text("❗ 사용법: /deletecode <코드>")
-    code = ctx.args[0]
-    if database.delete_code(code):
-        ctx.bot_data["code_logs"].append({
-            "time": time.time(),
-            "action": "delete",
-            "code": code
-        })
-        await update.message.reply_text(f"✅ 코드 {code} 삭제 완료")
-    else:
-        await update.message.reply_text("❗ 해당 코드를 찾을 수 없습니다.")
-
-# — 발급 코드 연장
-@owner_only
-async def extendissuedcode_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    if len(ctx.args) != 2 or not ctx.args[1].isdigit():
-        return await update.message.reply_text("❗ 사용법: /extendissuedcode <코드> <일수>")
-    code, days = ctx.args[0], int(ctx.args[1])
-    if database.extend_code(code, days):
-        ctx.bot_data["code_logs"].append({
-            "time": time.time(),
-            "action": "extend_issue",
-            "code": code,
-            "days": days
-        })
-        await update.message.reply_text(f"✅ 코드 {code} 기한 연장 완료 (+{days}일)")
-    else:
-        await update.message.reply_text("❗ 해당 코드를 찾을 수 없습니다.")
-
-# — 코드 로그 조회
-@owner_only
-async def listcodelogs_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    logs = ctx.bot_data["code_logs"]
-    code_filter = ctx.args[0] if ctx.args else None
-    filtered = [l for l in logs if not code_filter or l["code"] == code_filter]
-    if not filtered:
-        return await update.message.reply_text("❗ 로그 항목이 없습니다.")
-    lines = []
-    for log in filtered[-20:]:
-        ts = time.strftime('%Y-%m-%d %H:%M', time.localtime(log["time"]))
-        lines.append(f"{ts} | {log['action']} | {log['code']} | {log.get('days','')}")
-    await update.message.reply_text("🔖 코드 로그\n" + "\n".join(lines))
-
-# — 메시지 로그 조회
-@owner_only
-async def getlogs_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    if len(ctx.args)!=1 or not ctx.args[0].isdigit():
-        return await update.message.reply_text("❗ 사용법: /getlogs <그룹ID>")
-    gid = int(ctx.args[0])
-    entries = database.get_group_logs(gid, limit=20)
-    if not entries:
-        return await update.message.reply_text("❗ 로그가 없습니다.")
-    lines = []
-    for e in entries:
-        ts = time.strftime('%Y-%m-%d %H:%M', time.localtime(e['time']))
-        lines.append(f"{ts} | {e['user_id']}({e['username']}): {e['message']}")
-    await update.message.reply_text("📝 최근 메시지 로그\n" + "\n".join(lines))
-
-# ───────────────────────────────
-# 사용자용 핸들러
-# ───────────────────────────────
-async def start(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(format_multilang(
-        "✅ 번역봇이 작동 중입니다. /help 입력",
-        "✅ Translation bot is running. Type /help",
-        "✅ បុតនៃការបកប្រែកំពុងដំណើរការ។ វាយ /help",
-        "✅ Bot dịch đang hoạt động. Gõ /help"
-    ))
-
-async def help_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    text = (
-        "[한국어]\n"
-        "/createcode   – 코드 생성 (무료3일)\n"
-        "/registercode – 그룹에 코드 등록\n"
-        "/disconnect   – 연결 해제\n"
-        "/extendcode   – 코드 연장 3일 (1회)\n"
-        "/remaining    – 남은 기간 확인\n"
-        "/paymentcheck – 기간 연장 문의 하기\n\n"
-        "[中文]\n"
-        "/createcode   – 创建代码 (免费3天)\n"
-        "/registercode – 群组注册代码\n"
-        "/disconnect   – 断开连接\n"
-        "/extendcode   – 延长代码3天 (1次)\n"
-        "/remaining    – 查看剩余时间\n"
-        "/paymentcheck – 请求续期\n\n"
-        "[ភាសាខ្មែរ]\n"
-        "/createcode   – បង្កើតកូដ (ឥតគិតថ្លៃ3ថ្ងៃ)\n"
-        "/registercode – ក្រុមចុះបញ្ជីកូដ\n"
-        "/disconnect   – ផ្តាច់ការតភ្ជាប់\n"
-        "/extendcode   – ពន្យារកូដ3ថ្ងៃ (1ដង)\n"
-        "/remaining    – ពិនិត្យរយៈពេលនៅសល់\n"
-        "/paymentcheck – ស្នើរសុំពេញ្តារពេល\n\n"
-        "[Tiếng Việt]\n"
-        "/createcode   – Tạo mã (miễn phí3ngày)\n"
-        "/registercode – Nhóm đăng ký mã\n"
-        "/disconnect   – Ngắt kết nối\n"
-        "/extendcode   – Gia hạn mã3ngày (1 lần)\n"
-        "/remaining    – Kiểm tra thời gian còn lại\n"
-        "/paymentcheck – Yêu cầu gia hạn\n"
-    )
-    kb = [
-        [InlineKeyboardButton("CreateCode",   callback_data="btn_create")],
-        [InlineKeyboardButton("RegisterCode", callback_data="btn_register")],
-        [InlineKeyboardButton("Disconnect",   callback_data="btn_disconnect")],
-        [InlineKeyboardButton("ExtendCode",   callback_data="btn_extend")],
-        [InlineKeyboardButton("Remaining",    callback_data="btn_remaining")],
-        [InlineKeyboardButton("PaymentCheck", callback_data="btn_payment")],
-    ]
-    await update.message.reply_text(text, reply_markup=InlineKeyboardMarkup(kb))
-
-async def button_cb(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    await update.callback_query.answer()
-    cmd = update.callback_query.data.split("_")[1]
-    fake = Update(update.update_id,
-                  message=update.callback_query.message,
-                  callback_query=update.callback_query)
-    mapping = {
-        "create":    createcode,
-        "register":  registercode,
-        "disconnect":disconnect,
-        "extend":    extendcode,
-        "remaining": remaining,
-        "payment":   paymentcheck
-    }
-    if cmd in mapping:
-        return await mapping[cmd](fake, ctx)
-
-async def createcode(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    uid   = update.effective_user.id
-    uname = update.effective_user.username or update.effective_user.full_name
-    code  = database.register_code(uid, duration_days=3, max_free=1)
-    if not code:
-        return await update.message.reply_text("⚠️ 무료 코드 발급 한도(1회) 초과")
-    ctx.bot_data["code_logs"].append({
-        "time": time.time(), "action": "issue_user",
-        "code": code, "owner_id": uid, "user_id": uid, "days": 3
-    })
-    await update.message.reply_text(f"✅ 코드 생성: {code} (3일간 유효)")
-
-async def registercode(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    args = ctx.args; gid = update.effective_chat.id
-    if not args:
-        return await update.message.reply_text("/registercode [code]")
-    code = args[0]
-    if not database.register_group_to_code(code, gid):
-        return await update.message.reply_text("❌ 코드 유효하지 않거나 그룹 초과")
-    rem = database.group_remaining_seconds(gid) // 86400
-    uname = update.effective_user.username or update.effective_user.full_name
-    ctx.bot_data["code_logs"].append({
-        "time": time.time(), "action": "use",
-        "code": code, "user_id": update.effective_user.id,
-        "group_id": gid
-    })
-    database.log_group_message(gid, update.effective_user.id, uname, f"/registercode {code}")
-    await update.message.reply_text(f"✅ 등록 완료: {code} (남은 {rem}일)")
-
-async def disconnect(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    database.disconnect_user(update.effective_chat.id)
-    await update.message.reply_text("🔌 연결이 해제되었습니다.")
-
-async def extendcode(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    if database.extend_group(update.effective_chat.id, duration_days=3, max_extends=1):
-        rem = database.group_remaining_seconds(update.effective_chat.id) // 86400
-        await update.message.reply_text(f"🔁 코드 연장 완료. 남은 {rem}일")
-    else:
-        await update.message.reply_text("⚠️ 연장 한도(1회) 초과")
-
-async def remaining(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    sec = database.group_remaining_seconds(update.effective_chat.id)
-    if sec <= 0:
-        return await update.message.reply_text("❗ 등록된 코드가 없습니다.")
-    d = sec // 86400; h = (sec % 86400)//3600; m = (sec %3600)//60
-    await update.message.reply_text(f"⏳ 남은: {d}일 {h}시간 {m}분")
-
-async def paymentcheck(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    ko, zh, km, vi = ctx.bot_data["inquiry_msg"]
-    await update.message.reply_text(format_multilang(ko, zh, km, vi))
-
-async def message_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    gid = update.effective_chat.id
-    uname = update.effective_user.username or update.effective_user.full_name
-    database.log_group_message(gid, update.effective_user.id, uname, update.message.text)
-    if database.is_group_active(gid):
-        await handle_translation(update, ctx)
-
-if __name__ == "__main__":
-    logging.info("✅ 번역봇 시작")
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
-    init_bot_data(app)
-
-    # — 소유자용 핸들러
-    app.add_handler(CommandHandler("auth",             auth_cmd))
-    app.add_handler(CommandHandler("setcontrolgroup",  setcontrol_cmd))
-    app.add_handler(CommandHandler("setinquiry",       setinquiry_cmd))
-    app.add_handler(CommandHandler("helpowner",        helpowner_cmd))
-    app.add_handler(CommandHandler("listmaster",       listmaster_cmd))
-    app.add_handler(CommandHandler("listparticipants", listparticipants_cmd))
-    app.add_handler(CommandHandler("forcedisconnect",  forcedisconnect_cmd))
-    app.add_handler(CommandHandler("generateownercode",generateownercode_cmd))
-    app.add_handler(CommandHandler("deletecode",       deletecode_cmd))
-    app.add_handler(CommandHandler("extendissuedcode", extendissuedcode_cmd))
-    app.add_handler(CommandHandler("listcodelogs",     listcodelogs_cmd))
-    app.add_handler(CommandHandler("getlogs",          getlogs_cmd))
-
-    # — 사용자용 핸들러
-    app.add_handler(CommandHandler("start",       start))
-    app.add_handler(CommandHandler("help",        help_cmd))
-    app.add_handler(CallbackQueryHandler(button_cb))
-    app.add_handler(CommandHandler("createcode",   createcode))
-    app.add_handler(CommandHandler("registercode", registercode))
-    app.add_handler(CommandHandler("disconnect",   disconnect))
-    app.add_handler(CommandHandler("extendcode",   extendcode))
-    app.add_handler(CommandHandler("remaining",    remaining))
-    app.add_handler(CommandHandler("paymentcheck", paymentcheck))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler))
-
-    app.run_polling(drop_pending_updates=True)
+# main.py
+
+import os
+import time
+import asyncio
+import logging
+from itertools import islice
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import (
+    ApplicationBuilder,
+    CommandHandler,
+    MessageHandler,
+    CallbackQueryHandler,
+    filters,
+    ContextTypes
+)
+from dotenv import load_dotenv
+import database
+import expiry
+import payment
+import coalescer
+import translator
+import outbox
+import logger
+import metrics
+import profiler
+import chatcache
+import http_client
+import logsearch
+import auditlog
+import export
+import persistence
+from updates import ChatOrderedApplication
+
+# ───────────────────────────────
+# 환경 변수 및 로깅 설정
+# ───────────────────────────────
+load_dotenv()
+BOT_TOKEN      = os.getenv("BOT_TOKEN")
+OWNER_SECRET   = os.getenv("OWNER_SECRET")
+LISTMASTER_PAGE_SIZE = int(os.getenv("LISTMASTER_PAGE_SIZE", "30"))
+SEARCHLOGS_PAGE_SIZE = int(os.getenv("SEARCHLOGS_PAGE_SIZE", "10"))
+CODELOG_PAGE_SIZE    = int(os.getenv("CODELOG_PAGE_SIZE", "20"))
+SEARCHLOGS_SNIPPET   = 300   # 검색 결과 메시지 표시 길이
+
+# 업데이트 수신 방식 (polling | webhook) 및 동시 처리
+BOT_MODE             = os.getenv("BOT_MODE", "polling")
+BOT_API_BASE_URL     = os.getenv("BOT_API_BASE_URL")             # 예: 로컬 Bot API 서버 http://127.0.0.1:8081/bot
+UPDATE_CONCURRENCY   = int(os.getenv("UPDATE_CONCURRENCY", "32"))
+DROP_PENDING_UPDATES = os.getenv("DROP_PENDING_UPDATES", "0") == "1"
+WEBHOOK_URL          = os.getenv("WEBHOOK_URL")                  # 텔레그램에 등록할 공개 URL
+WEBHOOK_LISTEN       = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT         = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH         = os.getenv("WEBHOOK_PATH", "")
+WEBHOOK_SECRET       = os.getenv("WEBHOOK_SECRET")
+WORKERS              = int(os.getenv("WORKERS", "1"))            # 2 이상이면 chat_id 기준으로 나눈 워커 프로세스 실행 (workers.py)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logging.getLogger("apscheduler").setLevel(logging.WARNING)   # 짧은 주기 작업(db_sync 등) 실행 로그 생략
+
+def init_bot_data(app):
+    app.bot_data.setdefault("inquiry_msg", [
+        "⏳ 기간 연장 문의 하기",
+        "⏳ 请求续期",
+        "⏳ ស្នើរសុំពន្យារពេល",
+        "⏳ Yêu cầu gia hạn"
+    ])
+
+
+def format_multilang(ko, zh, km, vi) -> str:
+    return (
+        f"[한국어]\n{ko}\n\n"
+        f"[中文]\n{zh}\n\n"
+        f"[ភាសាខ្មែរ]\n{km}\n\n"
+        f"[Tiếng Việt]\n{vi}"
+    )
+
+# ───────────────────────────────
+# 소유자 인증 및 제어 그룹 (database 전역 설정에 저장, 모든 워커가 공유)
+# ───────────────────────────────
+def owner_only(func):
+    async def wrapper(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+        uid = update.effective_user.id
+        gid = update.effective_chat.id
+        control_group = database.get_control_group()
+        if not database.is_owner(uid):
+            return await outbox.reply(update.message, "❌ 소유자 전용 명령입니다.")
+        if control_group is not None and gid != control_group:
+            return await outbox.reply(update.message, "❌ 이 그룹에서만 사용할 수 있습니다.")
+        # 소유자 명령 응답은 발신 큐에서 우선 처리
+        token = outbox.priority_var.set(outbox.HIGH)
+        try:
+            return await func(update, ctx)
+        finally:
+            outbox.priority_var.reset(token)
+    return wrapper
+
+# — 인증
+async def auth_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if not ctx.args or ctx.args[0] != OWNER_SECRET:
+        return await outbox.reply(update.message, "❌ 인증에 실패했습니다.")
+    database.set_owner(update.effective_user.id)
+    await outbox.reply(update.message, "✅ 소유자 인증 완료")
+
+# — 제어 그룹 지정
+@owner_only
+async def setcontrol_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    prev = database.get_control_group()
+    database.set_control_group(update.effective_chat.id)
+    if prev and prev != update.effective_chat.id:
+        try:
+            await outbox.send(ctx.bot, prev, "❌ 이 그룹은 더 이상 제어 그룹이 아닙니다.")
+        except:
+            pass
+    await outbox.reply(update.message, "✅ 제어 그룹으로 지정되었습니다.")
+
+# — 사용자 메시지 로그 그룹 지정 (로그 그룹 안에서 실행해야 하므로 제어 그룹 제한 없이 소유자만 확인)
+async def setuserlog_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if not database.is_owner(update.effective_user.id):
+        return await outbox.reply(update.message, "❌ 소유자 전용 명령입니다.", outbox.HIGH)
+    database.set_user_log_group(update.effective_chat.id)
+    await outbox.reply(update.message, "✅ 사용자 메시지 로그 그룹으로 지정되었습니다.", outbox.HIGH)
+
+# — 연장 문의 메시지 설정
+@owner_only
+async def setinquiry_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    text = update.message.text.partition(" ")[2]
+    parts = text.split("|")
+    if len(parts) != 4:
+        return await outbox.reply(update.message, 
+            "❗ 사용법: /setinquiry <한국어>|<中文>|<ភាសាខ្មែរ>|<Tiếng Việt>"
+        )
+    database.set_setting("inquiry_msg", parts)
+    await outbox.reply(update.message, "✅ 연장 문의 메시지 설정 완료")
+
+# — 소유자 도움말
+@owner_only
+async def helpowner_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    text = (
+        "🔐 소유자 전용 명령어\n"
+        "/auth <코드>                        – 소유자 인증\n"
+        "/setcontrolgroup                   – 제어 그룹 지정\n"
+        "/setuserloggroup                   – 이 그룹을 사용자 메시지 로그 그룹으로 지정 (해당 그룹에서 실행)\n"
+        "/setinquiry <ko>|<zh>|<km>|<vi>   – 연장 문의 메시지 설정\n"
+        "/helpowner                        – 소유자 도움말\n"
+        "/listmaster                       – 연결된 그룹 목록\n"
+        "/listparticipants <그룹ID>         – 그룹 참가자 목록 조회\n"
+        "/forcedisconnect <그룹ID>         – 강제 해제\n"
+        "/generateownercode <코드> <일수>   – 소유자 코드 생성\n"
+        "/deletecode <코드>                – 코드 삭제\n"
+        "/extendissuedcode <코드> <일수>    – 코드 기한 연장\n"
+        "/listcodelogs [코드|user:ID|group:ID] [from] [to] – 코드 로그 조회\n"
+        "/getlogs <그룹ID>                 – 메시지 로그 조회\n"
+        "/searchlogs <그룹ID> [from] [to] <검색어> – 메시지 로그 검색 (기간: 2024-05-01, 2024-05-01T13:30, 12h, 7d)\n"
+        "/exportlogs <그룹ID> [from] [to] [jsonl|csv] – 메시지 로그 파일 내보내기 (gzip)\n"
+        "/exportcodelogs [코드|user:ID|group:ID] [from] [to] [jsonl|csv] – 코드 로그 파일 내보내기\n"
+        "/setlogcapacity <그룹ID> <개수>    – 그룹 로그 보관 개수 설정\n"
+        "/setcoalesce <그룹ID> <초>         – 연속 메시지 묶음 번역 시간 (0=끄기)\n"
+        "/grouplangs <그룹ID> [auto|ko,vi]  – 그룹 번역 언어 조회·고정\n"
+        "/stats                            – 처리 시간·API 호출·캐시 통계\n"
+        "/profile [초]                      – 이벤트 루프 샘플링 프로파일 (collapsed stack 파일)\n"
+        "/memsnapshot [초]                  – 모듈별 메모리 할당 상위 (tracemalloc)\n"
+    )
+    await outbox.reply(update.message, text)
+
+# — 그룹 목록 (페이지 단위, 이전/다음 버튼은 button_cb에서 처리)
+async def render_listmaster(bot, page: int) -> tuple[str, InlineKeyboardMarkup | None]:
+    total = len(database._groups)
+    pages = max(1, -(-total // LISTMASTER_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    start = page * LISTMASTER_PAGE_SIZE
+    rows = list(islice(database._groups.items(), start, start + LISTMASTER_PAGE_SIZE))
+    titles = await chatcache.get_titles(bot, [gid for gid, _ in rows])
+    now = time.time()
+    lines = []
+    for gid, info in rows:
+        days = int((info["expires"] - now) // 86400)
+        lines.append(f"{gid} ({titles[gid]}): code={info['code']} 남은{days}일")
+    text = f"🗂 연결된 그룹 목록 ({page + 1}/{pages}, 총 {total})\n" + ("\n".join(lines) if lines else "없음")
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀ 이전", callback_data=f"lm_{page - 1}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("다음 ▶", callback_data=f"lm_{page + 1}"))
+    return text, (InlineKeyboardMarkup([nav]) if nav else None)
+
+@owner_only
+async def listmaster_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    text, markup = await render_listmaster(ctx.bot, 0)
+    await outbox.reply(update.message, text, reply_markup=markup)
+
+async def listmaster_page_cb(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    if not database.is_owner(update.effective_user.id):
+        return
+    text, markup = await render_listmaster(ctx.bot, int(query.data.split("_")[1]))
+    await outbox.submit(query.message.chat_id,
+                        lambda: query.edit_message_text(text, reply_markup=markup), outbox.HIGH)
+
+# — 그룹 참가자 목록
+@owner_only
+async def listparticipants_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if len(ctx.args)!=1 or not ctx.args[0].isdigit():
+        return await outbox.reply(update.message, "❗ 사용법: /listparticipants <그룹ID>")
+    gid = int(ctx.args[0])
+    parts = database.list_group_participants(gid)
+    if not parts:
+        return await outbox.reply(update.message, "❗ 참가자 정보가 없습니다.")
+    lines = [f"{uid} ({uname})" for uid, uname in parts]
+    await outbox.reply(update.message, "👥 참가자 목록\n" + "\n".join(lines))
+
+# — 강제 해제
+@owner_only
+async def forcedisconnect_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if not ctx.args or not ctx.args[0].isdigit():
+        return await outbox.reply(update.message, "❗ 사용법: /forcedisconnect <그룹ID>")
+    await database.disconnect_user(int(ctx.args[0]))
+    await outbox.reply(update.message, "✅ 강제 해제 완료")
+
+# — 소유자 코드 생성
+@owner_only
+async def generateownercode_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if len(ctx.args) != 2 or not ctx.args[1].isdigit():
+        return await outbox.reply(update.message, "❗ 사용법: /generateownercode <코드> <일수>")
+    code, days = ctx.args[0], int(ctx.args[1])
+    database.issue_owner_code(code, database.get_owner(), days)
+    auditlog.record(auditlog.ISSUE_OWNER, code, user_id=database.get_owner(), days=days)
+    await outbox.reply(update.message, f"✅ 소유자 코드 {code}({days}일) 발급 완료")
+
+# — 코드 삭제
+@owner_only
+async def deletecode_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if len(ctx.args) != 1:
+        return await outbox.reply(update.message, "❗ 사용법: /deletecode <코드>")
+    code = ctx.args[0]
+    if await database.delete_code(code):
+        auditlog.record(auditlog.DELETE, code, user_id=update.effective_user.id)
+        await outbox.reply(update.message, f"✅ 코드 {code} 삭제 완료")
+    else:
+        await outbox.reply(update.message, "❗ 해당 코드를 찾을 수 없습니다.")
+
+# — 발급 코드 연장
+@owner_only
+async def extendissuedcode_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if len(ctx.args) != 2 or not ctx.args[1].isdigit():
+        return await outbox.reply(update.message, "❗ 사용법: /extendissuedcode <코드> <일수>")
+    code, days = ctx.args[0], int(ctx.args[1])
+    if await database.extend_code(code, days):
+        auditlog.record(auditlog.EXTEND_ISSUE, code, user_id=update.effective_user.id, days=days)
+        await outbox.reply(update.message, f"✅ 코드 {code} 기한 연장 완료 (+{days}일)")
+    else:
+        await outbox.reply(update.message, "❗ 해당 코드를 찾을 수 없습니다.")
+
+# — 코드 로그 조회
+@owner_only
+async def listcodelogs_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    conditions = parse_codelog_query(ctx.args)
+    if conditions is None:
+        return await outbox.reply(update.message, "❗ 사용법: /listcodelogs [코드 | user:<ID> | group:<ID>] [from] [to]")
+    found = auditlog.query(**conditions, limit=CODELOG_PAGE_SIZE)
+    if not found:
+        return await outbox.reply(update.message, "❗ 로그 항목이 없습니다.")
+    lines = []
+    for e in reversed(found):
+        ts = time.strftime('%Y-%m-%d %H:%M', time.localtime(e.time))
+        line = f"{ts} | {e.action} | {e.code} | {e.days or ''}"
+        if e.user_id is not None:
+            line += f" | user {e.user_id}"
+        if e.group_id is not None:
+            line += f" | group {e.group_id}"
+        lines.append(line)
+    await outbox.reply(update.message, "🔖 코드 로그\n" + "\n".join(lines))
+
+def parse_codelog_query(args: list[str]) -> dict | None:
+    """/listcodelogs 인자 → auditlog.query 조건 (해석 불가 시 None)"""
+    conditions = {}
+    rest = list(args)
+    if rest and logsearch.parse_time(rest[0]) is None:
+        key = rest.pop(0)
+        kind, _, value = key.partition(":")
+        if kind in ("user", "group") and value.lstrip("-").isdigit():
+            conditions[f"{kind}_id"] = int(value)
+        else:
+            conditions["code"] = key
+    if rest:
+        conditions["since"] = logsearch.parse_time(rest.pop(0))
+        if conditions["since"] is None:
+            return None
+    if rest:
+        conditions["until"] = logsearch.parse_time(rest.pop(0), end=True)
+        if conditions["until"] is None or rest:
+            return None
+    return conditions
+
+# — 메시지 로그 조회
+@owner_only
+async def getlogs_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if len(ctx.args)!=1 or not ctx.args[0].isdigit():
+        return await outbox.reply(update.message, "❗ 사용법: /getlogs <그룹ID>")
+    gid = int(ctx.args[0])
+    entries = database.get_group_logs(gid, limit=20)
+    if not entries:
+        return await outbox.reply(update.message, "❗ 로그가 없습니다.")
+    lines = []
+    for e in entries:
+        ts = time.strftime('%Y-%m-%d %H:%M', time.localtime(e['time']))
+        lines.append(f"{ts} | {e['user_id']}({e['username']}): {e['message']}")
+    await outbox.reply(update.message, "📝 최근 메시지 로그\n" + "\n".join(lines))
+
+# — 메시지 로그 검색 (페이지 이동은 button_cb에서 처리, 검색 조건은 chat_data에 보관)
+async def render_searchlogs(query: dict, page: int) -> tuple[str, InlineKeyboardMarkup | None]:
+    started = time.perf_counter()
+    entries, more = await logsearch.search(
+        query["group_id"], query["terms"], query["since"], query["until"],
+        offset=page * SEARCHLOGS_PAGE_SIZE, limit=SEARCHLOGS_PAGE_SIZE, max_seq=query["max_seq"],
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    lines = []
+    for e in entries:
+        ts = time.strftime('%Y-%m-%d %H:%M', time.localtime(e['time']))
+        lines.append(f"{ts} | {e['user_id']}({e['username']}): {(e['message'] or '')[:SEARCHLOGS_SNIPPET]}")
+    text = (f"🔎 로그 검색: {' '.join(query['terms'])} (그룹 {query['group_id']}, {page + 1}페이지, {elapsed:.1f}ms)\n"
+            + ("\n".join(lines) if lines else "결과 없음"))
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀ 이전", callback_data=f"sl_{page - 1}"))
+    if more:
+        nav.append(InlineKeyboardButton("다음 ▶", callback_data=f"sl_{page + 1}"))
+    return text, (InlineKeyboardMarkup([nav]) if nav else None)
+
+@owner_only
+async def searchlogs_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    query = logsearch.parse_query(ctx.args)
+    if not query or not query["terms"]:
+        return await outbox.reply(update.message,
+            "❗ 사용법: /searchlogs <그룹ID> [from] [to] <검색어>\n"
+            "   기간 예: 2024-05-01, 2024-05-01T13:30, 12h, 7d")
+    # 다음 페이지를 넘겨도 결과가 밀리지 않도록 검색 시점의 마지막 메시지로 고정
+    query["max_seq"] = logsearch.current_seq(query["group_id"])
+    ctx.chat_data["searchlogs"] = query
+    text, markup = await render_searchlogs(query, 0)
+    await outbox.reply(update.message, text, reply_markup=markup)
+
+async def searchlogs_page_cb(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    if not database.is_owner(update.effective_user.id):
+        return
+    search = ctx.chat_data.get("searchlogs")
+    if not search:
+        text, markup = "❗ 검색 결과가 만료되었습니다. 다시 검색해주세요.", None
+    else:
+        text, markup = await render_searchlogs(search, int(query.data.split("_")[1]))
+    await outbox.submit(query.message.chat_id,
+                        lambda: query.edit_message_text(text, reply_markup=markup), outbox.HIGH)
+
+# — 로그 내보내기 (gzip 파일 전송, 파일 생성은 작업 스레드에서)
+async def send_export(message, name: str, lines, header: str | None, label: str):
+    stats = None
+    try:
+        async with export.slots():
+            stats = await asyncio.to_thread(export.write_parts, lines, name, header)
+        if not stats["lines"]:
+            return await outbox.reply(message, "❗ 내보낼 항목이 없습니다.")
+        parts = len(stats["paths"])
+        for n, path in enumerate(stats["paths"], 1):
+            filename = name.replace(".", f"-part{n}.", 1) if parts > 1 else name
+            await outbox.reply_document(message, path, filename + ".gz", write_timeout=export.EXPORT_UPLOAD_TIMEOUT)
+        await outbox.reply(message, f"📦 {label} 내보내기 완료 ({parts}개 파일)\n{export.summary(stats)}")
+    except Exception:
+        logging.exception("내보내기 실패: %s", name)
+        await outbox.reply(message, f"❌ {label} 내보내기 실패")
+    finally:
+        if stats:
+            export.cleanup(stats["paths"])
+
+@owner_only
+async def exportlogs_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    args, fmt = export.split_format(ctx.args)
+    usage = "❗ 사용법: /exportlogs <그룹ID> [from] [to] [jsonl|csv]"
+    if not 1 <= len(args) <= 3 or not args[0].lstrip("-").isdigit():
+        return await outbox.reply(update.message, usage)
+    gid = int(args[0])
+    since = logsearch.parse_time(args[1]) if len(args) > 1 else None
+    until = logsearch.parse_time(args[2], end=True) if len(args) > 2 else None
+    if (len(args) > 1 and since is None) or (len(args) > 2 and until is None):
+        return await outbox.reply(update.message, usage)
+    lines, header = await export.group_logs(gid, since, until, fmt)
+    await outbox.reply(update.message, f"⏳ 그룹 {gid} 로그 내보내는 중…")
+    ctx.application.create_task(
+        send_export(update.message, f"logs_{gid}.{fmt}", lines, header, f"그룹 {gid} 로그"))
+
+@owner_only
+async def exportcodelogs_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    args, fmt = export.split_format(ctx.args)
+    conditions = parse_codelog_query(args)
+    if conditions is None:
+        return await outbox.reply(update.message,
+                                  "❗ 사용법: /exportcodelogs [코드 | user:<ID> | group:<ID>] [from] [to] [jsonl|csv]")
+    lines, header = export.code_logs(fmt, **conditions)
+    await outbox.reply(update.message, "⏳ 코드 로그 내보내는 중…")
+    ctx.application.create_task(send_export(update.message, f"codelogs.{fmt}", lines, header, "코드 로그"))
+
+# — 그룹 로그 보관 개수 설정
+@owner_only
+async def setlogcapacity_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if len(ctx.args) != 2 or not ctx.args[0].lstrip("-").isdigit() or not ctx.args[1].isdigit():
+        return await outbox.reply(update.message, "❗ 사용법: /setlogcapacity <그룹ID> <개수>")
+    gid, capacity = int(ctx.args[0]), int(ctx.args[1])
+    database.set_group_log_capacity(gid, capacity)
+    await outbox.reply(update.message, f"✅ 그룹 {gid} 로그 보관 개수: {capacity}")
+
+# — 연속 메시지 묶음 번역 시간 설정
+@owner_only
+async def setcoalesce_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    try:
+        gid, seconds = int(ctx.args[0]), float(ctx.args[1])
+    except (IndexError, ValueError):
+        return await outbox.reply(update.message, "❗ 사용법: /setcoalesce <그룹ID> <초>")
+    coalescer.set_window(gid, max(0.0, seconds))
+    await outbox.reply(update.message, f"✅ 그룹 {gid} 묶음 번역 시간: {seconds}초")
+
+# — 처리 시간·외부 API·캐시·자료 크기 통계
+@owner_only
+async def stats_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    await outbox.reply(update.message, metrics.report())
+
+# — 샘플링 프로파일·메모리 스냅샷 (수집은 백그라운드, 끝나면 결과 전송)
+def parse_seconds(args: list[str], default: float) -> float | None:
+    try:
+        seconds = float(args[0]) if args else default
+    except ValueError:
+        return None
+    return seconds if 0 < seconds <= profiler.PROFILE_MAX_SECONDS else None
+
+async def send_profile(message, bot, seconds: float):
+    try:
+        sampler = await profiler.profile(seconds)
+        if sampler.samples:
+            await outbox.send_document(bot, message.chat_id, sampler.collapsed(),
+                                       f"profile-{time.strftime('%Y%m%d-%H%M%S')}.collapsed.txt")
+        await outbox.reply(message, sampler.summary())
+    except Exception:
+        logging.exception("프로파일 실패")
+        await outbox.reply(message, "❌ 프로파일 실패")
+
+async def send_memsnapshot(message, seconds: float):
+    try:
+        await outbox.reply(message, await profiler.memsnapshot(seconds))
+    except Exception:
+        logging.exception("메모리 스냅샷 실패")
+        await outbox.reply(message, "❌ 메모리 스냅샷 실패")
+
+@owner_only
+async def profile_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    seconds = parse_seconds(ctx.args, 30.0)
+    if seconds is None:
+        return await outbox.reply(update.message, f"❗ 사용법: /profile [초] (최대 {profiler.PROFILE_MAX_SECONDS:g})")
+    if profiler.profile_lock.locked():
+        return await outbox.reply(update.message, "❗ 이미 프로파일 중입니다.")
+    await outbox.reply(update.message, f"⏳ {seconds:g}초 동안 프로파일 중…")
+    profiler.spawn(send_profile(update.message, ctx.bot, seconds))
+
+@owner_only
+async def memsnapshot_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    seconds = parse_seconds(ctx.args, profiler.MEMSNAPSHOT_SECONDS)
+    if seconds is None:
+        return await outbox.reply(update.message, f"❗ 사용법: /memsnapshot [초] (최대 {profiler.PROFILE_MAX_SECONDS:g})")
+    if profiler.memsnapshot_lock.locked():
+        return await outbox.reply(update.message, "❗ 이미 메모리 스냅샷을 만드는 중입니다.")
+    if not profiler.tracing():
+        await outbox.reply(update.message, f"⏳ {seconds:g}초 동안 메모리 할당 추적 중…")
+    profiler.spawn(send_memsnapshot(update.message, seconds))
+
+# — 그룹 번역 대상 언어 (학습된 구성 조회 / 고정 / auto=해제)
+@owner_only
+async def grouplangs_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    usage = "❗ 사용법: /grouplangs <그룹ID> [auto | ko,vi...]"
+    if not ctx.args or not ctx.args[0].lstrip("-").isdigit():
+        return await outbox.reply(update.message, usage)
+    gid = int(ctx.args[0])
+    if len(ctx.args) > 1:
+        arg = ",".join(ctx.args[1:]).lower()
+        if arg == "auto":
+            database.set_group_language_override(gid, None)
+        else:
+            langs = [lang for lang in arg.split(",") if lang]
+            unknown = [lang for lang in langs if lang not in translator.TARGETS]
+            if not langs or unknown:
+                return await outbox.reply(
+                    update.message, f"{usage}\n지원 언어: {', '.join(translator.TARGETS)}")
+            database.set_group_language_override(gid, langs)
+    profile = database.group_languages(gid)
+    override = database.get_group_language_override(gid)
+    lines = [
+        f"🌐 그룹 {gid} 번역 언어",
+        "학습된 구성: " + (", ".join(f"{lang} {n}명" for lang, n in sorted(profile.items(), key=lambda kv: -kv[1]))
+                     or "없음"),
+        "고정 설정: " + (", ".join(override) if override else "없음 (자동)"),
+        "번역 대상: " + ", ".join(translator.target_languages(gid)),
+        f"생략한 번역 호출: {translator.saved_calls.get(gid, 0)}회 (이 워커, 시작 이후)",
+    ]
+    await outbox.reply(update.message, "\n".join(lines))
+
+# ───────────────────────────────
+# 사용자용 핸들러
+# ───────────────────────────────
+async def start(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    await outbox.reply(update.message, format_multilang(
+        "✅ 번역봇이 작동 중입니다. /help 입력",
+        "✅ Translation bot is running. Type /help",
+        "✅ បុតនៃការបកប្រែកំពុងដំណើរការ។ វាយ /help",
+        "✅ Bot dịch đang hoạt động. Gõ /help"
+    ))
+
+async def help_cmd(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    text = (
+        "[한국어]\n"
+        "/createcode   – 코드 생성 (무료3일)\n"
+        "/registercode – 그룹에 코드 등록\n"
+        "/disconnect   – 연결 해제\n"
+        "/extendcode   – 코드 연장 3일 (1회)\n"
+        "/remaining    – 남은 기간 확인\n"
+        "/paymentcheck – 기간 연장 문의 하기\n"
+        "/confirmpayment [TX] [코드] – USDT 결제 확인\n\n"
+        "[中文]\n"
+        "/createcode   – 创建代码 (免费3天)\n"
+        "/registercode – 群组注册代码\n"
+        "/disconnect   – 断开连接\n"
+        "/extendcode   – 延长代码3天 (1次)\n"
+        "/remaining    – 查看剩余时间\n"
+        "/paymentcheck – 请求续期\n"
+        "/confirmpayment [TX] [代码] – 确认USDT付款\n\n"
+        "[ភាសាខ្មែរ]\n"
+        "/createcode   – បង្កើតកូដ (ឥតគិតថ្លៃ3ថ្ងៃ)\n"
+        "/registercode – ក្រុមចុះបញ្ជីកូដ\n"
+        "/disconnect   – ផ្តាច់ការតភ្ជាប់\n"
+        "/extendcode   – ពន្យារកូដ3ថ្ងៃ (1ដង)\n"
+        "/remaining    – ពិនិត្យរយៈពេលនៅសល់\n"
+        "/paymentcheck – ស្នើរសុំពេញ្តារពេល\n"
+        "/confirmpayment [TX] [កូដ] – បញ្ជាក់ការទូទាត់ USDT\n\n"
+        "[Tiếng Việt]\n"
+        "/createcode   – Tạo mã (miễn phí3ngày)\n"
+        "/registercode – Nhóm đăng ký mã\n"
+        "/disconnect   – Ngắt kết nối\n"
+        "/extendcode   – Gia hạn mã3ngày (1 lần)\n"
+        "/remaining    – Kiểm tra thời gian còn lại\n"
+        "/paymentcheck – Yêu cầu gia hạn\n"
+        "/confirmpayment [TX] [mã] – Xác nhận thanh toán USDT\n"
+    )
+    kb = [
+        [InlineKeyboardButton("CreateCode",   callback_data="btn_create")],
+        [InlineKeyboardButton("RegisterCode", callback_data="btn_register")],
+        [InlineKeyboardButton("Disconnect",   callback_data="btn_disconnect")],
+        [InlineKeyboardButton("ExtendCode",   callback_data="btn_extend")],
+        [InlineKeyboardButton("Remaining",    callback_data="btn_remaining")],
+        [InlineKeyboardButton("PaymentCheck", callback_data="btn_payment")],
+    ]
+    await outbox.reply(update.message, text, reply_markup=InlineKeyboardMarkup(kb))
+
+async def button_cb(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    await update.callback_query.answer()
+    if update.callback_query.data.startswith("lm_"):
+        return await listmaster_page_cb(update, ctx)
+    if update.callback_query.data.startswith("sl_"):
+        return await searchlogs_page_cb(update, ctx)
+    cmd = update.callback_query.data.split("_")[1]
+    fake = Update(update.update_id,
+                  message=update.callback_query.message,
+                  callback_query=update.callback_query)
+    mapping = {
+        "create":    createcode,
+        "register":  registercode,
+        "disconnect":disconnect,
+        "extend":    extendcode,
+        "remaining": remaining,
+        "payment":   paymentcheck
+    }
+    if cmd in mapping:
+        return await mapping[cmd](fake, ctx)
+
+async def createcode(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    uid   = update.effective_user.id
+    uname = update.effective_user.username or update.effective_user.full_name
+    code  = await database.register_code(uid, duration_days=3, max_free=1)
+    if not code:
+        return await outbox.reply(update.message, "⚠️ 무료 코드 발급 한도(1회) 초과")
+    auditlog.record(auditlog.ISSUE_USER, code, user_id=uid, days=3)
+    await outbox.reply(update.message, f"✅ 코드 생성: {code} (3일간 유효)")
+
+async def registercode(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    args = ctx.args; gid = update.effective_chat.id
+    if not args:
+        return await outbox.reply(update.message, "/registercode [code]")
+    code = args[0]
+    if not await database.register_group_to_code(code, gid):
+        return await outbox.reply(update.message, "❌ 코드 유효하지 않거나 그룹 초과")
+    rem = database.group_remaining_seconds(gid) // 86400
+    uname = update.effective_user.username or update.effective_user.full_name
+    auditlog.record(auditlog.USE, code, user_id=update.effective_user.id, group_id=gid)
+    database.log_group_message(gid, update.effective_user.id, uname, f"/registercode {code}")
+    await outbox.reply(update.message, f"✅ 등록 완료: {code} (남은 {rem}일)")
+
+async def disconnect(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    await database.disconnect_user(update.effective_chat.id)
+    await outbox.reply(update.message, "🔌 연결이 해제되었습니다.")
+
+async def extendcode(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    if database.extend_group(update.effective_chat.id, duration_days=3, max_extends=1):
+        rem = database.group_remaining_seconds(update.effective_chat.id) // 86400
+        await outbox.reply(update.message, f"🔁 코드 연장 완료. 남은 {rem}일")
+    else:
+        await outbox.reply(update.message, "⚠️ 연장 한도(1회) 초과")
+
+async def remaining(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    sec = database.group_remaining_seconds(update.effective_chat.id)
+    if sec <= 0:
+        return await outbox.reply(update.message, "❗ 등록된 코드가 없습니다.")
+    d = sec // 86400; h = (sec % 86400)//3600; m = (sec %3600)//60
+    await outbox.reply(update.message, f"⏳ 남은: {d}일 {h}시간 {m}분")
+
+async def paymentcheck(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    ko, zh, km, vi = database.get_setting("inquiry_msg", ctx.bot_data["inquiry_msg"])
+    await outbox.reply(update.message, format_multilang(ko, zh, km, vi))
+
+async def message_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    gid = update.effective_chat.id
+    uname = update.effective_user.username or update.effective_user.full_name
+    database.log_group_message(gid, update.effective_user.id, uname, update.message.text)
+    await logger.log_message_to_group(update, ctx)
+    if database.is_group_active(gid):
+        await coalescer.submit(update, ctx)
+
+# ───────────────────────────────
+# 시작 / 종료 훅
+# ───────────────────────────────
+async def on_startup(app):
+    database.init_storage()
+    database.install_sync(app)
+    persistence.install(app)
+    auditlog.open_log(f"w{database.WORKER_ID}")
+    logsearch.install()
+    # 만료 알림·정리는 한 워커만 (다른 워커의 변경은 install_sync로 반영됨)
+    if database.WORKER_ID == 0:
+        expiry.install(app, format_multilang)
+    payment.install(app)
+    await http_client.start(app)
+    await outbox.start(app)
+    await metrics.start(app, database.WORKER_ID)
+
+async def on_shutdown(app):
+    await profiler.stop(app)
+    await metrics.stop(app)
+    await coalescer.stop(app)
+    await logger.stop(app)
+    await outbox.stop(app)
+    await http_client.close(app)
+    await persistence.shutdown(app)
+    database.close_storage()
+    auditlog.close_log()
+
+def build_app(updater: bool = True):
+    """애플리케이션 생성 (updater=False: 업데이트를 외부에서 update_queue로 넣는 워커용)"""
+    builder = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .application_class(ChatOrderedApplication, {"max_concurrent": UPDATE_CONCURRENCY})
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if BOT_API_BASE_URL:
+        builder = builder.base_url(BOT_API_BASE_URL)
+    if not updater:
+        builder = builder.updater(None)
+    app = builder.build()
+    init_bot_data(app)
+
+    # — 소유자용 핸들러
+    app.add_handler(CommandHandler("auth",             auth_cmd))
+    app.add_handler(CommandHandler("setcontrolgroup",  setcontrol_cmd))
+    app.add_handler(CommandHandler("setinquiry",       setinquiry_cmd))
+    app.add_handler(CommandHandler("setuserloggroup",  setuserlog_cmd))
+    app.add_handler(CommandHandler("helpowner",        helpowner_cmd))
+    app.add_handler(CommandHandler("listmaster",       listmaster_cmd))
+    app.add_handler(CommandHandler("listparticipants", listparticipants_cmd))
+    app.add_handler(CommandHandler("forcedisconnect",  forcedisconnect_cmd))
+    app.add_handler(CommandHandler("generateownercode",generateownercode_cmd))
+    app.add_handler(CommandHandler("deletecode",       deletecode_cmd))
+    app.add_handler(CommandHandler("extendissuedcode", extendissuedcode_cmd))
+    app.add_handler(CommandHandler("listcodelogs",     listcodelogs_cmd))
+    app.add_handler(CommandHandler("getlogs",          getlogs_cmd))
+    app.add_handler(CommandHandler("searchlogs",       searchlogs_cmd))
+    app.add_handler(CommandHandler("exportlogs",       exportlogs_cmd))
+    app.add_handler(CommandHandler("exportcodelogs",   exportcodelogs_cmd))
+    app.add_handler(CommandHandler("setlogcapacity",   setlogcapacity_cmd))
+    app.add_handler(CommandHandler("setcoalesce",      setcoalesce_cmd))
+    app.add_handler(CommandHandler("grouplangs",       grouplangs_cmd))
+    app.add_handler(CommandHandler("stats",            stats_cmd))
+    app.add_handler(CommandHandler("profile",          profile_cmd))
+    app.add_handler(CommandHandler("memsnapshot",      memsnapshot_cmd))
+
+    # — 사용자용 핸들러
+    app.add_handler(CommandHandler("start",       start))
+    app.add_handler(CommandHandler("help",        help_cmd))
+    app.add_handler(CallbackQueryHandler(button_cb))
+    app.add_handler(CommandHandler("createcode",   createcode))
+    app.add_handler(CommandHandler("registercode", registercode))
+    app.add_handler(CommandHandler("disconnect",   disconnect))
+    app.add_handler(CommandHandler("extendcode",   extendcode))
+    app.add_handler(CommandHandler("remaining",    remaining))
+    app.add_handler(CommandHandler("paymentcheck", paymentcheck))
+    app.add_handler(CommandHandler("confirmpayment", payment.handle_payment_check))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler))
+    metrics.instrument_handlers(app)
+    return app
+
+def run(app):
+    if BOT_MODE == "webhook":
+        logging.info("🌐 웹훅 모드 (%s:%d)", WEBHOOK_LISTEN, WEBHOOK_PORT)
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+            drop_pending_updates=DROP_PENDING_UPDATES,
+        )
+    else:
+        app.run_polling(drop_pending_updates=DROP_PENDING_UPDATES)
+
+if __name__ == "__main__":
+    logging.info("✅ 번역봇 시작")
+    if WORKERS > 1:
+        import workers
+        workers.run(WORKERS)
+    else:
+        run(build_app())
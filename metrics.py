@@ -0,0 +1,295 @@
+# metrics.py
+# 핸들러·외부 API 지연 시간, 캐시 적중률, 이벤트 루프 지연, 메모리 자료 크기 계측
+#  - 히스토그램: 고정 로그 간격 버킷(약 19% 간격, 0.5ms~60s) 카운트만 올림 → 관측 1회 bisect 한 번
+#  - 핸들러 계측: build_app에서 등록된 모든 핸들러 콜백을 instrument_handlers로 감쌈
+#  - 게이지: 조회할 때 값을 계산하는 함수로 등록 (평소 비용 없음)
+#  - 127.0.0.1:METRICS_PORT(+워커 번호)/metrics 에서 Prometheus 텍스트 형식, 소유자 /stats 에서 요약
+
+import os
+import time
+import asyncio
+import logging
+import functools
+from bisect import bisect_left
+from dotenv import load_dotenv
+
+load_dotenv()
+METRICS_HOST         = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT         = int(os.getenv("METRICS_PORT", "9108"))              # 0이면 HTTP 엔드포인트 끔
+METRICS_LAG_INTERVAL = float(os.getenv("METRICS_LAG_INTERVAL", "0.5"))     # 이벤트 루프 지연 측정 주기(초)
+
+PREFIX = "bot_"
+BOUNDS = [0.0005 * 2 ** (i / 4) for i in range(68)]   # 0.5ms … 약 59s (4칸마다 2배)
+_EXPORT = range(3, len(BOUNDS), 4)                     # Prometheus에는 2배 간격 버킷만 노출
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)   # 마지막 칸은 상한 초과
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BOUNDS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """버킷 안에서 선형 보간한 분위수 (관측이 없으면 0)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BOUNDS[i - 1] if i else 0.0
+                upper = BOUNDS[i] if i < len(BOUNDS) else BOUNDS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BOUNDS[-1]
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+
+# (이름, 라벨) → 계측값, 이름 → (설명, 라벨 이름, 값 함수)
+_histograms: dict[tuple[str, tuple], Histogram] = {}
+_counters: dict[tuple[str, tuple], Counter] = {}
+_gauges: dict[str, tuple[str, str | None, object]] = {}
+_help: dict[str, str] = {}
+_lag_task: asyncio.Task | None = None
+_server: asyncio.AbstractServer | None = None
+
+
+def histogram(name: str, doc: str = "", **labels) -> Histogram:
+    """라벨별 히스토그램 (같은 이름·라벨이면 같은 객체, 모듈 로드 시 한 번 받아 두고 사용)"""
+    key = (name, tuple(sorted(labels.items())))
+    if key not in _histograms:
+        _histograms[key] = Histogram()
+        _help.setdefault(name, doc)
+    return _histograms[key]
+
+
+def counter(name: str, doc: str = "", **labels) -> Counter:
+    key = (name, tuple(sorted(labels.items())))
+    if key not in _counters:
+        _counters[key] = Counter()
+        _help.setdefault(name, doc)
+    return _counters[key]
+
+
+def gauge(name: str, fn, doc: str = "", label: str | None = None) -> None:
+    """조회 시 fn() 값을 노출 (label이 있으면 fn은 {라벨값: 값} 반환)"""
+    _gauges[name] = (doc, label, fn)
+
+
+def _gauge_values(name: str) -> dict[str | None, float]:
+    _, label, fn = _gauges[name]
+    try:
+        value = fn()
+    except Exception as e:
+        logging.warning("게이지 조회 실패 (%s): %r", name, e)
+        return {}
+    return value if label else {None: value}
+
+
+# ────────────────────────────
+# 핸들러 계측
+# ────────────────────────────
+
+def _handler_name(handler) -> str:
+    commands = getattr(handler, "commands", None)
+    if commands:
+        return "/" + sorted(commands)[0]
+    return getattr(handler.callback, "__name__", type(handler).__name__)
+
+
+def timed(name: str, callback):
+    """핸들러 콜백의 처리 시간·예외 수 기록"""
+    hist = histogram("handler_seconds", "핸들러 처리 시간", handler=name)
+    errors = counter("handler_errors_total", "핸들러 예외 수", handler=name)
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            hist.observe(time.perf_counter() - started)
+    return wrapper
+
+
+def instrument_handlers(app) -> None:
+    """등록된 모든 핸들러 계측 (build_app에서 add_handler를 모두 마친 뒤 호출)"""
+    for handlers in app.handlers.values():
+        for handler in handlers:
+            handler.callback = timed(_handler_name(handler), handler.callback)
+
+
+# ────────────────────────────
+# 이벤트 루프 지연
+# ────────────────────────────
+
+loop_lag = histogram("event_loop_lag_seconds", "예정보다 늦게 깨어난 시간")
+
+
+async def _watch_lag() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(METRICS_LAG_INTERVAL)
+        loop_lag.observe(max(0.0, loop.time() - started - METRICS_LAG_INTERVAL))
+
+
+def _register_gauges() -> None:
+    # 계측 대상 모듈이 metrics를 import하므로 여기서 늦게 import
+    import database
+    import translator
+    import chatcache
+    import outbox
+    import logger
+    import prefilter
+    caches = {"translation": translator.translation_cache, "detect": translator.detect_cache,
+              "chat": chatcache.chat_cache}
+    gauge("cache_hit_ratio", lambda: {n: c.stats()["hit_rate"] for n, c in caches.items()},
+          "캐시 적중률", label="cache")
+    gauge("cache_entries", lambda: {n: c.stats()["size"] for n, c in caches.items()}, "캐시 항목 수", label="cache")
+    gauge("db_entries", database.table_sizes, "메모리 자료 크기", label="table")
+    gauge("outbox_depth", lambda: outbox.outbox.stats()["depth"], "발신 대기 메시지 수")
+    gauge("log_forward_queued", lambda: logger.batcher.queued(), "로그 그룹 전달 대기 항목 수")
+    gauge("prefilter_skipped", lambda: prefilter.stats["skipped"], "전처리로 건너뛴 메시지 수")
+    gauge("translate_saved_calls", lambda: sum(translator.saved_calls.values()), "그룹 언어 구성으로 생략한 번역 호출 수")
+
+
+# ────────────────────────────
+# 출력
+# ────────────────────────────
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    """Prometheus 텍스트 형식 (0.0.4)"""
+    out = []
+    typed = set()
+
+    def header(name: str, kind: str) -> None:
+        if name not in typed:
+            typed.add(name)
+            out.append(f"# HELP {PREFIX}{name} {_help.get(name) or name}")
+            out.append(f"# TYPE {PREFIX}{name} {kind}")
+
+    for (name, labels), hist in sorted(_histograms.items()):
+        if not hist.count:   # 한 번도 호출되지 않은 핸들러는 생략
+            continue
+        header(name, "histogram")
+        cumulative, upto = 0, 0
+        for i in _EXPORT:
+            cumulative += sum(hist.counts[upto:i + 1])
+            upto = i + 1
+            out.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', f'{BOUNDS[i]:.6g}'),))} {cumulative}")
+        out.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {hist.count}")
+        out.append(f"{PREFIX}{name}_sum{_labels(labels)} {hist.sum:.6f}")
+        out.append(f"{PREFIX}{name}_count{_labels(labels)} {hist.count}")
+    for (name, labels), c in sorted(_counters.items()):
+        header(name, "counter")
+        out.append(f"{PREFIX}{name}{_labels(labels)} {c.value}")
+    for name, (doc, label, _) in sorted(_gauges.items()):
+        _help.setdefault(name, doc)
+        header(name, "gauge")
+        for key, value in _gauge_values(name).items():
+            out.append(f"{PREFIX}{name}{_labels(((label, key),) if label else ())} {float(value):g}")
+    return "\n".join(out) + "\n"
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}" if seconds >= 0.01 else f"{seconds * 1000:.1f}"
+
+
+def report(limit: int = 20) -> str:
+    """/stats 응답 (호출 많은 순, p50/p95/p99 ms)"""
+    def rows(name: str, errors_name: str) -> list[str]:
+        items = [(labels, h) for (n, labels), h in _histograms.items() if n == name and h.count]
+        items.sort(key=lambda kv: -kv[1].count)
+        lines = []
+        for labels, h in items[:limit]:
+            errors = c.value if (c := _counters.get((errors_name, labels))) else 0
+            tag = " / ".join(str(v) for _, v in labels)
+            lines.append(f"{tag}: {h.count}회{f' (오류 {errors})' if errors else ''} · "
+                         f"{_ms(h.quantile(0.5))}/{_ms(h.quantile(0.95))}/{_ms(h.quantile(0.99))}ms")
+        return lines or ["기록 없음"]
+
+    lines = ["📊 통계 (p50/p95/p99)", "", "⏱ 핸들러", *rows("handler_seconds", "handler_errors_total"),
+             "", "🌐 외부 API", *rows("api_request_seconds", "api_errors_total"),
+             "", f"🔁 이벤트 루프 지연: p50 {_ms(loop_lag.quantile(0.5))}ms · p99 {_ms(loop_lag.quantile(0.99))}ms",
+             ""]
+    for name, (doc, label, _) in sorted(_gauges.items()):
+        values = _gauge_values(name)
+        fmt = (lambda v: f"{v * 100:.1f}%") if name.endswith("ratio") else (lambda v: f"{v:,.0f}")
+        text = ", ".join(f"{k} {fmt(v)}" for k, v in values.items()) if label else fmt(values.get(None, 0))
+        lines.append(f"• {doc or name}: {text}")
+    return "\n".join(lines)
+
+
+# ────────────────────────────
+# HTTP 엔드포인트
+# ────────────────────────────
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request = await asyncio.wait_for(reader.readline(), 5)
+        while await asyncio.wait_for(reader.readline(), 5) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request.split()
+        if len(parts) >= 2 and parts[1].split(b"?")[0] == b"/metrics":
+            status, body = "200 OK", render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start(app=None, worker_id: int = 0) -> None:
+    """게이지 등록, 이벤트 루프 지연 측정, HTTP 엔드포인트 시작 (post_init 훅)"""
+    global _lag_task, _server
+    _register_gauges()
+    _lag_task = asyncio.create_task(_watch_lag())
+    if METRICS_PORT:
+        port = METRICS_PORT + worker_id
+        try:
+            _server = await asyncio.start_server(_serve, METRICS_HOST, port)
+            logging.info("📈 메트릭 엔드포인트: http://%s:%d/metrics", METRICS_HOST, port)
+        except OSError as e:
+            logging.warning("메트릭 엔드포인트 시작 실패 (%s:%d): %r", METRICS_HOST, port, e)
+
+
+async def stop(app=None) -> None:
+    global _lag_task, _server
+    if _lag_task:
+        _lag_task.cancel()
+        _lag_task = None
+    if _server:
+        _server.close()
+        await _server.wait_closed()
+        _server = None
@@ -0,0 +1,279 @@
+# outbox.py
+# 모든 텔레그램 발신을 모아 보내는 비동기 발신 큐
+#  - 전체(초당) / 채팅별(그룹 분당, 개인 초당) 토큰 버킷
+#  - 우선순위: 소유자 명령(HIGH) > 일반 응답(NORMAL) > 번역·로그 전달(BULK)
+#  - RetryAfter 수신 시 전체 발신을 지정 시간만큼 멈춘 뒤 재시도
+#  - 같은 채팅의 메시지는 한 번에 하나씩, 들어온 순서대로 전송
+#  - *_nowait: 큐에 넣기만 하고 반환 (채팅별 속도 제한 대기 동안 업데이트 처리 슬롯을 잡고 있지 않도록)
+
+import os
+import heapq
+import asyncio
+import logging
+import itertools
+import contextvars
+from collections import deque
+from dotenv import load_dotenv
+from telegram.error import RetryAfter
+
+load_dotenv()
+OUTBOX_GLOBAL_PER_SEC  = float(os.getenv("OUTBOX_GLOBAL_PER_SEC", "30"))
+OUTBOX_GROUP_PER_MIN   = float(os.getenv("OUTBOX_GROUP_PER_MIN", "20"))
+OUTBOX_PRIVATE_PER_SEC = float(os.getenv("OUTBOX_PRIVATE_PER_SEC", "1"))
+OUTBOX_MAX_INFLIGHT    = int(os.getenv("OUTBOX_MAX_INFLIGHT", "16"))
+OUTBOX_MAX_RETRIES     = int(os.getenv("OUTBOX_MAX_RETRIES", "5"))
+
+HIGH, NORMAL, BULK = 0, 1, 2
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", BULK: "bulk"}
+
+# 핸들러 단위 기본 우선순위 (owner_only 등에서 설정)
+priority_var: contextvars.ContextVar[int] = contextvars.ContextVar("outbox_priority", default=NORMAL)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = now
+
+    def wait_time(self, now: float) -> float:
+        """토큰 1개를 쓰기까지 남은 시간 (0이면 즉시 가능)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        return self.tokens + (now - self.stamp) * self.rate >= self.capacity
+
+
+class _Job:
+    __slots__ = ("chat_id", "factory", "future", "priority", "retries")
+
+    def __init__(self, chat_id, factory, future, priority):
+        self.chat_id = chat_id
+        self.factory = factory
+        self.future = future
+        self.priority = priority
+        self.retries = 0
+
+
+class Outbox:
+    def __init__(self):
+        self._ready: list[tuple] = []      # (priority, seq, job)
+        self._delayed: list[tuple] = []    # (not_before, priority, seq, job)
+        self._waiting: dict[int, deque] = {}   # 전송 중인 채팅의 후속 메시지
+        self._busy: set[int] = set()
+        self._buckets: dict[int, TokenBucket] = {}
+        self._global: TokenBucket | None = None
+        self._seq = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._inflight: asyncio.Semaphore | None = None
+        self._task: asyncio.Task | None = None
+        self._paused_until = 0.0
+        self.global_rate = OUTBOX_GLOBAL_PER_SEC   # 다중 워커에서는 워커 수로 나눠 씀
+        self.sent = 0
+        self.failed = 0
+        self.retry_after = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    # ── 공개 API ──
+    def enqueue(self, chat_id: int, factory, priority: int | None = None) -> asyncio.Future:
+        """factory()가 만드는 API 호출을 큐에 넣고 전송 결과 future를 바로 반환"""
+        if priority is None:
+            priority = priority_var.get()
+        if not self.running:
+            return asyncio.ensure_future(factory())
+        loop = asyncio.get_running_loop()
+        job = _Job(chat_id, factory, loop.create_future(), priority)
+        if chat_id in self._busy:
+            self._waiting.setdefault(chat_id, deque()).append(job)
+        else:
+            self._busy.add(chat_id)
+            heapq.heappush(self._ready, (priority, next(self._seq), job))
+            self._wakeup.set()
+        return job.future
+
+    async def submit(self, chat_id: int, factory, priority: int | None = None):
+        """큐에 넣고 전송 결과를 기다림"""
+        return await self.enqueue(chat_id, factory, priority)
+
+    def stats(self) -> dict:
+        by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+        for entry in itertools.chain(self._ready, self._delayed):
+            by_priority[PRIORITY_NAMES[entry[-1].priority]] += 1
+        waiting = sum(len(q) for q in self._waiting.values())
+        return {
+            "ready":       len(self._ready),
+            "delayed":     len(self._delayed),
+            "waiting":     waiting,
+            "depth":       len(self._ready) + len(self._delayed) + waiting,
+            "by_priority": by_priority,
+            "sent":        self.sent,
+            "failed":      self.failed,
+            "retry_after": self.retry_after,
+        }
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._inflight = asyncio.Semaphore(OUTBOX_MAX_INFLIGHT)
+        self._global = TokenBucket(self.global_rate, self.global_rate, loop.time())
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """남은 메시지를 최대 timeout초 동안 내보낸 뒤 종료"""
+        if not self._task:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (self._ready or self._delayed or self._busy) and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    # ── 내부 ──
+    def _bucket(self, chat_id: int, now: float) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) > 10000:
+                # 가득 찬(오래 쉬고 있는) 버킷 정리
+                self._buckets = {cid: b for cid, b in self._buckets.items() if not b.full(now)}
+            if chat_id < 0:
+                bucket = TokenBucket(OUTBOX_GROUP_PER_MIN / 60, OUTBOX_GROUP_PER_MIN, now)
+            else:
+                bucket = TokenBucket(OUTBOX_PRIVATE_PER_SEC, max(1.0, OUTBOX_PRIVATE_PER_SEC), now)
+            self._buckets[chat_id] = bucket
+        return bucket
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, priority, seq, job = heapq.heappop(self._delayed)
+                heapq.heappush(self._ready, (priority, seq, job))
+
+            if not self._ready or self._paused_until > now:
+                if self._paused_until > now:
+                    timeout = self._paused_until - now
+                else:
+                    timeout = self._delayed[0][0] - now if self._delayed else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            priority, seq, job = self._ready[0]
+            wait = self._bucket(job.chat_id, now).wait_time(now)
+            if wait > 0:
+                heapq.heappop(self._ready)
+                heapq.heappush(self._delayed, (now + wait, priority, seq, job))
+                continue
+            wait = self._global.wait_time(now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            heapq.heappop(self._ready)
+            self._buckets[job.chat_id].take()
+            self._global.take()
+            await self._inflight.acquire()
+            asyncio.create_task(self._send(job, seq))
+
+    async def _send(self, job: _Job, seq: int) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            result = await job.factory()
+        except RetryAfter as e:
+            self.retry_after += 1
+            job.retries += 1
+            if job.retries > OUTBOX_MAX_RETRIES:
+                self.failed += 1
+                job.future.set_exception(e)
+            else:
+                logging.warning("RetryAfter %ss (chat %s) → 전체 발신 일시 중지", e.retry_after, job.chat_id)
+                self._paused_until = max(self._paused_until, loop.time() + e.retry_after)
+                heapq.heappush(self._delayed, (self._paused_until, job.priority, seq, job))
+                self._inflight.release()
+                self._wakeup.set()
+                return
+        except Exception as e:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        self._inflight.release()
+        self._next_for_chat(job.chat_id)
+
+    def _next_for_chat(self, chat_id: int) -> None:
+        queue = self._waiting.get(chat_id)
+        if queue:
+            job = queue.popleft()
+            if not queue:
+                del self._waiting[chat_id]
+            heapq.heappush(self._ready, (job.priority, next(self._seq), job))
+        else:
+            self._busy.discard(chat_id)
+        self._wakeup.set()
+
+
+outbox = Outbox()
+
+
+async def send(bot, chat_id: int, text: str, priority: int | None = None, **kwargs):
+    return await outbox.submit(chat_id, lambda: bot.send_message(chat_id, text, **kwargs), priority)
+
+
+async def reply(message, text: str, priority: int | None = None, **kwargs):
+    return await outbox.submit(message.chat_id, lambda: message.reply_text(text, **kwargs), priority)
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logging.warning("발신 실패 (기다리지 않은 메시지): %r", future.exception())
+
+
+def reply_nowait(message, text: str, priority: int | None = None, **kwargs) -> asyncio.Future:
+    """reply와 같지만 전송을 기다리지 않음 (실패는 로그만)"""
+    future = outbox.enqueue(message.chat_id, lambda: message.reply_text(text, **kwargs), priority)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+async def reply_document(message, path: str, filename: str, priority: int | None = None, **kwargs):
+    """파일 업로드 응답 (재시도 때마다 파일을 새로 열어 처음부터 보냄)"""
+    async def upload():
+        with open(path, "rb") as f:
+            return await message.reply_document(f, filename=filename, **kwargs)
+    return await outbox.submit(message.chat_id, upload, priority)
+
+
+async def send_document(bot, chat_id: int, data: bytes, filename: str, priority: int | None = None, **kwargs):
+    """메모리의 내용을 파일로 전송 (재시도해도 같은 내용)"""
+    return await outbox.submit(chat_id, lambda: bot.send_document(chat_id, data, filename=filename, **kwargs), priority)
+
+
+async def start(app=None) -> None:
+    await outbox.start()
+
+
+async def stop(app=None) -> None:
+    await outbox.stop()
@@ -1,60 +1,237 @@
-# payment.py
-# TRC-20 USDT 결제 확인 모듈 - Trongrid API 사용
-
-import os
-import time
-import requests
-from dotenv import load_dotenv
-from telegram import Update
-
-load_dotenv()
-
-TRONGRID_API_KEY = os.getenv("TRONGRID_API_KEY")
-RECEIVER_ADDRESS = os.getenv("TRC20_RECEIVER_ADDRESS")
-TRONGRID_BASE_URL = "https://api.trongrid.io/v1/accounts"
-
-# 유저 ID와 생성된 코드에 대해 임시 결제주소 & 유효시간 저장 (메모리 DB)
-pending_payments = {}
-
-# 사용자에게 결제 안내 메시지 전송
-async def handle_payment_check(update: Update, context):
-    user_id = update.effective_user.id
-    args = context.args
-
-    if len(args) != 2:
-        await update.message.reply_text("❗ 사용법: /결제확인 [TX해시] [코드]")
-        return
-
-    tx_hash, code = args
-
-    if check_usdt_payment(tx_hash):
-        # 여기서 코드 등록 로직으로 연결 가능
-        await update.message.reply_text("✅ 결제가 확인되었습니다. 코드가 활성화됩니다.")
-        # database.register_paid_code(code, user_id)  # 추후 연결
-    else:
-        await update.message.reply_text("❌ 결제를 찾을 수 없습니다. TX 해시를 다시 확인해주세요.")
-
-# TRC-20 결제 확인 함수 (Trongrid API)
-def check_usdt_payment(tx_hash):
-    try:
-        url = f"https://api.trongrid.io/v1/transactions/{tx_hash}"
-        headers = {
-            "accept": "application/json",
-            "TRON-PRO-API-KEY": TRONGRID_API_KEY
-        }
-        res = requests.get(url, headers=headers)
-        if res.status_code != 200:
-            return False
-        data = res.json()["data"][0]
-        if "contractData" not in data:
-            return False
-        contract = data["raw_data"]["contract"][0]["parameter"]["value"]
-
-        # 주소 & 토큰 기준 검증
-        if (
-            contract.get("contract_address") or ""
-        ).lower() == RECEIVER_ADDRESS.lower() and contract.get("amount") >= 30000000:
-            return True
-    except Exception as e:
-        print("결제 확인 오류:", str(e))
-    return False
+# payment.py
+# TRC-20 USDT 결제 확인 모듈 - Trongrid API 사용
+#  - 공유 비동기 HTTP 세션으로 수신 주소의 TRC-20 입금 목록을 조회해 TX 검증
+#  - 확인/거절된 TX는 사용자가 물어본 것만 캐시 (최대 PAYMENT_RESULT_CACHE개, 오래된 것부터 버림)
+#  - 입금 목록 즉시 조회는 PAYMENT_REFRESH_INTERVAL초에 한 번, 그 사이 새 TX는 마지막 목록으로만 판단
+#  - 아직 확인되지 않은 결제는 pending_payments에 두고 백그라운드 폴러가 일괄 확인 후 자동 활성화
+#    (조회가 실패해도 PAYMENT_PENDING_TTL이 지난 대기 결제는 정리하고 결과를 알림)
+#  - TX 해시는 64자리 16진수만, 대기 결제는 사용자당 PAYMENT_PENDING_PER_USER개·전체 PAYMENT_PENDING_MAX개까지
+#  - 결제로 연장할 수 있는 코드는 새 코드이거나 결제한 사용자의 일반 코드뿐 (소유자 코드·남의 코드 거절)
+#  - 수신 주소(TRC20_RECEIVER_ADDRESS)가 없으면 폴러를 켜지 않고 /confirmpayment도 거절
+
+import os
+import re
+import time
+import logging
+from collections import OrderedDict
+from dotenv import load_dotenv
+from telegram import Update
+import database
+import outbox
+import auditlog
+import http_client
+import metrics
+
+load_dotenv()
+
+TRONGRID_API_KEY      = os.getenv("TRONGRID_API_KEY")
+RECEIVER_ADDRESS      = os.getenv("TRC20_RECEIVER_ADDRESS")
+TRONGRID_BASE_URL     = os.getenv("TRONGRID_BASE_URL", "https://api.trongrid.io").rstrip("/")
+USDT_CONTRACT         = os.getenv("TRC20_USDT_CONTRACT", "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t")
+PAYMENT_MIN_AMOUNT    = int(os.getenv("PAYMENT_MIN_AMOUNT", "30000000"))   # 최소 금액 (USDT 소수 6자리 단위)
+PAYMENT_DAYS          = int(os.getenv("PAYMENT_DAYS", "30"))               # 결제 1건당 활성화 일수
+PAYMENT_POLL_INTERVAL = float(os.getenv("PAYMENT_POLL_INTERVAL", "30"))    # 대기 결제 확인 주기(초)
+PAYMENT_PENDING_TTL   = float(os.getenv("PAYMENT_PENDING_TTL", "86400"))   # 대기 결제 최대 유지 시간(초)
+PAYMENT_LOOKBACK      = float(os.getenv("PAYMENT_LOOKBACK", "259200"))     # 즉시 확인 시 조회할 과거 범위(초)
+PAYMENT_REFRESH_INTERVAL = float(os.getenv("PAYMENT_REFRESH_INTERVAL", "30"))  # 즉시 확인용 목록 재조회 최소 간격(초)
+PAYMENT_RESULT_CACHE  = int(os.getenv("PAYMENT_RESULT_CACHE", "10000"))     # 확인 결과를 기억할 TX 수
+PAYMENT_PENDING_PER_USER = int(os.getenv("PAYMENT_PENDING_PER_USER", "3"))  # 사용자당 대기 결제 수
+PAYMENT_PENDING_MAX   = int(os.getenv("PAYMENT_PENDING_MAX", "1000"))       # 전체 대기 결제 수
+
+TX_HASH = re.compile(r"[0-9a-f]{64}")
+CODE_REJECTED = "❌ 이 코드는 결제로 연장할 수 없습니다. 본인이 발급받은 코드나 새 코드를 입력해주세요."
+
+# TX 해시 → 대기 정보 { user_id, chat_id, code, since }
+pending_payments: dict[str, dict] = {}
+# 사용자가 물어본 TX 해시 → 확인 결과 (True = 유효한 입금, False = 조건 불충족), LRU
+_tx_results: OrderedDict[str, bool] = OrderedDict()
+# 마지막 즉시 조회 목록 (TX 해시 → 유효 여부, 조회마다 교체) 과 조회 시각
+_recent: dict[str, bool] = {}
+_recent_at = 0.0
+
+_api_seconds = metrics.histogram("api_request_seconds", "외부 API 호출 시간", api="trongrid")
+_api_errors  = metrics.counter("api_errors_total", "외부 API 호출 오류 수", api="trongrid")
+
+# 사용자에게 결제 안내 메시지 전송
+async def handle_payment_check(update: Update, context):
+    user_id = update.effective_user.id
+    args = context.args
+
+    if len(args) != 2:
+        await outbox.reply(update.message, "❗ 사용법: /confirmpayment [TX해시] [코드]")
+        return
+
+    if not RECEIVER_ADDRESS:
+        await outbox.reply(update.message, "❌ 결제 수신 주소가 설정되지 않아 결제를 확인할 수 없습니다.")
+        return
+
+    tx_hash, code = args[0].lower(), args[1]
+    if not TX_HASH.fullmatch(tx_hash):
+        await outbox.reply(update.message, "❌ TX 해시 형식이 올바르지 않습니다. (64자리 16진수)")
+        return
+    if not database.can_pay_for_code(code, user_id):
+        await outbox.reply(update.message, CODE_REJECTED)
+        return
+
+    if database.is_payment_used(tx_hash):
+        await outbox.reply(update.message, "❌ 이미 사용된 결제입니다.")
+        return
+    if tx_hash in pending_payments:
+        await outbox.reply(update.message, "⏳ 이미 확인 대기 중인 결제입니다.")
+        return
+
+    result = await check_usdt_payment(tx_hash)
+    if result and not database.can_pay_for_code(code, user_id):
+        # 조회 중 다른 사람이 같은 이름의 코드를 발급받은 경우
+        await outbox.reply(update.message, CODE_REJECTED)
+    elif result and not await activate(context, tx_hash, code, user_id):
+        # 조회 중 같은 TX로 먼저 활성화된 경우
+        await outbox.reply(update.message, "❌ 이미 사용된 결제입니다.")
+    elif result:
+        await outbox.reply(update.message, "✅ 결제가 확인되었습니다. 코드가 활성화됩니다.")
+    elif result is None:
+        if tx_hash in pending_payments:
+            await outbox.reply(update.message, "⏳ 이미 확인 대기 중인 결제입니다.")
+            return
+        mine = sum(1 for p in pending_payments.values() if p["user_id"] == user_id)
+        if mine >= PAYMENT_PENDING_PER_USER or len(pending_payments) >= PAYMENT_PENDING_MAX:
+            await outbox.reply(update.message, "❌ 확인 대기 중인 결제가 너무 많습니다. 잠시 후 다시 시도해주세요.")
+            return
+        pending_payments[tx_hash] = {
+            "user_id": user_id,
+            "chat_id": update.effective_chat.id,
+            "code":    code,
+            "since":   time.time(),
+        }
+        await outbox.reply(update.message, "⏳ 결제 확인 중입니다. 확인되면 자동으로 코드가 활성화됩니다.")
+    else:
+        await outbox.reply(update.message, "❌ 결제를 찾을 수 없습니다. TX 해시를 다시 확인해주세요.")
+
+
+async def activate(context, tx_hash: str, code: str, user_id: int) -> bool:
+    """결제 확인된 코드 활성화 (기존 코드는 연장, 없으면 결제 코드로 발급)
+    이미 사용된 TX이거나 이 사용자가 결제할 수 없는 코드면 False (호출 전 can_pay_for_code로 구분)"""
+    if not database.can_pay_for_code(code, user_id) or not await database.claim_payment(tx_hash, code):
+        return False
+    if not await database.extend_code(code, PAYMENT_DAYS):
+        database.issue_user_code(code, user_id, PAYMENT_DAYS)
+    auditlog.record(auditlog.PAID, code, user_id=user_id, days=PAYMENT_DAYS, tx=tx_hash)
+    return True
+
+# ────────────────────────────
+# Trongrid 조회
+# ────────────────────────────
+
+async def fetch_transfers(min_timestamp: float, max_pages: int = 5) -> list[dict]:
+    """수신 주소로 들어온 USDT 입금 목록 (min_timestamp 이후, 최신순)"""
+    url = f"{TRONGRID_BASE_URL}/v1/accounts/{RECEIVER_ADDRESS}/transactions/trc20"
+    headers = {"accept": "application/json", "TRON-PRO-API-KEY": TRONGRID_API_KEY or ""}
+    params = {
+        "only_to": "true",
+        "only_confirmed": "true",
+        "limit": 200,
+        "contract_address": USDT_CONTRACT,
+        "min_timestamp": int(min_timestamp * 1000),
+    }
+    transfers = []
+    for _ in range(max_pages):
+        started = time.perf_counter()
+        try:
+            res = await http_client.get_client().get(url, params=params, headers=headers)
+            res.raise_for_status()
+            body = res.json()
+        except Exception:
+            _api_errors.inc()
+            raise
+        finally:
+            _api_seconds.observe(time.perf_counter() - started)
+        transfers.extend(body.get("data", []))
+        fingerprint = body.get("meta", {}).get("fingerprint")
+        if not fingerprint:
+            break
+        params["fingerprint"] = fingerprint
+    return transfers
+
+
+def _is_valid_transfer(item: dict) -> bool:
+    token = (item.get("token_info") or {}).get("address") or ""
+    return (
+        (item.get("to") or "") == RECEIVER_ADDRESS
+        and token == USDT_CONTRACT
+        and int(item.get("value") or 0) >= PAYMENT_MIN_AMOUNT
+    )
+
+
+def _results(transfers: list[dict]) -> dict[str, bool]:
+    return {item["transaction_id"]: _is_valid_transfer(item) for item in transfers if item.get("transaction_id")}
+
+
+def _remember(tx_hash: str, result: bool) -> None:
+    _tx_results[tx_hash] = result
+    _tx_results.move_to_end(tx_hash)
+    while len(_tx_results) > PAYMENT_RESULT_CACHE:
+        _tx_results.popitem(last=False)
+
+
+# TRC-20 결제 확인 함수 (Trongrid API)
+async def check_usdt_payment(tx_hash: str) -> bool | None:
+    """True = 확인됨, False = 조건 불충족, None = 아직 목록에 없음(대기)"""
+    global _recent, _recent_at
+    if tx_hash in _tx_results:
+        _tx_results.move_to_end(tx_hash)
+        return _tx_results[tx_hash]
+    now = time.time()
+    if now - _recent_at >= PAYMENT_REFRESH_INTERVAL:
+        # 조회 시작 시각으로 갱신 → 실패하거나 조회 중이어도 간격 안의 다른 요청은 재조회하지 않음
+        _recent_at = now
+        try:
+            _recent = _results(await fetch_transfers(now - PAYMENT_LOOKBACK))
+        except Exception as e:
+            logging.warning("결제 확인 오류: %r", e)
+            return None
+    result = _recent.get(tx_hash)
+    if result is not None:
+        _remember(tx_hash, result)
+    return result
+
+# ────────────────────────────
+# 대기 결제 폴러
+# ────────────────────────────
+
+async def poll_pending(context) -> None:
+    """job queue 콜백: 대기 중인 결제를 입금 목록 한 번으로 일괄 확인"""
+    if not pending_payments:
+        return
+    now = time.time()
+    since = min(p["since"] for p in pending_payments.values()) - 3600
+    try:
+        found = _results(await fetch_transfers(since))
+    except Exception as e:
+        logging.warning("대기 결제 조회 오류: %r", e)
+        found = {}   # 조회 실패해도 기한 지난 대기 결제는 아래에서 정리
+
+    for tx_hash, info in list(pending_payments.items()):
+        result = found.get(tx_hash, _tx_results.get(tx_hash))
+        if result is not None:
+            _remember(tx_hash, result)
+        if result is None and now - info["since"] < PAYMENT_PENDING_TTL:
+            continue
+        del pending_payments[tx_hash]
+        if result and not database.can_pay_for_code(info["code"], info["user_id"]):
+            text = CODE_REJECTED   # TX는 사용 처리하지 않음 → 올바른 코드로 다시 확인 가능
+        elif result and await activate(context, tx_hash, info["code"], info["user_id"]):
+            text = f"✅ 결제가 확인되어 코드 {info['code']}가 활성화되었습니다."
+        else:
+            text = "❌ 결제를 확인하지 못했습니다. TX 해시를 다시 확인해주세요."
+        try:
+            await outbox.send(context.bot, info["chat_id"], text)
+        except Exception as e:
+            logging.warning("결제 결과 알림 실패 (%s): %r", info["chat_id"], e)
+
+
+def install(app) -> None:
+    if not RECEIVER_ADDRESS:
+        logging.warning("TRC20_RECEIVER_ADDRESS 미설정: 결제 확인 폴러를 시작하지 않음")
+        return
+    app.job_queue.run_repeating(poll_pending, interval=PAYMENT_POLL_INTERVAL,
+                                first=PAYMENT_POLL_INTERVAL, name="payment_poller")
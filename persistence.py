@@ -0,0 +1,130 @@
+# persistence.py
+# 재시작 후 바로 이어서 동작하기 위한 주기적 스냅샷
+#  - 섹션: db(스냅샷 백엔드일 때만, 코드·그룹·설정·로그 등), bot_data, 대기 결제, 번역·언어 감지·채팅 이름 캐시
+#  - snapshot 백엔드의 변경 내역은 storage.JournalStore 저널에 계속 추가되고,
+#    스냅샷을 기록할 때 새 세대 저널로 넘어가 이전 저널을 지움
+#  - 상태 직렬화(pickle)는 이벤트 루프에서 한 번에, 파일 기록은 작업 스레드에서
+#  - PERSIST_INTERVAL초마다 또는 저널이 PERSIST_JOURNAL_BYTES를 넘으면 스냅샷, 종료 시 마지막 스냅샷 + 저널 flush
+
+import os
+import time
+import pickle
+import asyncio
+import logging
+from dotenv import load_dotenv
+import database
+import payment
+import translator
+import chatcache
+from storage import JournalStore, SnapshotReader, write_snapshot
+
+load_dotenv()
+PERSIST_INTERVAL      = float(os.getenv("PERSIST_INTERVAL", "600"))                        # 스냅샷 주기(초)
+PERSIST_JOURNAL_BYTES = int(os.getenv("PERSIST_JOURNAL_BYTES", str(64 * 1024 * 1024)))    # 이 크기를 넘으면 바로 스냅샷
+PERSIST_FLUSH_INTERVAL = float(os.getenv("PERSIST_FLUSH_INTERVAL", "1"))                  # 저널 디스크 기록 주기(초)
+PERSIST_CACHES        = os.getenv("PERSIST_CACHES", "1") == "1"                            # 캐시·bot_data 스냅샷 여부
+
+# 섹션 이름 → 캐시
+CACHES = {
+    "translation_cache": translator.translation_cache,
+    "detect_cache":      translator.detect_cache,
+    "chat_cache":        chatcache.chat_cache,
+}
+
+stats = {"snapshots": 0, "last_bytes": 0, "last_seconds": 0.0, "restore_seconds": 0.0}
+_saving: asyncio.Lock | None = None
+
+
+def snapshot_path() -> str:
+    store = database._store
+    if isinstance(store, JournalStore):
+        return store.snapshot_path
+    return os.path.join(database.PERSIST_DIR, f"cache-w{database.WORKER_ID}.bin")
+
+
+def enabled() -> bool:
+    return isinstance(database._store, JournalStore) or PERSIST_CACHES
+
+
+def _sections(app) -> tuple[dict[str, bytes], int | None]:
+    """현재 상태 직렬화 (이벤트 루프에서 호출, 스냅샷 백엔드는 저널 세대 전환까지)"""
+    dump = lambda obj: pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sections = {}
+    generation = None
+    store = database._store
+    if isinstance(store, JournalStore):
+        generation = store.begin_checkpoint()
+        sections["db"] = dump(database.snapshot_tables())
+    if PERSIST_CACHES:
+        sections["bot_data"] = dump(dict(app.bot_data))
+        sections["pending_payments"] = dump(payment.pending_payments)
+        for name, cache in CACHES.items():
+            sections[name] = dump(cache.dump())
+    sections["meta"] = dump({"journal_gen": generation or 0, "time": time.time(), "worker": database.WORKER_ID})
+    return sections, generation
+
+
+async def save(app) -> dict:
+    """스냅샷 기록 (동시 호출은 하나씩)"""
+    async with _saving:
+        started = time.perf_counter()
+        sections, generation = _sections(app)
+        path = snapshot_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        size = await asyncio.to_thread(write_snapshot, path, sections)
+        if generation is not None:
+            database._store.finish_checkpoint(generation)
+        stats["snapshots"] += 1
+        stats["last_bytes"] = size
+        stats["last_seconds"] = time.perf_counter() - started
+        logging.info("💾 스냅샷 저장: %.1fMB, %.2f초", size / 1e6, stats["last_seconds"])
+        return stats
+
+
+def restore(app) -> None:
+    """스냅샷의 캐시·bot_data·대기 결제 복원 (database.init_storage 다음에 호출)"""
+    started = time.perf_counter()
+    reader = SnapshotReader.open(snapshot_path()) if PERSIST_CACHES else None
+    if reader:
+        try:
+            app.bot_data.update(reader.load("bot_data", {}))
+            payment.pending_payments.update(reader.load("pending_payments", {}))
+            counts = {name: cache.restore(reader.load(name, [])) for name, cache in CACHES.items()}
+        finally:
+            reader.close()
+        logging.info("♻️ 캐시 복원: %s", counts)
+    stats["restore_seconds"] = time.perf_counter() - started
+
+
+async def _flush_job(ctx) -> None:
+    store = database._store
+    store.flush()
+    if isinstance(store, JournalStore) and store.journal_bytes >= PERSIST_JOURNAL_BYTES:
+        await save(ctx.application)
+
+
+async def _snapshot_job(ctx) -> None:
+    await save(ctx.application)
+
+
+def install(app) -> None:
+    """복원 후 주기 작업 등록 (on_startup에서 database.init_storage 다음에 호출)"""
+    global _saving
+    _saving = asyncio.Lock()
+    if not enabled():
+        return
+    restore(app)
+    if isinstance(database._store, JournalStore):
+        app.job_queue.run_repeating(_flush_job, interval=PERSIST_FLUSH_INTERVAL, first=PERSIST_FLUSH_INTERVAL,
+                                    name="journal_flush")
+    app.job_queue.run_repeating(_snapshot_job, interval=PERSIST_INTERVAL, first=PERSIST_INTERVAL, name="snapshot")
+
+
+async def shutdown(app) -> None:
+    """종료 시 마지막 스냅샷 (저널 flush·fsync는 database.close_storage에서)"""
+    if _saving is None or not enabled():
+        return
+    try:
+        await save(app)
+    except Exception:
+        logging.exception("종료 스냅샷 실패")
@@ -0,0 +1,116 @@
+# prefilter.py
+# 번역 전 전처리 파이프라인
+#  - URL·이메일·지갑 주소·@핸들·긴 숫자(전화번호, 금액 등)는 자리표시자로 바꿔 번역 요청에서 빼고
+#    번역문에 원래 값을 되돌림 (요청 크기 감소 + 값이 번역기에 의해 바뀌지 않음)
+#  - 가린 뒤 번역할 글자가 없으면(이모지·숫자·URL·멘션만) 언어 감지·번역 호출 없이 건너뜀
+#  - 감탄사·웃음(ok, ㅋㅋ, haha …)만으로 된 메시지 건너뛰기는 PREFILTER_SKIP_WORDS를 설정했을 때만
+#    (여러 언어가 섞인 그룹에서는 이런 짧은 답도 전달되어야 하므로 기본은 번역)
+#  - 규칙은 RULES 순서대로 적용 (MASK 규칙 → SKIP 규칙), add_rule로 추가, 규칙별 적중 수는 hits
+
+import os
+import re
+from typing import NamedTuple
+from dotenv import load_dotenv
+
+load_dotenv()
+PREFILTER_ENABLED         = os.getenv("PREFILTER_ENABLED", "1") == "1"
+PREFILTER_MASK_MIN_DIGITS = int(os.getenv("PREFILTER_MASK_MIN_DIGITS", "5"))   # 이 자릿수 이상인 숫자만 가림 (짧은 숫자는 문맥 유지)
+PREFILTER_SKIP_WORDS      = os.getenv("PREFILTER_SKIP_WORDS", "")   # 예: "ok,okay,lol,ㅇㅋ,ㅇㅇ" (비어 있으면 감탄사 규칙 없음)
+
+MASK = "mask"   # 찾은 부분을 자리표시자로 바꿈
+SKIP = "skip"   # 가린 뒤 남은 글자(자리표시자 제외)가 패턴과 완전히 일치하면 메시지를 건너뜀
+
+# 번역기가 전각 괄호·공백을 넣어도 되돌릴 수 있게 느슨하게 찾음
+_PLACEHOLDER = re.compile(r"[\[［【]\s*[#＃]\s*([0-9０-９]+)\s*[\]］】]")
+
+
+class Rule(NamedTuple):
+    name: str
+    action: str           # MASK / SKIP
+    pattern: re.Pattern
+
+
+class Prepared(NamedTuple):
+    text: str             # 번역에 보낼 문장 (가린 부분은 [#0], [#1]…)
+    tokens: tuple         # 자리표시자 번호 순서의 원래 값
+    skip: str | None      # 건너뛴 규칙 이름, 번역 대상이면 None
+
+    def restore(self, translated: str | None) -> str | None:
+        """번역문의 자리표시자를 원래 값으로 되돌림 (None은 그대로)"""
+        if not self.tokens or translated is None:
+            return translated
+
+        def put_back(m: re.Match) -> str:
+            i = int(m.group(1))
+            return self.tokens[i] if i < len(self.tokens) else m.group(0)
+        return _PLACEHOLDER.sub(put_back, translated)
+
+
+def _skip_words(spec: str) -> re.Pattern:
+    words = sorted({w.strip().lower() for w in spec.split(",") if w.strip()}, key=len, reverse=True)
+    alt = "|".join(map(re.escape, words)) or "(?!)"
+    # 단어·웃음(ㅋㅋ, ㅠㅠ, haha, kkk)만으로 된 문장, 구두점·이모지·숫자 사이사이 허용
+    # (?=(…))\1 은 원자 그룹: 단어 경계가 정해져 있어 실패해도 되돌아가며 다시 시도하지 않음
+    laugh = r"[ㅋㅎㅠㅜㄷ]+|(?:ha){2,}|(?:he){2,}|(?:hi){2,}|k{2,}"
+    return re.compile(rf"(?i)[\W\d_]*(?:(?=({alt}|{laugh}))\1(?![^\W\d_])[\W\d_]*)+")
+
+
+RULES: list[Rule] = [
+    Rule("url",      MASK, re.compile(r"(?i)\b(?:https?://|www\.|t\.me/)\S+")),
+    Rule("email",    MASK, re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")),
+    # TRON·ETH·BTC 주소, 64자리 트랜잭션 해시
+    Rule("wallet",   MASK, re.compile(
+        r"\b(?:T[1-9A-HJ-NP-Za-km-z]{33}|0x[0-9a-fA-F]{40}|(?:0x)?[0-9a-fA-F]{64}"
+        r"|bc1[02-9ac-hj-np-z]{25,59}|[13][1-9A-HJ-NP-Za-km-z]{25,34})\b")),
+    Rule("mention",  MASK, re.compile(r"(?<![\w@])@\w{3,}")),
+    Rule("number",   MASK, re.compile(rf"\+?(?:\d[ \-.,/]?){{{max(0, PREFILTER_MASK_MIN_DIGITS - 1)},}}\d")),
+    Rule("no_text",  SKIP, re.compile(r"[\W\d_]*")),
+]
+if PREFILTER_SKIP_WORDS.strip():
+    RULES.append(Rule("interjection", SKIP, _skip_words(PREFILTER_SKIP_WORDS)))
+
+hits: dict[str, int] = {rule.name: 0 for rule in RULES}
+stats = {"messages": 0, "skipped": 0, "masked": 0, "chars_in": 0, "chars_out": 0}
+
+
+def add_rule(rule: Rule, before: str | None = None) -> None:
+    """규칙 추가 (before 규칙 앞에, 없으면 같은 종류 규칙의 마지막에)"""
+    names = [r.name for r in RULES]
+    if before in names:
+        index = names.index(before)
+    else:
+        index = max((i + 1 for i, r in enumerate(RULES) if r.action == rule.action), default=len(RULES))
+    RULES.insert(index, rule)
+    hits.setdefault(rule.name, 0)
+
+
+def prepare(text: str) -> Prepared:
+    """번역 전처리: 가릴 부분은 자리표시자로, 번역할 내용이 없으면 skip에 규칙 이름"""
+    if not PREFILTER_ENABLED:
+        return Prepared(text, (), None)
+    stats["messages"] += 1
+    tokens: list[str] = []
+
+    def mask(m: re.Match) -> str:
+        tokens.append(m.group(0))
+        return f"[#{len(tokens) - 1}]"
+
+    masked = text
+    for rule in RULES:
+        if rule.action == MASK:
+            before = len(tokens)
+            masked = rule.pattern.sub(mask, masked)
+            if len(tokens) > before:
+                hits[rule.name] += 1
+            continue
+        rest = _PLACEHOLDER.sub(" ", masked).strip()
+        if rule.pattern.fullmatch(rest):
+            hits[rule.name] += 1
+            stats["skipped"] += 1
+            return Prepared(masked, tuple(tokens), rule.name)
+
+    if tokens:
+        stats["masked"] += 1
+    stats["chars_in"] += len(text)       # 번역에 보낸 메시지의 원문 / 가린 뒤 글자 수
+    stats["chars_out"] += len(masked)
+    return Prepared(masked, tuple(tokens), None)
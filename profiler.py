@@ -0,0 +1,199 @@
+# profiler.py
+# 운영 중 성능 진단 (소유자 /profile, /memsnapshot)
+#  - /profile <초>: 별도 스레드가 PROFILE_INTERVAL마다 sys._current_frames()로 이벤트 루프 스레드의 호출 스택을 샘플링
+#    → collapsed stack 파일 (flamegraph.pl, speedscope 등에서 바로 열림), 루프 쪽 코드는 계측하지 않음
+#  - /memsnapshot [초]: tracemalloc 스냅샷을 모듈별로 집계 (할당 스택에서 가장 안쪽의 봇 모듈 기준)
+#    추적이 꺼져 있으면 그 시간 동안만 켰다가 끔 → 그동안 할당되어 아직 남아 있는 메모리만 보임
+#    (시작부터 추적하려면 PYTHONTRACEMALLOC=<스택 깊이> 로 실행)
+#  - 종류별로 한 번에 하나씩, 기다림·집계는 작업 스레드에서 (업데이트 처리를 막지 않음)
+#    단 tracemalloc 스냅샷 복사는 GIL을 잡은 채 진행 → 추적 중인 블록 1만 개당 약 15ms 루프가 멈춤
+#  - 종료 시 진행 중인 수집을 바로 끝내고 그때까지의 결과를 전송 (stop, outbox.stop 전에 호출)
+
+import os
+import sys
+import time
+import asyncio
+import sysconfig
+import linecache
+import threading
+import functools
+import tracemalloc
+from collections import Counter
+from dotenv import load_dotenv
+
+load_dotenv()
+PROFILE_INTERVAL    = float(os.getenv("PROFILE_INTERVAL", "0.005"))      # 샘플 간격(초)
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+MEMSNAPSHOT_SECONDS = float(os.getenv("MEMSNAPSHOT_SECONDS", "30"))      # 추적이 꺼져 있을 때 기본 추적 시간(초)
+MEMSNAPSHOT_FRAMES  = int(os.getenv("MEMSNAPSHOT_FRAMES", "8"))          # 할당마다 저장할 스택 깊이
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MODULES = ("database", "translator", "logger", "payment")   # 할당이 없어도 항상 표시
+_STDLIB = sysconfig.get_paths()["stdlib"]
+
+profile_lock = asyncio.Lock()
+memsnapshot_lock = asyncio.Lock()
+_cancel = threading.Event()
+_tasks: set[asyncio.Task] = set()
+
+
+@functools.lru_cache(maxsize=4096)
+def _short(filename: str) -> str:
+    """봇 모듈은 저장소 기준, 라이브러리는 패키지 기준 경로"""
+    if filename.startswith(ROOT + os.sep):
+        return os.path.relpath(filename, ROOT)
+    if "site-packages" + os.sep in filename:
+        return filename.rpartition("site-packages" + os.sep)[2]
+    if filename.startswith(_STDLIB + os.sep):
+        return os.path.relpath(filename, _STDLIB)
+    return filename if filename.startswith("<") else os.path.basename(filename)
+
+
+def _module(filename: str) -> str:
+    """집계용 모듈 이름 (database, telegram, asyncio …)"""
+    first = _short(filename).split(os.sep, 1)[0]
+    return first[:-3] if first.endswith(".py") else first
+
+
+def _size(n: float) -> str:
+    if n >= 1048576:
+        return f"{n / 1048576:.1f}MB"
+    return f"{n / 1024:.0f}KB" if n >= 1024 else f"{n:.0f}B"
+
+
+def tracing() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def spawn(coro) -> asyncio.Task:
+    """종료 시 기다릴 수 있도록 추적하는 백그라운드 작업"""
+    task = asyncio.create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+async def stop(app=None, timeout: float = 10.0) -> None:
+    _cancel.set()
+    if _tasks:
+        await asyncio.wait(list(_tasks), timeout=timeout)
+
+
+# ────────────────────────────
+# 샘플링 프로파일
+# ────────────────────────────
+
+class Sampler(threading.Thread):
+    def __init__(self, thread_id: int, seconds: float, interval: float = PROFILE_INTERVAL):
+        super().__init__(name="profiler", daemon=True)
+        self.thread_id = thread_id
+        self.seconds = seconds
+        self.interval = interval
+        self.stacks: Counter = Counter()   # "바깥;…;안쪽" → 샘플 수
+        self.samples = 0
+        self.elapsed = 0.0
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _label(filename: str, name: str) -> str:
+        return f"{name} ({_short(filename)})"
+
+    def run(self) -> None:
+        started = time.monotonic()
+        deadline = started + self.seconds
+        while time.monotonic() < deadline and not _cancel.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(self._label(code.co_filename, code.co_name))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+        self.elapsed = time.monotonic() - started
+
+    def collapsed(self) -> bytes:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common()).encode()
+
+    def summary(self, limit: int = 10) -> str:
+        if not self.samples:
+            return "❗ 수집된 샘플이 없습니다."
+        own = Counter()
+        idle = 0
+        for stack, n in self.stacks.items():
+            leaf = stack.rpartition(";")[2]
+            if leaf.startswith(("select (", "poll (")) and "selectors.py" in leaf:   # 이벤트 대기
+                idle += n
+            else:
+                own[leaf] += n
+        busy = self.samples - idle
+        lines = [f"🔬 프로파일 {self.elapsed:.1f}초 · 샘플 {self.samples:,}개 · 루프 사용률 {busy / self.samples * 100:.0f}%"]
+        if own:
+            lines += ["", "자체 시간 상위 (바쁜 샘플 대비):"]
+            lines += [f"{n / busy * 100:5.1f}%  {leaf}" for leaf, n in own.most_common(limit)]
+        return "\n".join(lines)
+
+
+async def profile(seconds: float) -> Sampler:
+    """현재 이벤트 루프를 seconds초 동안 샘플링 (기다림은 작업 스레드에서)"""
+    async with profile_lock:
+        sampler = Sampler(threading.get_ident(), min(seconds, PROFILE_MAX_SECONDS))
+        sampler.start()
+        await asyncio.to_thread(sampler.join)
+        return sampler
+
+
+# ────────────────────────────
+# 메모리 스냅샷
+# ────────────────────────────
+
+def _summarize(snapshot: tracemalloc.Snapshot, limit: int = 10) -> tuple[dict, list]:
+    """({모듈: [크기, 블록 수]}, [(위치, 크기, 블록 수)]) — 위치는 가장 안쪽의 봇 모듈 줄"""
+    modules: dict[str, list[int]] = {name: [0, 0] for name in MODULES}
+    places: dict[tuple[str, int], list[int]] = {}
+    own = (tracemalloc.__file__, __file__)   # 스냅샷 작업 자신의 할당은 제외
+    for trace in snapshot.traces:
+        frames = trace.traceback
+        if frames[-1].filename in own:
+            continue
+        frame = next((f for f in reversed(frames) if f.filename.startswith(ROOT + os.sep)), frames[-1])
+        entry = modules.setdefault(_module(frame.filename), [0, 0])
+        entry[0] += trace.size
+        entry[1] += 1
+        if frame.filename.startswith(ROOT + os.sep):
+            place = places.setdefault((frame.filename, frame.lineno), [0, 0])
+            place[0] += trace.size
+            place[1] += 1
+    top = sorted(places.items(), key=lambda kv: -kv[1][0])[:limit]
+    return modules, [(key, size, count) for key, (size, count) in top]
+
+
+async def memsnapshot(seconds: float) -> str:
+    """tracemalloc 스냅샷 모듈별 요약 (추적이 꺼져 있으면 seconds초 동안 켬)"""
+    async with memsnapshot_lock:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(MEMSNAPSHOT_FRAMES)
+            await asyncio.to_thread(_cancel.wait, min(seconds, PROFILE_MAX_SECONDS))
+        try:
+            traced, peak = tracemalloc.get_traced_memory()
+            snapshot = await asyncio.to_thread(tracemalloc.take_snapshot)
+        finally:
+            if started:
+                tracemalloc.stop()
+        modules, top = await asyncio.to_thread(_summarize, snapshot)
+
+    scope = f"최근 {seconds:g}초 동안 할당되어 남은 메모리" if started else "추적 시작 이후 할당되어 남은 메모리"
+    lines = [f"🧠 메모리 스냅샷 ({scope})", f"추적 중 {_size(traced)} (최대 {_size(peak)})", "",
+             "모듈별 (가장 안쪽의 봇 모듈 기준):"]
+    for rank, (name, (size, count)) in enumerate(sorted(modules.items(), key=lambda kv: -kv[1][0])):
+        if name in MODULES or (size and rank < 15):
+            lines.append(f"• {name}: {_size(size)} ({count:,}블록)")
+    if top:
+        lines += ["", "봇 코드 할당 위치 상위:"]
+        for (filename, lineno), size, count in top:
+            source = linecache.getline(filename, lineno).strip()[:60]
+            lines.append(f"• {_short(filename)}:{lineno} {_size(size)} ({count:,}) {source}")
+    return "\n".join(lines)
@@ -0,0 +1,66 @@
+# script_detect.py
+# 유니코드 문자 체계 + 베트남어 성조 통계 기반 오프라인 언어 감지
+# 판단이 애매한 경우(순수 ASCII 라틴, 혼합 문자 등)에만 원격 /detect 호출
+
+import unicodedata
+from typing import NamedTuple
+
+# 베트남어에만 쓰이는 라틴 문자 (đ, ă, ơ, ư 및 U+1EA0–U+1EF9 성조 조합 문자)
+_VI_LETTERS = set("đĐăĂơƠưƯ")
+
+
+class Detection(NamedTuple):
+    lang: str | None      # ko / zh / km / vi, 판단 불가 시 None
+    confidence: float     # 0.0 ~ 1.0
+
+
+def _script(ch: str) -> str | None:
+    cp = ord(ch)
+    if 0xAC00 <= cp <= 0xD7A3 or 0x1100 <= cp <= 0x11FF or 0x3130 <= cp <= 0x318F:
+        return "hangul"
+    if 0x4E00 <= cp <= 0x9FFF or 0x3400 <= cp <= 0x4DBF or 0xF900 <= cp <= 0xFAFF:
+        return "han"
+    if 0x3040 <= cp <= 0x30FF:
+        return "kana"
+    if 0x1780 <= cp <= 0x17FF or 0x19E0 <= cp <= 0x19FF:
+        return "khmer"
+    if (ch.isalpha() and cp < 0x250) or 0x1E00 <= cp <= 0x1EFF:
+        return "latin"
+    if ch.isalpha():
+        return "other"
+    return None
+
+
+def detect(text: str) -> Detection:
+    """문자 체계 비율로 언어 추정, 신뢰도와 함께 반환"""
+    counts = {"hangul": 0, "han": 0, "kana": 0, "khmer": 0, "latin": 0, "other": 0}
+    vi_marks = 0      # 베트남어 고유 문자 수
+    accented = 0      # 발음 구별 기호가 붙은 라틴 문자 수
+    for ch in unicodedata.normalize("NFC", text):
+        script = _script(ch)
+        if script is None:
+            continue
+        counts[script] += 1
+        if script == "latin" and not ch.isascii():
+            accented += 1
+            if ch in _VI_LETTERS or 0x1EA0 <= ord(ch) <= 0x1EF9:
+                vi_marks += 1
+
+    total = sum(counts.values())
+    if not total:
+        return Detection(None, 0.0)
+    script, top = max(counts.items(), key=lambda kv: kv[1])
+    share = top / total
+
+    if script == "hangul":
+        return Detection("ko", share)
+    if script == "han":
+        # 가나가 섞여 있으면 일본어 가능성 → 원격 판단
+        return Detection(None, 0.0) if counts["kana"] else Detection("zh", share)
+    if script == "khmer":
+        return Detection("km", share)
+    if script == "latin" and vi_marks:
+        # 베트남어 문장은 보통 글자의 15% 이상에 성조·발음 기호가 붙음
+        ratio = accented / counts["latin"]
+        return Detection("vi", share * min(1.0, ratio / 0.15))
+    return Detection(None, 0.0)
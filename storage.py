@@ -0,0 +1,928 @@
+# storage.py
+# database.py 뒤에서 동작하는 영속 저장소 백엔드
+#  - MemoryStore : 저장하지 않음 (테스트·개발용)
+#  - SQLiteStore : WAL 모드 SQLite, 전용 쓰기 스레드에서 N행 / T밀리초 단위 일괄 커밋
+#    공유 모드(origin 지정)에서는 여러 워커 프로세스가 같은 파일을 쓰며,
+#    모든 변경을 changes 테이블에 남겨 다른 워커가 poll()로 따라잡음
+#    이벤트 루프는 쓰기 스레드를 기다리지 않음 (커밋 완료가 필요하면 쓰기 스레드가 채우는 future를 await)
+#    저장된 로그는 FTS5 log_terms에 logsearch 토큰으로 색인 (쓰기 스레드가 커밋 후 log_index.upto부터 이어서,
+#    여러 워커가 나눠 맡아도 upto로 중복 없이), 토큰 규칙을 바꾸면 두 테이블을 지워 다시 색인
+#  - JournalStore: mmap 스냅샷 + 추가 전용 변경 저널 (단일 프로세스, 재시작 시 저널만 재생)
+
+import os
+import json
+import mmap
+import time
+import queue
+import asyncio
+import pickle
+import struct
+import sqlite3
+import logging
+import threading
+import concurrent.futures
+from collections import deque
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS codes (
+    code          TEXT PRIMARY KEY,
+    owner         INTEGER NOT NULL,
+    expires       REAL    NOT NULL,
+    is_owner_code INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS codes_owner ON codes(owner, is_owner_code);
+
+CREATE TABLE IF NOT EXISTS groups (
+    group_id      INTEGER PRIMARY KEY,
+    code          TEXT    NOT NULL,
+    expires       REAL    NOT NULL,
+    extend_count  INTEGER NOT NULL,
+    connected     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS groups_code ON groups(code);
+
+CREATE TABLE IF NOT EXISTS group_logs (
+    id            INTEGER PRIMARY KEY,
+    group_id      INTEGER NOT NULL,
+    time          REAL    NOT NULL,
+    user_id       INTEGER NOT NULL,
+    username      TEXT,
+    message       TEXT
+);
+CREATE INDEX IF NOT EXISTS group_logs_group_time ON group_logs(group_id, time);
+
+CREATE TABLE IF NOT EXISTS free_quota (
+    owner         INTEGER PRIMARY KEY,
+    expired       INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS participants (
+    group_id      INTEGER NOT NULL,
+    user_id       INTEGER NOT NULL,
+    username      TEXT,
+    lang          TEXT,
+    PRIMARY KEY (group_id, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS settings (
+    key           TEXT PRIMARY KEY,
+    value         TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS payments (
+    tx            TEXT PRIMARY KEY,
+    code          TEXT NOT NULL,
+    time          REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS changes (
+    seq           INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind          TEXT    NOT NULL,
+    key           TEXT    NOT NULL,
+    origin        INTEGER NOT NULL
+);
+"""
+
+# 저장된 로그 검색 색인: rowid = group_logs.id, 메시지의 logsearch 토큰 + 그룹 토큰 (내용 없는 FTS5)
+# ascii 토크나이저는 ASCII가 아닌 글자를 모두 토큰 글자로 보므로 한글·한자·크메르 토큰도 그대로 한 토큰
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS log_terms USING fts5(
+    terms, content='', detail=none, columnsize=0, tokenize="ascii tokenchars '_'"
+);
+CREATE TABLE IF NOT EXISTS log_index (
+    id            INTEGER PRIMARY KEY CHECK (id = 0),
+    upto          INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO log_index (id, upto) VALUES (0, 0);
+"""
+LOG_INDEX_BATCH = 2000   # 한 트랜잭션에서 색인할 로그 수 (기존 기록은 쓰기 사이사이 나눠서)
+
+# 쓰기 스레드가 재사용하는 고정 SQL (sqlite3 문장 캐시로 준비된 문장 재사용)
+_SQL = {
+    "put_code":        "INSERT OR REPLACE INTO codes (code, owner, expires, is_owner_code) VALUES (?, ?, ?, ?)",
+    "delete_code":     "DELETE FROM codes WHERE code = ?",
+    "put_group":       "INSERT OR REPLACE INTO groups (group_id, code, expires, extend_count, connected) VALUES (?, ?, ?, ?, ?)",
+    "delete_group":    "DELETE FROM groups WHERE group_id = ?",
+    "put_quota":       "INSERT OR REPLACE INTO free_quota (owner, expired) VALUES (?, ?)",
+    "append_log":      "INSERT INTO group_logs (group_id, time, user_id, username, message) VALUES (?, ?, ?, ?, ?)",
+    "put_participant": "INSERT OR REPLACE INTO participants (group_id, user_id, username, lang) VALUES (?, ?, ?, ?)",
+    "put_setting":     "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+    "put_payment":     "INSERT OR IGNORE INTO payments (tx, code, time) VALUES (?, ?, ?)",
+    "change":          "INSERT INTO changes (kind, key, origin) VALUES (?, ?, ?)",
+    "prune_changes":   "DELETE FROM changes WHERE seq < ?",
+}
+
+# 변경 연산 → 다른 워커에 알릴 종류
+_CHANGE_KIND = {
+    "put_code": "code", "delete_code": "code",
+    "put_group": "group", "delete_group": "group",
+    "put_quota": "quota", "put_setting": "setting",
+}
+
+_CODE_COLUMNS  = "owner, expires, is_owner_code"
+_GROUP_COLUMNS = "code, expires, extend_count, connected"
+
+
+def _code_row(owner, expires, is_owner_code) -> dict:
+    return {"owner": owner, "expires": expires, "is_owner_code": bool(is_owner_code)}
+
+
+def _group_row(code, expires, extend_count, connected) -> dict:
+    return {"code": code, "expires": expires, "extend_count": extend_count, "connected": bool(connected)}
+
+
+def _group_term(group_id: int) -> str:
+    """색인 안에서 그룹을 가리키는 토큰 (메시지 토큰과 겹쳐도 group_id로 다시 확인)"""
+    return f"_g{group_id}".replace("-", "n")
+
+
+_STOP = object()
+
+
+class MemoryStore:
+    """아무것도 저장하지 않는 백엔드 (모듈 dict만 사용)"""
+
+    def load(self, codes, groups, logs, participants, log_limit: int = 0, expired_free=None,
+             settings=None, payments=None, participant_langs=None) -> None:
+        pass
+
+    def put_code(self, code: str, info: dict) -> None:
+        pass
+
+    def delete_code(self, code: str) -> None:
+        pass
+
+    def put_group(self, group_id: int, info: dict) -> None:
+        pass
+
+    def delete_group(self, group_id: int) -> None:
+        pass
+
+    def put_quota(self, owner_id: int, expired: int) -> None:
+        pass
+
+    def append_log(self, group_id: int, ts: float, user_id: int, username: str, message: str) -> None:
+        pass
+
+    def put_participant(self, group_id: int, user_id: int, username: str, lang: str | None = None) -> None:
+        pass
+
+    def put_setting(self, key: str, value) -> None:
+        pass
+
+    def put_payment(self, tx: str, code: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    async def flush_async(self) -> None:
+        self.flush()
+
+    def commit_soon(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStore(MemoryStore):
+    """WAL 모드 SQLite 백엔드, 모든 쓰기는 백그라운드 스레드에서 일괄 처리"""
+
+    def __init__(self, path: str, batch_rows: int = 500, batch_ms: float = 200, origin: int | None = None):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.batch_ms = batch_ms
+        self.origin = origin              # 공유 모드의 워커 번호 (None이면 단독 프로세스)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._conn: sqlite3.Connection | None = None   # 이벤트 루프 스레드용 (조회)
+        self.last_seq = 0
+        self.committed_rows = 0
+        self.fts = False                  # FTS5 사용 가능 (없으면 저장된 로그 검색은 부분 문자열 스캔)
+        self.index_terms = None           # 메시지 → 색인 토큰 (set_indexer로 지정)
+        self._index_behind = False        # 색인되지 않은 로그가 남아 있을 수 있음
+
+    @property
+    def shared(self) -> bool:
+        return self.origin is not None
+
+    def _connect(self, isolation_level: str | None = "") -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64,
+                               isolation_level=isolation_level)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    # ── 시작 시 적재 ──
+    def load(self, codes, groups, logs, participants, log_limit: int = 0, expired_free=None,
+             settings=None, payments=None, participant_langs=None) -> None:
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            logging.warning("SQLite FTS5 사용 불가, 저장된 로그 검색은 부분 문자열 스캔: %r", e)
+        # 언어 열 추가 이전에 만든 파일
+        if "lang" not in [row[1] for row in conn.execute("PRAGMA table_info(participants)")]:
+            conn.execute("ALTER TABLE participants ADD COLUMN lang TEXT")
+        # 적재 이전의 변경은 이미 반영된 것으로 간주
+        self.last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        for code, *row in conn.execute(f"SELECT code, {_CODE_COLUMNS} FROM codes"):
+            codes[code] = _code_row(*row)
+        for gid, *row in conn.execute(f"SELECT group_id, {_GROUP_COLUMNS} FROM groups"):
+            groups[gid] = _group_row(*row)
+        if settings is not None:
+            settings.update((k, json.loads(v)) for k, v in conn.execute("SELECT key, value FROM settings"))
+        if payments is not None:
+            payments.update(conn.execute("SELECT tx, code FROM payments"))
+        if expired_free is not None:
+            expired_free.update(conn.execute("SELECT owner, expired FROM free_quota"))
+        for gid, uid, uname, lang in conn.execute("SELECT group_id, user_id, username, lang FROM participants"):
+            participants.setdefault(gid, {})[uid] = uname
+            if lang and participant_langs is not None:
+                participant_langs.setdefault(gid, {})[uid] = lang
+        if log_limit:
+            rows = conn.execute(
+                "SELECT group_id, time, user_id, username, message FROM ("
+                "  SELECT *, ROW_NUMBER() OVER (PARTITION BY group_id ORDER BY id DESC) AS rn FROM group_logs"
+                ") WHERE rn <= ? ORDER BY id",
+                (log_limit,),
+            )
+            for gid, ts, uid, uname, msg in rows:
+                logs.setdefault(gid, []).append({"time": ts, "user_id": uid, "username": uname, "message": msg})
+        conn.commit()
+        conn.close()
+        self._conn = self._connect(isolation_level=None)
+        self._thread = threading.Thread(target=self._writer, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    # ── 쓰기 요청 (이벤트 루프에서는 큐에 넣기만 함) ──
+    def _put(self, op: str, params: tuple, key=None) -> None:
+        self._queue.put((op, params))
+        if self.shared and op in _CHANGE_KIND:
+            self._queue.put(("change", (_CHANGE_KIND[op], str(key), self.origin)))
+
+    def put_code(self, code, info):
+        self._put("put_code", (code, info["owner"], info["expires"], int(info.get("is_owner_code", False))), code)
+
+    def delete_code(self, code):
+        self._put("delete_code", (code,), code)
+
+    def put_group(self, group_id, info):
+        self._put("put_group", (
+            group_id, info["code"], info["expires"], info.get("extend_count", 0), int(bool(info.get("connected")))
+        ), group_id)
+
+    def delete_group(self, group_id):
+        self._put("delete_group", (group_id,), group_id)
+
+    def put_quota(self, owner_id, expired):
+        self._put("put_quota", (owner_id, expired), owner_id)
+
+    def append_log(self, group_id, ts, user_id, username, message):
+        self._put("append_log", (group_id, ts, user_id, username, message))
+
+    def put_participant(self, group_id, user_id, username, lang=None):
+        self._put("put_participant", (group_id, user_id, username, lang))
+
+    def put_setting(self, key, value):
+        self._put("put_setting", (key, json.dumps(value, ensure_ascii=False)), key)
+
+    def put_payment(self, tx, code):
+        self._put("put_payment", (tx, code, time.time()))
+
+    # ── 공유 모드: 다른 워커의 변경 조회 ──
+    def poll(self) -> list[tuple[str, str]]:
+        """마지막 조회 이후 다른 워커가 남긴 (종류, 키) 변경"""
+        changes = []
+        for seq, kind, key, origin in self._conn.execute(
+            "SELECT seq, kind, key, origin FROM changes WHERE seq > ? ORDER BY seq", (self.last_seq,)
+        ):
+            self.last_seq = seq
+            if origin != self.origin:
+                changes.append((kind, key))
+        return changes
+
+    def prune_changes(self, keep: int = 100000) -> None:
+        """오래된 변경 기록 정리 (모든 워커가 이미 지나간 구간)"""
+        self._queue.put(("prune_changes", (max(0, self.last_seq - keep),)))
+
+    def read_code(self, code: str) -> dict | None:
+        row = self._conn.execute(f"SELECT {_CODE_COLUMNS} FROM codes WHERE code = ?", (code,)).fetchone()
+        return _code_row(*row) if row else None
+
+    def read_group(self, group_id: int) -> dict | None:
+        row = self._conn.execute(f"SELECT {_GROUP_COLUMNS} FROM groups WHERE group_id = ?", (group_id,)).fetchone()
+        return _group_row(*row) if row else None
+
+    def read_quota(self, owner_id: int) -> int:
+        row = self._conn.execute("SELECT expired FROM free_quota WHERE owner = ?", (owner_id,)).fetchone()
+        return row[0] if row else 0
+
+    def read_setting(self, key: str):
+        row = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def read_logs(self, group_id: int, limit: int | None = None) -> list[dict]:
+        rows = self._conn.execute(
+            "SELECT time, user_id, username, message FROM group_logs WHERE group_id = ? ORDER BY id DESC LIMIT ?",
+            (group_id, -1 if limit is None else limit),
+        ).fetchall()
+        return [{"time": t, "user_id": u, "username": n, "message": m} for t, u, n, m in reversed(rows)]
+
+    def set_indexer(self, terms) -> None:
+        """저장된 로그 색인에 쓸 토큰 함수 지정 (메시지 → 토큰), 쓰기 스레드가 밀린 로그부터 색인"""
+        self.index_terms = terms
+        self._index_behind = True
+        self.commit_soon()   # 쓰기 스레드 깨움
+
+    def index_lag(self) -> int:
+        """아직 색인되지 않은 로그 수"""
+        if not self.fts:
+            return 0
+        return self._conn.execute(
+            "SELECT COALESCE(MAX(id), 0) - (SELECT upto FROM log_index) FROM group_logs").fetchone()[0]
+
+    async def log_boundary(self, group_id: int, skip: int) -> tuple[float, int] | None:
+        """그룹의 최신 skip번째 로그의 (time, id), 없으면 None
+        지금까지 넣은 쓰기를 커밋한 직후 쓰기 스레드에서 조회 (메모리 링에 있는 최신 로그를 건너뛰는 커서)"""
+        def fn(conn):
+            return conn.execute(
+                "SELECT time, id FROM group_logs WHERE group_id = ? ORDER BY time DESC, id DESC LIMIT 1 OFFSET ?",
+                (group_id, skip - 1),
+            ).fetchone()
+        row = await asyncio.wrap_future(self._request("read", fn))
+        return tuple(row) if row else None
+
+    def iter_logs_desc(self, group_id: int, since: float | None = None, until: float | None = None,
+                       before: tuple[float, int] | None = None, contains: list[str] = (),
+                       terms: set[str] = frozenset(), batch: int = 200):
+        """그룹 로그 후보를 최신순으로 하나씩 (별도 읽기 연결, 작업 스레드에서 소비, 최종 판정은 호출 쪽)
+        before: (time, id) 커서, 이보다 앞선 로그만 (같은 시각의 로그도 id로 구분)
+        terms가 있으면 색인된 구간은 log_terms에서 모든 토큰을 가진 로그만, 색인 이후 구간은 contains로 훑음"""
+        conn = self._connect()
+        try:
+            upto = 0
+            if terms and self.fts:
+                upto = conn.execute("SELECT upto FROM log_index").fetchone()[0]
+            stopped = yield from self._scan_desc(conn, group_id, since, until, before, contains, upto, batch)
+            if upto and not stopped:
+                yield from self._match_desc(conn, group_id, since, until, before, terms, upto, batch)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _scan_desc(conn, group_id, since, until, before, contains, after: int, batch: int):
+        """id가 after보다 큰 로그를 부분 문자열로 거르며 최신순으로, since 이전에 닿으면 True 반환"""
+        params = [since if since is not None else 0, until if until is not None else 1e18]
+        if after:
+            # 색인 이후 구간은 보통 마지막 일괄 커밋 몇 개 → rowid 범위로 (+group_id: 그룹 색인 사용 안 함)
+            sql = " WHERE id > ? AND +group_id = ? AND time >= ? AND time <= ?"
+            params = [after, group_id] + params
+        else:
+            sql = " WHERE group_id = ? AND time >= ? AND time <= ?"
+            params = [group_id] + params
+        if before is not None:
+            sql += " AND (time, id) < (?, ?)"
+            params += before
+        for part in contains:
+            sql += r" AND message LIKE ? ESCAPE '\'"
+            params.append("%" + part.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_") + "%")
+        cur = conn.execute("SELECT time, user_id, username, message FROM group_logs" + sql
+                           + " ORDER BY time DESC, id DESC", params)
+        try:
+            while rows := cur.fetchmany(batch):
+                for t, u, n, m in rows:
+                    yield {"time": t, "user_id": u, "username": n, "message": m}
+        finally:
+            cur.close()
+        return since is not None and not after
+
+    @staticmethod
+    def _match_desc(conn, group_id, since, until, before, terms: set[str], upto: int, batch: int):
+        """색인된 구간(id ≤ upto)에서 모든 토큰을 가진 로그를 최신순으로"""
+        query = " ".join(f'"{t}"' for t in (_group_term(group_id), *sorted(terms)))
+        cursor = upto + 1 if before is None else min(upto + 1, before[1])
+        while True:
+            ids = [r[0] for r in conn.execute(
+                "SELECT rowid FROM log_terms WHERE log_terms MATCH ? AND rowid < ? ORDER BY rowid DESC LIMIT ?",
+                (query, cursor, batch),
+            )]
+            if not ids:
+                return
+            cursor = ids[-1]
+            rows = conn.execute(
+                f"SELECT id, group_id, time, user_id, username, message FROM group_logs"
+                f" WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id DESC", ids,
+            )
+            for i, g, t, u, n, m in rows:
+                if g != group_id or (until is not None and t > until):
+                    continue
+                if since is not None and t < since:
+                    return
+                if before is not None and (t, i) >= before:
+                    continue
+                yield {"time": t, "user_id": u, "username": n, "message": m}
+
+    def last_log_id(self) -> int:
+        """지금까지 기록된 마지막 로그 id (대기 중인 쓰기는 먼저 flush)"""
+        return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM group_logs").fetchone()[0]
+
+    def iter_logs(self, group_id: int, since: float | None = None, until: float | None = None,
+                  upto: int | None = None, batch: int = 5000):
+        """그룹 로그 전체를 오래된 순으로 하나씩 (별도 읽기 연결, 다른 스레드에서 소비 가능)
+        upto: 이 id까지만 (조회는 소비할 때 실행되므로 요청 시점의 last_log_id로 범위를 고정)"""
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "SELECT time, user_id, username, message FROM group_logs"
+                " WHERE group_id = ? AND time >= ? AND time <= ? AND id <= ? ORDER BY time, id",
+                (group_id, since if since is not None else 0, until if until is not None else 1e18,
+                 upto if upto is not None else 2 ** 63 - 1),
+            )
+            while rows := cur.fetchmany(batch):
+                for t, u, n, m in rows:
+                    yield {"time": t, "user_id": u, "username": n, "message": m}
+        finally:
+            conn.close()
+
+    def read_participants(self, group_id: int) -> list[tuple[int, str]]:
+        return self._conn.execute(
+            "SELECT user_id, username FROM participants WHERE group_id = ?", (group_id,)
+        ).fetchall()
+
+    def read_group_languages(self, group_id: int) -> dict[str, int]:
+        return dict(self._conn.execute(
+            "SELECT lang, COUNT(*) FROM participants WHERE group_id = ? AND lang IS NOT NULL GROUP BY lang",
+            (group_id,),
+        ).fetchall())
+
+    # ── 공유 모드: 워커 간 원자적 확인 후 변경 ──
+    async def _transact(self, fn):
+        """쓰기 스레드가 대기 중인 쓰기를 먼저 커밋한 뒤 BEGIN IMMEDIATE 트랜잭션에서 fn(conn) 실행
+        (잠금 대기·디스크 쓰기 동안 이벤트 루프는 다른 업데이트를 처리)"""
+        return await asyncio.wrap_future(self._request("transact", fn))
+
+    def _record(self, conn, kind: str, key) -> None:
+        conn.execute(_SQL["change"], (kind, str(key), self.origin or 0))
+
+    async def create_code(self, code: str, info: dict, max_free: int) -> bool:
+        """무료 발급 한도 확인 후 코드 생성"""
+        def fn(conn):
+            owner = info["owner"]
+            used = conn.execute(
+                "SELECT COUNT(*) FROM codes WHERE owner = ? AND is_owner_code = 0", (owner,)
+            ).fetchone()[0]
+            row = conn.execute("SELECT expired FROM free_quota WHERE owner = ?", (owner,)).fetchone()
+            if used + (row[0] if row else 0) >= max_free:
+                return False
+            conn.execute(_SQL["put_code"], (code, owner, info["expires"], int(info.get("is_owner_code", False))))
+            self._record(conn, "code", code)
+            return True
+        return await self._transact(fn)
+
+    async def register_group(self, code: str, group_id: int, now: float) -> tuple[dict, dict] | None:
+        """코드 유효성·그룹 연결 상태 확인 후 연결, (코드, 그룹) 반환 (거부 시 None)"""
+        def fn(conn):
+            row = conn.execute(f"SELECT {_CODE_COLUMNS} FROM codes WHERE code = ?", (code,)).fetchone()
+            if not row or row[1] < now:
+                return None
+            info = _code_row(*row)
+            row = conn.execute(f"SELECT {_GROUP_COLUMNS} FROM groups WHERE group_id = ?", (group_id,)).fetchone()
+            if row:
+                grp = _group_row(*row)
+                if grp["code"] != code or grp["connected"]:
+                    return None
+                grp["connected"] = True
+                grp["expires"] = info["expires"]
+            else:
+                grp = _group_row(code, info["expires"], 0, True)
+            conn.execute(_SQL["put_group"], (group_id, code, grp["expires"], grp["extend_count"], 1))
+            self._record(conn, "group", group_id)
+            return info, grp
+        return await self._transact(fn)
+
+    async def extend_code(self, code: str, seconds: float) -> tuple[dict, dict[int, dict]] | None:
+        """코드 만료일 연장 + 연결된 그룹 동기화, (코드, {그룹: 정보}) 반환 (코드 없으면 None)"""
+        def fn(conn):
+            row = conn.execute(f"SELECT {_CODE_COLUMNS} FROM codes WHERE code = ?", (code,)).fetchone()
+            if not row:
+                return None
+            info = _code_row(*row)
+            info["expires"] += seconds
+            conn.execute("UPDATE codes SET expires = ? WHERE code = ?", (info["expires"], code))
+            self._record(conn, "code", code)
+            conn.execute("UPDATE groups SET expires = ? WHERE code = ? AND connected = 1", (info["expires"], code))
+            groups = {}
+            for gid, *grp in conn.execute(f"SELECT group_id, {_GROUP_COLUMNS} FROM groups WHERE code = ?", (code,)):
+                groups[gid] = _group_row(*grp)
+                if groups[gid]["connected"]:
+                    self._record(conn, "group", gid)
+            return info, groups
+        return await self._transact(fn)
+
+    async def remove_code(self, code: str) -> dict[int, dict] | None:
+        """코드 삭제 + 연결된 그룹 연결 해제, {그룹: 정보} 반환 (코드 없으면 None)"""
+        def fn(conn):
+            if conn.execute(_SQL["delete_code"], (code,)).rowcount == 0:
+                return None
+            self._record(conn, "code", code)
+            conn.execute("UPDATE groups SET connected = 0 WHERE code = ?", (code,))
+            groups = {}
+            for gid, *grp in conn.execute(f"SELECT group_id, {_GROUP_COLUMNS} FROM groups WHERE code = ?", (code,)):
+                groups[gid] = _group_row(*grp)
+                self._record(conn, "group", gid)
+            return groups
+        return await self._transact(fn)
+
+    async def disconnect_group(self, group_id: int) -> dict | None:
+        """그룹 연결 해제 후 현재 정보 반환 (그룹 없으면 None)"""
+        def fn(conn):
+            if conn.execute("UPDATE groups SET connected = 0 WHERE group_id = ?", (group_id,)).rowcount == 0:
+                return None
+            self._record(conn, "group", group_id)
+            row = conn.execute(f"SELECT {_GROUP_COLUMNS} FROM groups WHERE group_id = ?", (group_id,)).fetchone()
+            return _group_row(*row)
+        return await self._transact(fn)
+
+    async def claim_payment(self, tx: str, code: str) -> bool:
+        """TX를 코드 활성화에 사용 처리 (이미 사용된 TX면 False)"""
+        return await self._transact(
+            lambda conn: conn.execute(_SQL["put_payment"], (tx, code, time.time())).rowcount == 1)
+
+    def _request(self, op: str, arg=None) -> concurrent.futures.Future:
+        """쓰기 스레드에 요청, 앞서 넣은 쓰기를 모두 커밋하고 처리하면 완료되는 future"""
+        fut = concurrent.futures.Future()
+        if not self._thread:
+            fut.set_result(None)
+            return fut
+        self._queue.put((op, (arg, fut)))
+        return fut
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """대기 중인 쓰기를 즉시 커밋 (완료까지 대기, 종료·도구용 — 이벤트 루프에서는 flush_async)"""
+        concurrent.futures.wait([self._request("flush")], timeout)
+
+    async def flush_async(self) -> None:
+        """대기 중인 쓰기를 즉시 커밋, 이벤트 루프를 막지 않고 완료까지 대기"""
+        await asyncio.wrap_future(self._request("flush"))
+
+    def commit_soon(self) -> None:
+        """대기 중인 쓰기를 바로 커밋하도록 요청 (기다리지 않음)"""
+        if self._thread:
+            self._queue.put(("flush", (None, None)))
+
+    def close(self) -> None:
+        if not self._thread:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        self._conn.close()
+        self._conn = None
+
+    # ── 쓰기 스레드 ──
+    def _writer(self) -> None:
+        conn = self._connect()
+        pending: list[tuple[str, list]] = []   # 같은 연산이 연속되면 한 묶음으로
+        count = 0
+        deadline = None
+        while True:
+            if deadline is not None:
+                timeout = max(0.0, deadline - time.monotonic())
+            else:
+                timeout = 0 if self._indexing() else None   # 밀린 색인은 요청이 없을 때 이어서
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            stop = item is _STOP
+            flush_now = stop or item is None
+            request = None
+            if item is not None and not stop:
+                op, params = item
+                if op in ("flush", "transact", "read"):
+                    flush_now = True
+                    request = (op, *params)
+                else:
+                    if pending and pending[-1][0] == op:
+                        pending[-1][1].append(params)
+                    else:
+                        pending.append((op, [params]))
+                    count += 1
+                    if deadline is None:
+                        deadline = time.monotonic() + self.batch_ms / 1000
+                    if count >= self.batch_rows:
+                        flush_now = True
+
+            logged = False
+            if flush_now and count:
+                logged = any(op == "append_log" for op, _ in pending)
+                self._commit(conn, pending)
+                self.committed_rows += count
+                pending, count, deadline = [], 0, None
+            if request is not None:
+                self._finish(conn, *request)
+            if stop:
+                break
+            if logged:
+                self._index_behind = True
+            if self._indexing() and (logged or item is None):
+                self._index_behind = self._index_logs(conn)
+        conn.close()
+
+    def _indexing(self) -> bool:
+        return self._index_behind and self.fts and self.index_terms is not None
+
+    def _index_logs(self, conn: sqlite3.Connection, limit: int = LOG_INDEX_BATCH) -> bool:
+        """색인되지 않은 로그를 limit개까지 log_terms에 추가, 더 남았으면 True"""
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                upto = conn.execute("SELECT upto FROM log_index").fetchone()[0]
+                rows = conn.execute(
+                    "SELECT id, group_id, message FROM group_logs WHERE id > ? ORDER BY id LIMIT ?", (upto, limit)
+                ).fetchall()
+                if rows:
+                    conn.executemany(
+                        "INSERT INTO log_terms (rowid, terms) VALUES (?, ?)",
+                        [(i, " ".join((_group_term(g), *self.index_terms(m or "")))) for i, g, m in rows],
+                    )
+                    conn.execute("UPDATE log_index SET upto = ?", (rows[-1][0],))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        except Exception:
+            logging.exception("로그 색인 실패")
+            return False
+        return len(rows) == limit
+
+    @staticmethod
+    def _finish(conn: sqlite3.Connection, op: str, arg, fut: concurrent.futures.Future | None) -> None:
+        """flush·transact·read 요청 처리 (앞서 넣은 쓰기는 이미 커밋됨), 기다리던 쪽이 취소했으면 건너뜀"""
+        if fut is None or not fut.set_running_or_notify_cancel():
+            return
+        if op == "flush":
+            fut.set_result(None)
+            return
+        if op == "read":
+            try:
+                fut.set_result(arg(conn))
+            except Exception as e:
+                fut.set_exception(e)
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = arg(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        except Exception as e:
+            fut.set_exception(e)
+        else:
+            fut.set_result(result)
+
+    @staticmethod
+    def _commit(conn: sqlite3.Connection, pending: list[tuple[str, list]]) -> None:
+        try:
+            with conn:
+                for op, rows in pending:
+                    conn.executemany(_SQL[op], rows)
+        except sqlite3.Error:
+            logging.exception("SQLite 일괄 커밋 실패 (%d묶음)", len(pending))
+
+# ────────────────────────────
+# 스냅샷 파일 + 변경 저널 (DB_BACKEND=snapshot)
+# ────────────────────────────
+# 스냅샷: [MAGIC 8B][섹션 수 u32][(이름 길이 u16, 이름, 오프셋 u64, 길이 u64) × N][섹션 pickle …]
+#   시작 시 mmap으로 열어 필요한 섹션만 해당 구간에서 바로 unpickle
+# 저널: journal-{세대:08d}.bin, put_*/delete_* 한 번마다 pickle 레코드 하나를 추가
+#   스냅샷 meta 섹션의 세대 이상인 저널만 차례로 재생 (스냅샷 기록 중 중단돼도 이전 세대부터 재생)
+
+_SNAPSHOT_MAGIC = b"PPBSNAP1"
+_HEAD = struct.Struct("<8sI")
+_ENTRY = struct.Struct("<QQ")
+
+
+def write_snapshot(path: str, sections: dict[str, bytes]) -> int:
+    """섹션들을 임시 파일에 기록 후 원자적으로 교체, 파일 크기 반환"""
+    names = [name.encode() for name in sections]
+    table = sum(2 + len(n) + _ENTRY.size for n in names)
+    offset = _HEAD.size + table
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEAD.pack(_SNAPSHOT_MAGIC, len(names)))
+        for name, data in zip(names, sections.values()):
+            f.write(struct.pack("<H", len(name)) + name + _ENTRY.pack(offset, len(data)))
+            offset += len(data)
+        for data in sections.values():
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return offset
+
+
+class SnapshotReader:
+    """mmap으로 연 스냅샷 (섹션별 지연 unpickle)"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEAD.unpack_from(self._map, 0)
+        if magic != _SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"스냅샷 형식 아님: {path}")
+        self.sections: dict[str, tuple[int, int]] = {}
+        pos = _HEAD.size
+        for _ in range(count):
+            (size,) = struct.unpack_from("<H", self._map, pos)
+            name = bytes(self._map[pos + 2:pos + 2 + size]).decode()
+            pos += 2 + size
+            self.sections[name] = _ENTRY.unpack_from(self._map, pos)
+            pos += _ENTRY.size
+
+    @classmethod
+    def open(cls, path: str) -> "SnapshotReader | None":
+        """스냅샷이 없거나 손상됐으면 None"""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (ValueError, struct.error, OSError) as e:
+            logging.warning("스냅샷 읽기 실패 (%s): %r", path, e)
+            return None
+
+    def load(self, name: str, default=None):
+        if name not in self.sections:
+            return default
+        offset, size = self.sections[name]
+        with memoryview(self._map)[offset:offset + size] as view:
+            return pickle.loads(view)
+
+    def close(self) -> None:
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class JournalStore(MemoryStore):
+    """스냅샷 + 추가 전용 변경 저널 백엔드 (단일 프로세스)
+    쓰기는 저널 파일 버퍼에 pickle 레코드를 추가만 하고, flush()/close()에서 디스크로 내보냄"""
+
+    def __init__(self, directory: str, name: str = "snapshot.bin"):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, name)
+        self.generation = 0
+        self.journal_bytes = 0          # 마지막 스냅샷 이후 저널 크기
+        self.replayed = 0               # 시작 시 재생한 레코드 수
+        self._journal = None
+
+    def _journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal-{generation:08d}.bin")
+
+    def _journals(self) -> list[tuple[int, str]]:
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith("journal-") and name.endswith(".bin"):
+                found.append((int(name[8:-4]), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    # ── 시작 시 적재 ──
+    def load(self, codes, groups, logs, participants, log_limit: int = 0, expired_free=None,
+             settings=None, payments=None, participant_langs=None) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tables = {}
+        reader = SnapshotReader.open(self.snapshot_path)
+        if reader:
+            self.generation = reader.load("meta", {}).get("journal_gen", 0)
+            tables = reader.load("db", {})
+            reader.close()
+        codes.update(tables.get("codes", {}))
+        groups.update(tables.get("groups", {}))
+        participants.update(tables.get("participants", {}))
+        participant_langs = participant_langs if participant_langs is not None else {}
+        participant_langs.update(tables.get("participant_langs", {}))
+        expired_free = expired_free if expired_free is not None else {}
+        expired_free.update(tables.get("expired_free", {}))
+        settings = settings if settings is not None else {}
+        settings.update(tables.get("settings", {}))
+        payments = payments if payments is not None else {}
+        payments.update(tables.get("payments", {}))
+        rings = {}
+        for gid, (times, user_ids, usernames, messages) in tables.get("logs", {}).items():
+            rings[gid] = deque(zip(times, user_ids, usernames, messages), maxlen=log_limit or None)
+
+        def put_participant(gid, uid, uname, lang=None):
+            participants.setdefault(gid, {})[uid] = uname
+            if lang:
+                participant_langs.setdefault(gid, {})[uid] = lang
+
+        apply = {
+            "put_code":        lambda code, info: codes.__setitem__(code, info),
+            "delete_code":     lambda code: codes.pop(code, None),
+            "put_group":       lambda gid, info: groups.__setitem__(gid, info),
+            "delete_group":    lambda gid: groups.pop(gid, None),
+            "put_quota":       lambda owner, expired: expired_free.__setitem__(owner, expired),
+            "append_log":      lambda gid, *row: rings.setdefault(gid, deque(maxlen=log_limit or None)).append(row),
+            "put_participant": put_participant,
+            "put_setting":     lambda key, value: settings.__setitem__(key, value),
+            "put_payment":     lambda tx, code: payments.__setitem__(tx, code),
+        }
+        for generation, path in self._journals():
+            if generation < self.generation:
+                os.remove(path)   # 이미 스냅샷에 반영된 세대
+                continue
+            self._replay(path, apply)
+            self.generation = generation
+        if log_limit:
+            for gid, rows in rings.items():
+                logs[gid] = [{"time": t, "user_id": u, "username": n, "message": m} for t, u, n, m in rows]
+        self._journal = open(self._journal_path(self.generation), "ab")
+        self.journal_bytes = self._journal.tell()
+
+    def _replay(self, path: str, apply: dict) -> None:
+        with open(path, "rb") as f:
+            good = 0
+            while True:
+                try:
+                    op, params = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError, TypeError, AttributeError, IndexError):
+                    # 비정상 종료로 잘린 마지막 레코드 → 그 앞까지만 유지
+                    logging.warning("저널 끝 손상, %d바이트 이후 버림: %s", good, path)
+                    break
+                apply[op](*params)
+                self.replayed += 1
+                good = f.tell()
+        if good < os.path.getsize(path):
+            os.truncate(path, good)
+
+    # ── 쓰기 (저널에 추가) ──
+    def _append(self, op: str, params: tuple) -> None:
+        data = pickle.dumps((op, params), protocol=pickle.HIGHEST_PROTOCOL)
+        self._journal.write(data)
+        self.journal_bytes += len(data)
+
+    def put_code(self, code, info):
+        self._append("put_code", (code, dict(info)))
+
+    def delete_code(self, code):
+        self._append("delete_code", (code,))
+
+    def put_group(self, group_id, info):
+        self._append("put_group", (group_id, dict(info)))
+
+    def delete_group(self, group_id):
+        self._append("delete_group", (group_id,))
+
+    def put_quota(self, owner_id, expired):
+        self._append("put_quota", (owner_id, expired))
+
+    def append_log(self, group_id, ts, user_id, username, message):
+        self._append("append_log", (group_id, ts, user_id, username, message))
+
+    def put_participant(self, group_id, user_id, username, lang=None):
+        self._append("put_participant", (group_id, user_id, username, lang))
+
+    def put_setting(self, key, value):
+        self._append("put_setting", (key, value))
+
+    def put_payment(self, tx, code):
+        self._append("put_payment", (tx, code))
+
+    # ── 스냅샷 교체 ──
+    def begin_checkpoint(self) -> int:
+        """새 세대 저널로 전환하고 그 세대 번호 반환 (이 시점의 상태를 스냅샷으로 기록할 것)"""
+        self.flush()
+        self._journal.close()
+        self.generation += 1
+        self._journal = open(self._journal_path(self.generation), "ab")
+        self.journal_bytes = 0
+        return self.generation
+
+    def finish_checkpoint(self, generation: int) -> None:
+        """generation 세대 스냅샷 기록 완료 후 이전 세대 저널 삭제"""
+        for gen, path in self._journals():
+            if gen < generation:
+                os.remove(path)
+
+    def flush(self) -> None:
+        if self._journal:
+            self._journal.flush()
+
+    def close(self) -> None:
+        if self._journal:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,170 @@
+# tools/fake_botapi.py
+# 부하 테스트용 로컬 텔레그램 Bot API 대체 서버
+#  - getUpdates(롱 폴링)로 미리 넣어 둔 업데이트를 전달
+#  - sendMessage 등 발신 요청을 시각과 함께 기록
+#  - 응답 지연(latency), 발신 요청의 오류(error_rate, 500)·속도 제한(ratelimit_rate, 429 retry_after) 비율 설정 가능
+#
+#   BOT_API_BASE_URL=http://127.0.0.1:8081/bot  (ApplicationBuilder.base_url)
+
+import json
+import time
+import random
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class BotApiState:
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, ratelimit_rate: float = 0.0,
+                 retry_after: int = 1, seed: int = 1):
+        self.latency = latency
+        self.error_rate = error_rate            # 발신 요청 중 500으로 실패시킬 비율
+        self.ratelimit_rate = ratelimit_rate    # 발신 요청 중 429로 거절할 비율
+        self.retry_after = retry_after
+        self.updates: list[dict] = []
+        self.sent: list[dict] = []       # { method, chat_id, text, reply_to, time }
+        self.calls: dict[str, int] = {}
+        self.faults = {"error": 0, "ratelimit": 0}
+        self._rng = random.Random(seed)
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._cond = threading.Condition()
+
+    def push_message(self, chat_id: int, user_id: int, text: str, username: str = "tester") -> int:
+        """그룹 텍스트 메시지 업데이트 추가, update_id 반환"""
+        with self._cond:
+            update_id = self._next_update_id
+            self._next_update_id += 1
+            self.updates.append({
+                "update_id": update_id,
+                "message": {
+                    "message_id": update_id,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private", "title": f"group {chat_id}"},
+                    "from": {"id": user_id, "is_bot": False, "first_name": username, "username": username},
+                    "text": text,
+                    **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+                       if text.startswith("/") else {}),
+                },
+            })
+            self._cond.notify_all()
+            return update_id
+
+    def get_updates(self, offset: int, timeout: float) -> list[dict]:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                # offset 이전 업데이트는 확인 완료로 보고 제거
+                self.updates = [u for u in self.updates if u["update_id"] >= offset]
+                if self.updates or time.monotonic() >= deadline:
+                    return self.updates[:100]
+                self._cond.wait(max(0.0, deadline - time.monotonic()))
+
+    def fault(self) -> str | None:
+        """발신 요청에 주입할 장애 ("ratelimit" / "error" / None)"""
+        with self._cond:
+            r = self._rng.random()
+            kind = "ratelimit" if r < self.ratelimit_rate else "error" if r < self.ratelimit_rate + self.error_rate else None
+            if kind:
+                self.faults[kind] += 1
+            return kind
+
+    def record(self, method: str, params: dict) -> dict:
+        with self._cond:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            message_id = self._next_message_id
+            self._next_message_id += 1
+            chat_id = params.get("chat_id")
+            self.sent.append({"method": method, "chat_id": chat_id, "text": params.get("text"),
+                              "reply_to": params.get("reply_to_message_id"), "time": time.time()})
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            chat_id = 0
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private"},
+            "text": params.get("text") or "",
+        }
+
+
+def _params(handler: BaseHTTPRequestHandler) -> dict:
+    url = urlparse(handler.path)
+    params = {k: v[0] for k, v in parse_qs(url.query).items()}
+    length = int(handler.headers.get("Content-Length") or 0)
+    body = handler.rfile.read(length) if length else b""
+    ctype = handler.headers.get("Content-Type") or ""
+    if body and ctype.startswith("application/json"):
+        params.update(json.loads(body))
+    elif body and ctype.startswith("application/x-www-form-urlencoded"):
+        params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+    elif body and ctype.startswith("multipart/form-data"):
+        # 파일 업로드(sendDocument 등)는 텍스트 필드만 추출
+        boundary = ctype.split("boundary=")[-1].encode()
+        for part in body.split(b"--" + boundary):
+            head, _, value = part.partition(b"\r\n\r\n")
+            if b'name="' in head and b"filename=" not in head:
+                name = head.split(b'name="')[1].split(b'"')[0].decode()
+                params[name] = value.rstrip(b"\r\n").decode(errors="replace")
+    return params
+
+
+def make_handler(state: BotApiState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, code: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            try:
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass    # 종료 중 끊긴 롱 폴링
+
+        def do_GET(self):
+            self.do_POST()
+
+        def do_POST(self):
+            method = urlparse(self.path).path.rsplit("/", 1)[-1]
+            params = _params(self)
+            if method == "getUpdates":
+                result = state.get_updates(int(params.get("offset") or 0), float(params.get("timeout") or 0))
+                return self._reply(200, {"ok": True, "result": result})
+            if state.latency:
+                time.sleep(state.latency)
+            if method == "getMe":
+                result = {"id": 1, "is_bot": True, "first_name": "fake", "username": "fake_bot",
+                          "can_join_groups": True, "can_read_all_group_messages": True,
+                          "supports_inline_queries": False}
+            elif method in ("deleteWebhook", "setWebhook", "answerCallbackQuery", "setMyCommands"):
+                result = True
+            elif method == "getChat":
+                cid = int(params.get("chat_id") or 0)
+                result = {"id": cid, "type": "supergroup" if cid < 0 else "private", "title": f"group {cid}"}
+            else:
+                fault = state.fault()
+                if fault == "ratelimit":
+                    return self._reply(429, {"ok": False, "error_code": 429,
+                                             "description": f"Too Many Requests: retry after {state.retry_after}",
+                                             "parameters": {"retry_after": state.retry_after}})
+                if fault == "error":
+                    return self._reply(500, {"ok": False, "error_code": 500, "description": "Internal Server Error"})
+                result = state.record(method, params)
+            self._reply(200, {"ok": True, "result": result})
+
+    return Handler
+
+
+def serve(port: int, state: BotApiState | None = None) -> tuple[ThreadingHTTPServer, BotApiState]:
+    state = state or BotApiState()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
@@ -0,0 +1,123 @@
+# tools/fake_translate.py
+# 부하 테스트용 로컬 Google Translate v2 대체 서버
+#  - POST /language/translate/v2         q(여러 개 가능), target → "[target] 원문"
+#  - POST /language/translate/v2/detect  q → 문자 체계로 추정한 언어 (판단 불가 시 en)
+#  - 응답 지연(latency), 오류(error_rate, 500)·할당량 초과(ratelimit_rate, 429) 비율 설정 가능
+#
+#   python tools/fake_translate.py --port 8092 [--latency 0.15] [--error-rate 0.01] [--ratelimit-rate 0.01]
+#   TRANSLATE_BASE_URL=http://127.0.0.1:8092/language/translate/v2
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import script_detect
+
+PATH = "/language/translate/v2"
+
+
+class TranslateState:
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, ratelimit_rate: float = 0.0, seed: int = 2):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.ratelimit_rate = ratelimit_rate
+        self.calls = {"translate": 0, "detect": 0}
+        self.texts = 0                       # 번역 요청에 담긴 문장 수
+        self.chars = 0                       # 번역 요청에 담긴 글자 수
+        self.faults = {"error": 0, "ratelimit": 0}
+        self._rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def fault(self) -> str | None:
+        with self.lock:
+            r = self._rng.random()
+            kind = "ratelimit" if r < self.ratelimit_rate else "error" if r < self.ratelimit_rate + self.error_rate else None
+            if kind:
+                self.faults[kind] += 1
+            return kind
+
+
+def make_handler(state: TranslateState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, code: int, body: dict) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            form = parse_qs(self.rfile.read(length).decode()) if length else {}
+            form.update(parse_qs(url.query))
+            texts = form.get("q", [])
+            if url.path not in (PATH, PATH + "/detect") or not texts:
+                return self._json(404 if url.path not in (PATH, PATH + "/detect") else 400,
+                                  {"error": {"code": 400, "message": "bad request"}})
+            if state.latency:
+                time.sleep(state.latency)
+            fault = state.fault()
+            if fault == "ratelimit":
+                return self._json(429, {"error": {"code": 429, "message": "User Rate Limit Exceeded",
+                                                  "status": "RESOURCE_EXHAUSTED"}})
+            if fault == "error":
+                return self._json(500, {"error": {"code": 500, "message": "Internal error", "status": "INTERNAL"}})
+
+            if url.path.endswith("/detect"):
+                with state.lock:
+                    state.calls["detect"] += 1
+                detections = [[{"language": script_detect.detect(t).lang or "en", "confidence": 1.0,
+                                "isReliable": False}] for t in texts]
+                return self._json(200, {"data": {"detections": detections}})
+
+            target = form.get("target", ["en"])[0]
+            with state.lock:
+                state.calls["translate"] += 1
+                state.texts += len(texts)
+                state.chars += sum(map(len, texts))
+            translations = [{"translatedText": f"[{target}] {t}",
+                             "detectedSourceLanguage": script_detect.detect(t).lang or "en"} for t in texts]
+            self._json(200, {"data": {"translations": translations}})
+
+    return Handler
+
+
+def serve(port: int, state: TranslateState | None = None) -> tuple[ThreadingHTTPServer, TranslateState]:
+    state = state or TranslateState()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8092)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--ratelimit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server, _ = serve(args.port, TranslateState(args.latency, args.error_rate, args.ratelimit_rate))
+    print(f"fake translate listening on http://127.0.0.1:{args.port}{PATH}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
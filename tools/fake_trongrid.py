@@ -0,0 +1,150 @@
+# tools/fake_trongrid.py
+# 결제 폴러 확인용 로컬 Trongrid 대체 서버
+#
+#   python tools/fake_trongrid.py --port 8091          # 서버만 실행 (TRONGRID_BASE_URL=http://127.0.0.1:8091)
+#   python tools/fake_trongrid.py --demo               # 서버 + payment 폴러 일괄 확인 시연
+#
+# 입금 추가: POST /_transfers  {"transaction_id": "...", "to": "...", "value": "30000000"}
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USDT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+
+
+class TrongridState:
+    def __init__(self):
+        self.transfers: list[dict] = []
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def add(self, item: dict) -> None:
+        item.setdefault("block_timestamp", int(time.time() * 1000))
+        item.setdefault("token_info", {"address": USDT, "decimals": 6, "symbol": "USDT"})
+        item.setdefault("type", "Transfer")
+        with self.lock:
+            self.transfers.append(item)
+
+
+def make_handler(state: TrongridState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, code: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            # /v1/accounts/{address}/transactions/trc20
+            if len(parts) != 5 or parts[:2] != ["v1", "accounts"] or parts[3:] != ["transactions", "trc20"]:
+                return self._json(404, {"success": False})
+            state.requests += 1
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            address = parts[2]
+            min_ts = int(q.get("min_timestamp", 0))
+            contract = q.get("contract_address")
+            limit = int(q.get("limit", 20))
+            offset = int(q.get("fingerprint", 0))
+            with state.lock:
+                rows = [
+                    t for t in reversed(state.transfers)
+                    if (q.get("only_to") != "true" or t["to"] == address)
+                    and t["block_timestamp"] >= min_ts
+                    and (not contract or t["token_info"]["address"] == contract)
+                ]
+            page = rows[offset:offset + limit]
+            meta = {"page_size": len(page)}
+            if offset + limit < len(rows):
+                meta["fingerprint"] = str(offset + limit)
+            self._json(200, {"data": page, "success": True, "meta": meta})
+
+        def do_POST(self):
+            if self.path != "/_transfers":
+                return self._json(404, {"success": False})
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            state.add(body)
+            self._json(200, {"success": True})
+
+    return Handler
+
+
+def serve(port: int, state: TrongridState | None = None) -> tuple[ThreadingHTTPServer, TrongridState]:
+    state = state or TrongridState()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+async def demo(port: int) -> None:
+    """대기 결제 3건을 넣고 입금 목록 1회 조회로 일괄 확인되는지 시연"""
+    receiver = "TFakeReceiverAddress000000000000000"
+    os.environ["TRONGRID_BASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["TRC20_RECEIVER_ADDRESS"] = receiver
+    os.environ.setdefault("AUDIT_DIR", tempfile.mkdtemp(prefix="audit-"))
+    import payment, database, http_client, auditlog
+
+    server, state = serve(port)
+    sent = []
+
+    class Bot:
+        async def send_message(self, chat_id, text, **kw):
+            sent.append((chat_id, text))
+
+    class Context:
+        bot = Bot()
+        bot_data: dict = {}
+
+    now = time.time()
+    for i in range(3):
+        payment.pending_payments[f"tx{i}"] = {"user_id": 100 + i, "chat_id": 100 + i, "code": f"PAID{i}", "since": now}
+    state.add({"transaction_id": "tx0", "to": receiver, "value": "30000000"})
+    state.add({"transaction_id": "tx1", "to": receiver, "value": "1000000"})     # 금액 부족
+    state.add({"transaction_id": "other", "to": receiver, "value": "50000000"})
+
+    await payment.poll_pending(Context)
+    await http_client.close()
+    server.shutdown()
+
+    print(f"trongrid requests : {state.requests}")
+    print(f"still pending     : {sorted(payment.pending_payments)}")
+    print(f"activated         : {database._payments}")
+    print(f"audit             : {[(e.action, e.code, e.tx) for e in auditlog.query()]}")
+    for chat_id, text in sent:
+        print(f"  → {chat_id}: {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--demo", action="store_true")
+    args = parser.parse_args()
+    if args.demo:
+        asyncio.run(demo(args.port))
+        return
+    server, _ = serve(args.port)
+    print(f"fake trongrid listening on http://127.0.0.1:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
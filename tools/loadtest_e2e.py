@@ -0,0 +1,226 @@
+# tools/loadtest_e2e.py
+# 가짜 Bot API + 가짜 Translate 서버로 main.py 전체 경로 부하 테스트
+#  - 그룹마다 코드 발급·등록으로 번역을 켠 뒤, 여러 언어 사용자가 섞인 그룹 대화를 목표 속도로 재생
+#  - 메시지 → 번역 응답(reply_to) 지연 시간 분위수, 처리량, 봇 프로세스 RSS 변화 측정
+#  - 두 가짜 서버 모두 지연·오류(500)·속도 제한(429) 비율 설정 가능 (설정은 트래픽 재생 중에만 적용)
+#  - 결과는 JSON 파일로 저장해 실행 간 비교 (--out, 기본 loadtest-results/e2e-<시각>.json)
+#
+#   python tools/loadtest_e2e.py [--groups 40] [--rate 10] [--duration 30]
+#                                [--translate-latency 0.15] [--translate-error-rate 0.01] [--translate-429-rate 0.01]
+#                                [--botapi-latency 0.02] [--botapi-error-rate 0] [--botapi-429-rate 0]
+
+import os
+import sys
+import json
+import time
+import signal
+import random
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import fake_translate
+from fake_botapi import serve, BotApiState
+from loadtest_workers import ask_many
+
+LANGS = ["ko", "zh", "km", "vi"]
+CORPUS = {
+    "ko": ["오늘 몇 시에 출근해요?", "네 알겠습니다", "내일 8시 교대입니다", "가격이 얼마예요?",
+           "회의는 3시로 변경", "오늘 휴무 맞나요", "수고하셨습니다", "창고 정리 끝났어요"],
+    "zh": ["今天几点上班？", "好的，谢谢", "价格多少钱", "明天八点换班", "辛苦了", "我已经到了", "请稍等一下"],
+    "km": ["អរគុណច្រើន", "ថ្ងៃនេះម៉ោងប៉ុន្មាន?", "ខ្ញុំមកដល់ហើយ", "ស្អែកជួបគ្នា"],
+    "vi": ["Hôm nay mấy giờ làm?", "Cảm ơn nhiều", "Giá bao nhiêu?", "Mai ca 8 giờ", "Tôi đến rồi", "Chờ một chút"],
+}
+
+
+def _rss_mb(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _scrape(port: int) -> dict:
+    """메트릭 엔드포인트의 합계·개수·게이지 (버킷 제외)"""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as res:
+            text = res.read().decode()
+    except OSError:
+        return {}
+    out = {}
+    for line in text.splitlines():
+        if line.startswith("bot_") and "_bucket" not in line:
+            key, _, value = line.rpartition(" ")
+            out[key] = float(value)
+    return out
+
+
+def setup_groups(state: BotApiState, groups: int) -> dict[int, list[tuple[int, str]]]:
+    """그룹별 사용자(서로 다른 언어 3명) 생성, 첫 사용자가 코드를 발급받아 그룹에 등록"""
+    members = {}
+    for g in range(groups):
+        gid = -100000 - g
+        members[gid] = [(10000 + g * 10 + k, LANGS[(g + k) % len(LANGS)]) for k in range(3)]
+    owners = [(users[0][0], users[0][0], "/createcode") for users in members.values()]
+    codes = [text.split(":")[1].split()[0] for text in ask_many(state, owners, timeout=60)]
+    replies = ask_many(state, [(gid, users[0][0], f"/registercode {code}")
+                               for (gid, users), code in zip(members.items(), codes)], timeout=120)
+    failed = [r for r in replies if "등록 완료" not in r]
+    if failed:
+        raise RuntimeError(f"그룹 등록 실패 {len(failed)}건: {failed[:3]}")
+    return members
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8086, help="가짜 Bot API 포트 (+1 Translate, +2 메트릭)")
+    parser.add_argument("--groups", type=int, default=40)
+    parser.add_argument("--rate", type=float, default=10.0, help="초당 메시지 수 (전체)")
+    parser.add_argument("--duration", type=float, default=30.0, help="트래픽 재생 시간(초)")
+    parser.add_argument("--drain", type=float, default=30.0, help="재생 후 남은 응답을 기다리는 최대 시간(초)")
+    parser.add_argument("--repeat-texts", action="store_true", help="같은 문장 반복 (번역 캐시 적중 허용)")
+    parser.add_argument("--translate-latency", type=float, default=0.15)
+    parser.add_argument("--translate-error-rate", type=float, default=0.0)
+    parser.add_argument("--translate-429-rate", type=float, default=0.0)
+    parser.add_argument("--botapi-latency", type=float, default=0.02)
+    parser.add_argument("--botapi-error-rate", type=float, default=0.0)
+    parser.add_argument("--botapi-429-rate", type=float, default=0.0)
+    parser.add_argument("--env", action="append", default=[], help="봇 프로세스 추가 환경 변수 KEY=VALUE")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    bot_server, bot = serve(args.port, BotApiState())
+    tr_server, tr = fake_translate.serve(args.port + 1)
+    tmp = tempfile.mkdtemp(prefix="e2e-")
+    env = dict(os.environ,
+               BOT_TOKEN="123456:TEST",
+               BOT_API_BASE_URL=f"http://127.0.0.1:{args.port}/bot",
+               TRANSLATE_BASE_URL=f"http://127.0.0.1:{args.port + 1}{fake_translate.PATH}",
+               GOOGLE_API_KEY="fake",
+               DB_BACKEND="memory",
+               AUDIT_DIR=os.path.join(tmp, "audit"),
+               PERSIST_DIR=os.path.join(tmp, "state"),
+               METRICS_PORT=str(args.port + 2),
+               **dict(kv.split("=", 1) for kv in args.env))
+    proc = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rnd = random.Random(7)
+    pushed: dict[int, float] = {}
+    rss = []
+    try:
+        started = time.perf_counter()
+        members = setup_groups(bot, args.groups)
+        print(f"setup: {args.groups} groups registered in {time.perf_counter() - started:.1f}s")
+
+        # 트래픽 재생 중에만 지연·장애 주입
+        bot.latency, bot.error_rate, bot.ratelimit_rate = args.botapi_latency, args.botapi_error_rate, args.botapi_429_rate
+        tr.latency, tr.error_rate, tr.ratelimit_rate = (args.translate_latency, args.translate_error_rate,
+                                                        args.translate_429_rate)
+        first_reply = len(bot.sent)
+        rss.append((0.0, _rss_mb(proc.pid)))
+        total = int(args.rate * args.duration)
+        gids = list(members)
+        t0 = time.time()
+        next_sample = 1.0
+        for i in range(total):
+            delay = t0 + i / args.rate - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            if time.time() - t0 >= next_sample:
+                rss.append((round(time.time() - t0, 1), _rss_mb(proc.pid)))
+                next_sample += 1.0
+            gid = gids[i % len(gids)]
+            user_id, lang = rnd.choice(members[gid])
+            text = rnd.choice(CORPUS[lang]) if args.repeat_texts else f"{rnd.choice(CORPUS[lang])} ({i})"
+            message_id = bot.push_message(gid, user_id, text, username=f"u{user_id}")
+            pushed[message_id] = time.time()
+        sent_seconds = time.time() - t0
+
+        # 남은 응답 대기 (새 응답이 drain초 동안 없거나 모두 받으면 종료)
+        last_count, last_change = -1, time.time()
+        while time.time() - last_change < args.drain:
+            answered = {int(m["reply_to"]) for m in bot.sent[first_reply:] if m.get("reply_to")}
+            if len(answered & pushed.keys()) == total:
+                break
+            if len(bot.sent) != last_count:
+                last_count, last_change = len(bot.sent), time.time()
+            time.sleep(0.2)
+        rss.append((round(time.time() - t0, 1), _rss_mb(proc.pid)))
+        scraped = _scrape(args.port + 2)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            _, stderr = proc.communicate(timeout=60)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            _, stderr = proc.communicate()
+        bot_server.shutdown()
+        tr_server.shutdown()
+
+    latencies, reply_times = [], []
+    for m in bot.sent[first_reply:]:
+        sent_at = pushed.get(int(m["reply_to"])) if m.get("reply_to") else None
+        if sent_at is not None:
+            latencies.append(m["time"] - sent_at)
+            reply_times.append(m["time"])
+    span = (max(reply_times) - t0) if reply_times else 0.0
+    rss_values = [v for _, v in rss if v is not None]
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "config": vars(args),
+        "messages": total,
+        "replies": len(latencies),
+        "unanswered": total - len(latencies),
+        "send_rate": total / sent_seconds if sent_seconds else 0.0,
+        "throughput": len(latencies) / span if span else 0.0,
+        "latency_ms": {name: round(_percentile(latencies, q) * 1000, 1)
+                       for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+        "rss_mb": {"start": rss_values[0] if rss_values else None, "end": rss_values[-1] if rss_values else None,
+                   "peak": max(rss_values) if rss_values else None,
+                   "growth": rss_values[-1] - rss_values[0] if rss_values else None, "samples": rss},
+        "botapi": {"calls": bot.calls, "faults": bot.faults},
+        "translate": {"calls": tr.calls, "texts": tr.texts, "chars": tr.chars, "faults": tr.faults},
+        "metrics": scraped,
+        "exit_code": proc.returncode,
+    }
+    out = args.out or os.path.join("loadtest-results", f"e2e-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    lat = result["latency_ms"]
+    print(f"messages   : {total} at {result['send_rate']:.1f}/s, replies {len(latencies)} "
+          f"({result['unanswered']} unanswered)")
+    print(f"throughput : {result['throughput']:.1f} replies/s")
+    print(f"latency    : p50 {lat['p50']}ms · p95 {lat['p95']}ms · p99 {lat['p99']}ms · max {lat['max']}ms")
+    if rss_values:
+        print(f"bot RSS    : {rss_values[0]:.1f} → {rss_values[-1]:.1f} MB (peak {max(rss_values):.1f})")
+    print(f"fake APIs  : botapi {bot.calls.get('sendMessage', 0)} sends, faults {bot.faults}; "
+          f"translate {tr.calls}, faults {tr.faults}")
+    print(f"results    : {out}")
+    if proc.returncode:
+        print(stderr[-2000:])
+
+
+if __name__ == "__main__":
+    main()
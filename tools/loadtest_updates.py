@@ -0,0 +1,77 @@
+# tools/loadtest_updates.py
+# 업데이트 동시 처리 부하 테스트 (로컬 가짜 Bot API 사용)
+#  - 여러 그룹에 메시지를 한꺼번에 넣고, 느린 핸들러(번역 대기 모사)로 처리 시간·순서 확인
+#
+#   python tools/loadtest_updates.py [--groups 50] [--per-group 10] [--handler-ms 200] [--concurrency 1,32]
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+from updates import ChatOrderedApplication
+from fake_botapi import serve, BotApiState
+
+
+async def run_once(port: int, groups: int, per_group: int, handler_ms: float, concurrency: int) -> dict:
+    server, state = serve(port, BotApiState())
+
+    async def slow_echo(update, ctx):
+        await asyncio.sleep(handler_ms / 1000)
+        await update.message.reply_text(update.message.text)
+
+    app = (
+        ApplicationBuilder()
+        .token("123456:TEST")
+        .base_url(f"http://127.0.0.1:{port}/bot")
+        .application_class(ChatOrderedApplication, {"max_concurrent": concurrency})
+        .build()
+    )
+    app.add_handler(MessageHandler(filters.TEXT, slow_echo))
+
+    total = groups * per_group
+    for k in range(per_group):
+        for g in range(groups):
+            state.push_message(-1000 - g, 10 + g, f"{g}:{k}")
+
+    async with app:
+        await app.start()
+        start = time.perf_counter()
+        await app.updater.start_polling(poll_interval=0.0, timeout=1)
+        while len(state.sent) < total and time.perf_counter() - start < 300:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        await app.updater.stop()
+        await app.stop()
+    server.shutdown()
+
+    # 그룹별 응답 순서 확인
+    seen: dict[str, list[int]] = {}
+    for item in state.sent:
+        g, k = item["text"].split(":")
+        seen.setdefault(g, []).append(int(k))
+    in_order = all(ks == sorted(ks) for ks in seen.values())
+    return {"concurrency": concurrency, "updates": total, "replies": len(state.sent),
+            "seconds": elapsed, "per_sec": len(state.sent) / elapsed, "in_order": in_order}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--per-group", type=int, default=10)
+    parser.add_argument("--handler-ms", type=float, default=200)
+    parser.add_argument("--concurrency", default="1,32")
+    args = parser.parse_args()
+
+    for i, c in enumerate(int(x) for x in args.concurrency.split(",")):
+        r = asyncio.run(run_once(args.port + i, args.groups, args.per_group, args.handler_ms, c))
+        print(f"concurrency={r['concurrency']:<4} {r['replies']}/{r['updates']} replies "
+              f"in {r['seconds']:.2f}s ({r['per_sec']:.1f}/s), per-chat order kept: {r['in_order']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# tools/loadtest_workers.py
+# 다중 워커(WORKERS=N) 로컬 확인 하네스
+#  - 가짜 Bot API + 임시 SQLite 파일로 main.py를 워커 N개로 실행
+#  - 서로 다른 워커가 맡은 채팅에서 명령을 보내 공유 상태 일관성 확인
+#    · 소유자 인증 → 다른 워커의 제어 그룹에서 소유자 명령 사용
+#    · 같은 사용자가 두 워커에서 동시에 /createcode → 무료 한도 1개만 발급
+#    · 그룹 등록 후 제어 그룹에서 코드 연장 → 각 그룹 워커의 /remaining에 반영
+#
+#   python tools/loadtest_workers.py [--workers 3] [--users 12]
+
+import os
+import sys
+import time
+import signal
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from fake_botapi import serve, BotApiState
+
+OWNER         = 1
+CONTROL_GROUP = -99999
+SECRET        = "loadtest-secret"
+
+
+def ask_many(state: BotApiState, items: list[tuple[int, int, str]], timeout: float = 20) -> list[str]:
+    """여러 채팅(서로 다른 chat_id)에 동시에 보내고 각 채팅의 첫 응답 반환"""
+    start = len(state.sent)
+    for chat_id, user_id, text in items:
+        state.push_message(chat_id, user_id, text)
+    deadline = time.monotonic() + timeout
+    while True:
+        got = {}
+        for m in state.sent[start:]:
+            chat_id = int(m["chat_id"])
+            got.setdefault(chat_id, m["text"])
+        if all(chat_id in got for chat_id, _, _ in items):
+            return [got[chat_id] for chat_id, _, _ in items]
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"응답 없음: {[c for c, _, _ in items if c not in got]}")
+        time.sleep(0.02)
+
+
+def ask(state: BotApiState, chat_id: int, user_id: int, text: str) -> str:
+    return ask_many(state, [(chat_id, user_id, text)])[0]
+
+
+def check(results: list, name: str, ok: bool, detail: str = "") -> None:
+    results.append(ok)
+    print(f"  [{'ok' if ok else 'FAIL'}] {name}{' - ' + detail if detail else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--users", type=int, default=12)
+    parser.add_argument("--sync", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server, state = serve(args.port, BotApiState())
+    tmp = tempfile.mkdtemp(prefix="workers-")
+    db_path = os.path.join(tmp, "bot.db")
+    env = dict(os.environ,
+               BOT_TOKEN="123456:TEST",
+               BOT_API_BASE_URL=f"http://127.0.0.1:{args.port}/bot",
+               OWNER_SECRET=SECRET,
+               WORKERS=str(args.workers),
+               DB_PATH=db_path,
+               AUDIT_DIR=os.path.join(tmp, "audit"),
+               DB_SYNC_INTERVAL=str(args.sync),
+               WORKERS_POLL_TIMEOUT="1")
+    proc = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env)
+    shard = lambda chat_id: chat_id % args.workers
+    settle = args.sync * 4
+    results: list[bool] = []
+    try:
+        started = time.perf_counter()
+        reply = ask(state, OWNER, OWNER, f"/auth {SECRET}")
+        print(f"workers up in {time.perf_counter() - started:.1f}s")
+        check(results, "소유자 인증", "완료" in reply, reply)
+
+        time.sleep(settle)
+        reply = ask(state, CONTROL_GROUP, OWNER, "/setcontrolgroup")
+        check(results, f"다른 워커의 제어 그룹 지정 (worker {shard(OWNER)} → {shard(CONTROL_GROUP)})",
+              "제어 그룹" in reply, reply)
+
+        # 같은 사용자가 개인 채팅과 그룹(다른 워커)에서 동시에 코드 발급
+        users = [1000 + i for i in range(args.users)]
+        groups = [-100000 - i for i in range(args.users)]
+        side = [-200000 - i for i in range(args.users)]
+        items = [(u, u, "/createcode") for u in users] + [(s, u, "/createcode") for s, u in zip(side, users)]
+        started = time.perf_counter()
+        replies = ask_many(state, items)
+        elapsed = time.perf_counter() - started
+        codes = {}
+        for (chat_id, user_id, _), text in zip(items, replies):
+            if "코드 생성" in text:
+                codes.setdefault(user_id, []).append(text.split(":")[1].split()[0])
+        issued_once = all(len(codes.get(u, [])) == 1 for u in users)
+        check(results, f"워커 간 동시 발급에도 사용자당 1개 ({len(items)}건 {elapsed:.2f}s)", issued_once,
+              f"{sum(len(v) for v in codes.values())}개 발급")
+        codes = {u: v[0] for u, v in codes.items()}
+
+        replies = ask_many(state, [(g, u, f"/registercode {codes[u]}") for g, u in zip(groups, users)])
+        check(results, "그룹 등록", all("등록 완료" in r for r in replies))
+
+        time.sleep(settle)
+        extended = [ask(state, CONTROL_GROUP, OWNER, f"/extendissuedcode {codes[u]} 10") for u in users]
+        check(results, "제어 그룹에서 코드 연장", all("연장 완료" in r for r in extended))
+
+        time.sleep(settle)
+        replies = ask_many(state, [(g, u, "/remaining") for g, u in zip(groups, users)])
+        days = [int(r.split("남은: ")[1].split("일")[0]) for r in replies if "남은: " in r]
+        check(results, "그룹 워커에 연장 반영", len(days) == len(groups) and min(days) >= 12,
+              f"남은 일수 {sorted(set(days))}")
+
+        reply = ask(state, CONTROL_GROUP, OWNER, "/listcodelogs")
+        check(results, "코드 로그 공유", reply.count("issue_user") + reply.count("extend_issue") >= min(20, args.users))
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(60)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        server.shutdown()
+
+    conn = sqlite3.connect(db_path)
+    mismatched = conn.execute(
+        "SELECT COUNT(*) FROM groups g JOIN codes c ON c.code = g.code WHERE g.connected = 1 AND g.expires != c.expires"
+    ).fetchone()[0]
+    conn.close()
+    check(results, "저장소 코드·그룹 만료일 일치", mismatched == 0, f"불일치 {mismatched}")
+    check(results, "정상 종료", proc.returncode == 0, f"exit {proc.returncode}")
+
+    by_worker = {}
+    for chat_id in [OWNER, CONTROL_GROUP, *users, *groups, *side]:
+        by_worker[shard(chat_id)] = by_worker.get(shard(chat_id), 0) + 1
+    print(f"chats per worker : {dict(sorted(by_worker.items()))}")
+    print(f"{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
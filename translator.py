@@ -1,42 +1,221 @@
-# translator.py
-
-import os
-import requests
-
-API_KEY = os.getenv("GOOGLE_API_KEY")
-BASE_URL = "https://translation.googleapis.com/language/translate/v2"
-
-async def handle_translation(update, context):
-    text = update.message.text
-
-    # 언어 감지
-    detect_res = requests.post(
-        f"{BASE_URL}/detect",
-        params={"key": API_KEY, "q": text}
-    ).json()
-    src = detect_res["data"]["detections"][0][0]["language"]
-
-    targets = {
-        "ko": "한국어",
-        "zh": "中文",
-        "km": "ភាសាខ្មែរ",
-        "vi": "Tiếng Việt"
-    }
-
-    parts = []
-    for lang, name in targets.items():
-        if lang == src:
-            continue
-        resp = requests.post(
-            BASE_URL,
-            params={
-                "key": API_KEY,
-                "q": text,
-                "target": lang,
-                "format": "text"
-            }
-        ).json()
-        translated = resp["data"]["translations"][0]["translatedText"]
-        parts.append(f"[{name}] {translated}")
-
-    await update.message.reply_text("\n".join(parts))
+# translator.py
+
+import os
+import time
+import asyncio
+import logging
+import unicodedata
+from dotenv import load_dotenv
+import outbox
+import database
+import http_client
+import script_detect
+import prefilter
+import metrics
+from cache import TTLCache
+
+load_dotenv()
+API_KEY = os.getenv("GOOGLE_API_KEY")
+TRANSLATE_CACHE_SIZE = int(os.getenv("TRANSLATE_CACHE_SIZE", "20000"))
+TRANSLATE_CACHE_TTL  = float(os.getenv("TRANSLATE_CACHE_TTL", "86400"))
+DETECT_CACHE_SIZE    = int(os.getenv("DETECT_CACHE_SIZE", "20000"))
+DETECT_CACHE_TTL     = float(os.getenv("DETECT_CACHE_TTL", "86400"))
+LOCAL_DETECT_MIN_CONFIDENCE = float(os.getenv("LOCAL_DETECT_MIN_CONFIDENCE", "0.8"))
+BASE_URL = os.getenv("TRANSLATE_BASE_URL", "https://translation.googleapis.com/language/translate/v2").rstrip("/")
+LANG_TIMEOUT = float(os.getenv("TRANSLATE_LANG_TIMEOUT", "6"))   # 언어별 번역 제한 시간(초)
+
+TARGETS = {
+    "ko": "한국어",
+    "zh": "中文",
+    "km": "ភាសាខ្មែរ",
+    "vi": "Tiếng Việt"
+}
+FAILED_MARK = "⚠️ 번역 실패"
+
+translation_cache = TTLCache(TRANSLATE_CACHE_SIZE, TRANSLATE_CACHE_TTL)  # (text, src, target) → 번역문
+detect_cache      = TTLCache(DETECT_CACHE_SIZE, DETECT_CACHE_TTL)        # text → 언어 코드
+detect_stats = {"local": 0, "remote": 0}
+translate_stats = {"calls": 0, "texts": 0}   # 실제 번역 API 호출 수 / 전송한 문장 수
+saved_calls: dict[int, int] = {}             # group_id → 그룹 언어 구성 덕분에 생략한 번역 API 호출 수
+_api_seconds = {api: metrics.histogram("api_request_seconds", "외부 API 호출 시간", api=api) for api in ("translate", "detect")}
+_api_errors  = {api: metrics.counter("api_errors_total", "외부 API 호출 오류 수", api=api) for api in ("translate", "detect")}
+
+
+def normalize(text: str) -> str:
+    """캐시 키용 정규화 (NFC + 공백 정리)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+async def _post(url: str, data: dict) -> dict:
+    """공유 세션으로 Google API 호출 (이벤트 루프를 막지 않음)"""
+    api = "detect" if url.endswith("/detect") else "translate"
+    started = time.perf_counter()
+    try:
+        res = await http_client.get_client().post(url, params={"key": API_KEY}, data=data)
+        res.raise_for_status()
+        return res.json()
+    except Exception:
+        _api_errors[api].inc()
+        raise
+    finally:
+        _api_seconds[api].observe(time.perf_counter() - started)
+
+
+async def detect_language(text: str) -> str:
+    """메시지 언어 코드 (지역 구분 없는 기본 코드, zh-CN → zh)"""
+    # 문자 체계로 확실히 판별되면 원격 호출 생략
+    local = script_detect.detect(text)
+    if local.lang and local.confidence >= LOCAL_DETECT_MIN_CONFIDENCE:
+        detect_stats["local"] += 1
+        return local.lang
+
+    key = normalize(text)
+    src = detect_cache.get(key)
+    if src is None:
+        res = await _post(f"{BASE_URL}/detect", {"q": text})
+        src = res["data"]["detections"][0][0]["language"]
+        detect_cache.set(key, src)
+        detect_stats["remote"] += 1
+    # 번역 대상 비교·참가자 학습·생략 집계가 모두 같은 코드를 쓰도록 정규화 (이전 스냅샷의 캐시 값 포함)
+    return src.split("-")[0].lower()
+
+
+async def translate_text(text: str, target: str, src: str | None = None) -> str:
+    key = (normalize(text), src, target)
+    translated = translation_cache.get(key)
+    if translated is None:
+        res = await _post(BASE_URL, {"q": text, "target": target, "format": "text"})
+        translated = res["data"]["translations"][0]["translatedText"]
+        translation_cache.set(key, translated)
+        translate_stats["calls"] += 1
+        translate_stats["texts"] += 1
+    return translated
+
+
+async def translate_batch(texts: list[str], target: str, srcs: list[str | None]) -> list[str]:
+    """여러 문장을 q 파라미터 여러 개로 한 번에 번역 (캐시에 있는 문장은 제외)"""
+    keys = [(normalize(t), src, target) for t, src in zip(texts, srcs)]
+    results = [translation_cache.get(k) for k in keys]
+    todo = [i for i, r in enumerate(results) if r is None]
+    if todo:
+        res = await _post(BASE_URL, {"q": [texts[i] for i in todo], "target": target, "format": "text"})
+        for i, item in zip(todo, res["data"]["translations"]):
+            results[i] = item["translatedText"]
+            translation_cache.set(keys[i], results[i])
+        translate_stats["calls"] += 1
+        translate_stats["texts"] += len(todo)
+    return results
+
+
+async def _translate_or_none(text: str, target: str, src: str | None = None) -> str | None:
+    """언어별 제한 시간 내 번역, 실패 시 None (다른 언어에 영향 없음)"""
+    try:
+        return await asyncio.wait_for(translate_text(text, target, src), LANG_TIMEOUT)
+    except Exception as e:
+        logging.warning("번역 실패 (%s): %r", target, e)
+        return None
+
+
+async def translate_all(text: str, src: str, targets: list[str] | None = None) -> list[tuple[str, str | None]]:
+    """src를 제외한 대상 언어(기본 TARGETS 전체)로 동시에 번역, (언어, 결과) 반환"""
+    langs = [lang for lang in (targets or TARGETS) if lang != src]
+    results = await asyncio.gather(*(_translate_or_none(text, lang, src) for lang in langs))
+    return list(zip(langs, results))
+
+
+async def translate_batch_all(texts: list[str], srcs: list[str | None],
+                              targets: list[str] | None = None) -> dict[str, list[str | None]]:
+    """대상 언어(기본 TARGETS 전체)별로 한 번씩 일괄 번역 (원문 언어가 같은 문장은 None, 실패한 언어는 FAILED_MARK)"""
+    async def one(lang: str) -> list[str | None]:
+        idx = [i for i, src in enumerate(srcs) if src != lang]
+        out: list[str | None] = [None] * len(texts)
+        if not idx:
+            return out
+        try:
+            translated = await asyncio.wait_for(
+                translate_batch([texts[i] for i in idx], lang, [srcs[i] for i in idx]), LANG_TIMEOUT
+            )
+        except Exception as e:
+            logging.warning("일괄 번역 실패 (%s): %r", lang, e)
+            translated = [FAILED_MARK] * len(idx)
+        for i, t in zip(idx, translated):
+            out[i] = t
+        return out
+
+    langs = list(targets or TARGETS)
+    results = await asyncio.gather(*(one(lang) for lang in langs))
+    return dict(zip(langs, results))
+
+
+# ────────────────────────────
+# 그룹 언어 구성
+# ────────────────────────────
+
+def learn_language(group_id: int, user_id: int, username: str, src: str | None) -> None:
+    """감지된 메시지 언어(detect_language 결과)를 참가자 정보에 반영 (번역 대상 언어만)"""
+    if src in TARGETS:
+        database.register_participant(group_id, user_id, username, src)
+
+
+def target_languages(group_id: int) -> list[str]:
+    """그룹 번역 대상 언어 (고정 설정 > 참가자 언어 구성 > 전체), TARGETS 순서
+    학습된 언어가 하나뿐이면 아직 다른 언어 참가자가 말하지 않은 것일 수 있으므로 전체"""
+    langs = database.get_group_language_override(group_id)
+    if not langs:
+        learned = database.group_languages(group_id)
+        langs = learned if len(learned) > 1 else TARGETS
+    return [lang for lang in TARGETS if lang in langs] or list(TARGETS)
+
+
+def count_saved(group_id: int, srcs: list[str | None], targets: list[str]) -> None:
+    """대상에서 빠진 언어마다 필요했을 번역 호출(문장 1개 이상이면 1회)을 생략한 것으로 집계"""
+    saved = sum(1 for lang in TARGETS if lang not in targets and any(src != lang for src in srcs))
+    if saved:
+        saved_calls[group_id] = saved_calls.get(group_id, 0) + saved
+
+
+def cache_stats() -> dict:
+    return {
+        "translate": translation_cache.stats(),
+        "detect":    detect_cache.stats(),
+        "detect_calls": dict(detect_stats),
+        "translate_calls": dict(translate_stats),
+        "saved_calls": sum(saved_calls.values()),
+    }
+
+
+def format_reply(results: list[tuple[str, str | None]]) -> str:
+    return "\n".join(
+        f"[{TARGETS[lang]}] {translated if translated is not None else FAILED_MARK}"
+        for lang, translated in results
+    )
+
+
+def format_batch_reply(entries: list[tuple[str, dict[str, str | None]]]) -> str:
+    """(발신자, {언어: 번역문}) 목록을 발신자별 블록으로 묶은 한 개의 응답"""
+    blocks = []
+    for sender, translations in entries:
+        lines = [f"👤 {sender}"]
+        lines += [f"[{TARGETS[lang]}] {t}" for lang, t in translations.items() if t is not None]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+async def handle_translation(update, context):
+    # 번역할 내용이 없으면(이모지·URL·숫자만 등) 감지·번역 호출 없이 종료, URL·숫자 등은 가려서 번역
+    prepared = prefilter.prepare(update.message.text)
+    if prepared.skip:
+        return
+    text = prepared.text
+
+    # 언어 감지 → 참가자 언어 학습 → 그룹에서 쓰는 언어로만 번역
+    src = await detect_language(text)
+    gid, user = update.effective_chat.id, update.effective_user
+    learn_language(gid, user.id, user.username or user.full_name, src)
+    targets = target_languages(gid)
+    count_saved(gid, [src], targets)
+
+    results = [(lang, prepared.restore(t)) for lang, t in await translate_all(text, src, targets)]
+    if results:
+        # 그룹 분당 전송 한도로 오래 기다릴 수 있어 큐에 넣고 바로 반환 (순서는 발신 큐가 채팅별로 유지)
+        outbox.reply_nowait(update.message, format_reply(results), outbox.BULK)
@@ -0,0 +1,56 @@
+# updates.py
+# 채팅별 순서를 지키면서 서로 다른 채팅의 업데이트는 동시에 처리하는 Application
+#  - 채팅마다 대기열 하나 + 작업 태스크 하나 (같은 그룹의 응답은 항상 들어온 순서대로)
+#  - 동시에 처리 중인 업데이트 수는 max_concurrent로 제한
+
+import asyncio
+import logging
+from collections import deque
+from telegram import Update
+from telegram.ext import Application
+
+
+def _chat_key(update: object):
+    if isinstance(update, Update) and update.effective_chat:
+        return update.effective_chat.id
+    return None
+
+
+class ChatOrderedApplication(Application):
+    def __init__(self, max_concurrent: int = 32, **kwargs):
+        super().__init__(**kwargs)
+        self.max_concurrent = max_concurrent
+        self._chat_queues: dict = {}          # chat_id → 처리 대기 업데이트
+        self._slots: asyncio.Semaphore | None = None
+
+    @property
+    def pending_updates(self) -> int:
+        return sum(len(q) for q in self._chat_queues.values())
+
+    async def process_update(self, update: object) -> None:
+        """업데이트를 채팅별 대기열에 넣고 바로 반환 (업데이트 수신 루프를 막지 않음)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        key = _chat_key(update)
+        queue = self._chat_queues.get(key)
+        if queue is None:
+            queue = self._chat_queues[key] = deque()
+            queue.append(update)
+            self.create_task(self._chat_worker(key, queue))
+        else:
+            queue.append(update)
+
+    async def _chat_worker(self, key, queue: deque) -> None:
+        try:
+            while queue:
+                try:
+                    async with self._slots:
+                        await super().process_update(queue[0])
+                except Exception:
+                    # 실패한 업데이트만 버리고 같은 채팅의 나머지는 계속 처리
+                    logging.exception("업데이트 처리 실패 (chat %s)", key)
+                finally:
+                    queue.popleft()
+        finally:
+            if self._chat_queues.get(key) is queue:
+                del self._chat_queues[key]
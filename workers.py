@@ -0,0 +1,121 @@
+# workers.py
+# 다중 워커 실행 (WORKERS=N, N ≥ 2)
+#  - 프런트 프로세스: getUpdates 롱 폴링 후 chat_id % N 워커의 큐로 전달 (같은 채팅은 항상 같은 워커)
+#  - 워커 프로세스: main.build_app(updater=False)로 만든 애플리케이션의 update_queue에 넣어 처리
+#  - 코드·그룹·소유자 설정은 공유 SQLite 파일(DB_PATH)로 일치, 번역·채팅 캐시는 워커별
+#  - 만료 스케줄러는 워커 0에서만 실행
+
+import os
+import signal
+import asyncio
+import logging
+import multiprocessing as mp
+from dotenv import load_dotenv
+from telegram import Bot, Update
+from telegram.error import RetryAfter, NetworkError, TimedOut
+import database
+
+load_dotenv()
+BOT_TOKEN            = os.getenv("BOT_TOKEN")
+BOT_API_BASE_URL     = os.getenv("BOT_API_BASE_URL")
+DROP_PENDING_UPDATES = os.getenv("DROP_PENDING_UPDATES", "0") == "1"
+POLL_TIMEOUT         = int(os.getenv("WORKERS_POLL_TIMEOUT", "30"))   # getUpdates 롱 폴링 시간(초)
+
+_STOP = None
+
+
+# ────────────────────────────
+# 워커 프로세스
+# ────────────────────────────
+
+def _worker_entry(index: int, count: int, updates: mp.Queue) -> None:
+    # 종료는 프런트가 보내는 _STOP으로만 (Ctrl+C는 프런트가 받음)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    database.configure_worker(index, count)
+    import outbox
+    outbox.outbox.global_rate /= count
+    import main
+    logging.info("👷 워커 %d/%d 시작 (pid %d)", index, count, os.getpid())
+    asyncio.run(_serve(main.build_app(updater=False), updates))
+
+
+async def _serve(app, updates: mp.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+    try:
+        while True:
+            data = await loop.run_in_executor(None, updates.get)
+            if data is _STOP:
+                break
+            await app.update_queue.put(Update.de_json(data, app.bot))
+    finally:
+        await app.stop()
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+
+# ────────────────────────────
+# 프런트 프로세스
+# ────────────────────────────
+
+def _start_worker(ctx, index: int, count: int, updates: mp.Queue):
+    proc = ctx.Process(target=_worker_entry, args=(index, count, updates), name=f"worker-{index}")
+    proc.start()
+    return proc
+
+
+async def _poll(bot: Bot, queues: list, procs: list, ctx) -> None:
+    count = len(queues)
+    await bot.initialize()
+    await bot.delete_webhook(drop_pending_updates=DROP_PENDING_UPDATES)
+    offset = None
+    while True:
+        # 종료된 워커는 같은 큐로 다시 시작 (대기 중인 업데이트 유지)
+        for i, proc in enumerate(procs):
+            if not proc.is_alive():
+                logging.warning("워커 %d 종료됨 (exit %s), 재시작", i, proc.exitcode)
+                procs[i] = _start_worker(ctx, i, count, queues[i])
+        try:
+            batch = await bot.get_updates(offset=offset, timeout=POLL_TIMEOUT, allowed_updates=Update.ALL_TYPES)
+        except RetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+            continue
+        except (NetworkError, TimedOut) as e:
+            logging.warning("업데이트 수신 오류: %r", e)
+            await asyncio.sleep(1)
+            continue
+        for update in batch:
+            chat = update.effective_chat
+            index = database.shard_of(chat.id, count) if chat else 0
+            queues[index].put(update.to_dict())
+            offset = update.update_id + 1
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run(count: int) -> None:
+    """워커 count개를 띄우고 프런트에서 업데이트 분배 (Ctrl+C / SIGTERM으로 종료)"""
+    ctx = mp.get_context("spawn")
+    queues = [ctx.Queue() for _ in range(count)]
+    procs = [_start_worker(ctx, i, count, queues[i]) for i in range(count)]
+    signal.signal(signal.SIGTERM, _terminate)
+    kwargs = {"base_url": BOT_API_BASE_URL} if BOT_API_BASE_URL else {}
+    bot = Bot(BOT_TOKEN, **kwargs)
+    logging.info("🔀 워커 %d개로 업데이트 분배 시작", count)
+    try:
+        asyncio.run(_poll(bot, queues, procs, ctx))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for q in queues:
+            q.put(_STOP)
+        for proc in procs:
+            proc.join(30)
+            if proc.is_alive():
+                proc.terminate()
+        logging.info("🛑 전체 워커 종료")